@@ -1,17 +1,8 @@
 #!/usr/bin/env python3
 
-import os
 import sys
 
-from taskschedule.main import Main
+from taskschedule.main import main
 
 if __name__ == "__main__":
-    try:
-        main = Main(sys.argv[1:])
-        main.main()
-    except KeyboardInterrupt:
-        print("Interrupted by user.")
-        try:
-            sys.exit(0)
-        except SystemExit:
-            os._exit(0)  # pylint: disable=protected-access
+    main(sys.argv[1:])
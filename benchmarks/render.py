@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark the per-task cost of rendering the schedule.
+
+   Compares the scheduled end times and time column of the tasks computed
+   the way they were before they were memoized (parsing the estimate and
+   converting the timestamps on every call) with the memoized versions, for
+   a number of frames:
+
+       $ python benchmarks/render.py --tasks 2000 --frames 10"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from isodate import parse_duration
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from taskschedule.durations import parse_estimate_duration  # noqa: E402
+from taskschedule.scheduled_task import ScheduledTask  # noqa: E402
+from taskschedule.task_record import TaskRecord, to_datetime  # noqa: E402
+
+ESTIMATES = ("PT15M", "PT30M", "PT45M", "PT1H", "PT1H30M", "PT2H")
+
+# Number of times a frame asks for the end of a task: the time column, the
+# color and the status checks
+END_LOOKUPS = 3
+
+
+def make_data(count: int) -> List[Dict]:
+    rng = random.Random(0)
+    start = datetime(2019, 12, 9, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i + 1,
+            "uuid": f"{i:08d}-0000-0000-0000-000000000000",
+            "description": f"task {i}",
+            "status": "pending",
+            "scheduled": (start + timedelta(minutes=15 * i)).strftime("%Y%m%dT%H%M%SZ"),
+            "estimate": rng.choice(ESTIMATES),
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_scheduled_end(task: ScheduledTask):
+    """The scheduled end as computed before it was memoized."""
+    try:
+        return task["scheduled"] + parse_duration(task["estimate"])
+    except TypeError:
+        return None
+
+
+def legacy_format_time(record: TaskRecord) -> str:
+    """The time column as computed before the datetimes were memoized."""
+    start = to_datetime(record.scheduled_ts)
+    end = to_datetime(record.scheduled_end_ts)
+    for _ in range(END_LOOKUPS - 1):
+        to_datetime(record.scheduled_end_ts)
+    return f"{start:%H:%M}-{end:%H:%M}"
+
+
+def format_time(record: TaskRecord) -> str:
+    start = record.scheduled_start_datetime
+    end = record.scheduled_end_datetime
+    for _ in range(END_LOOKUPS - 1):
+        record.scheduled_end_datetime
+    return f"{start:%H:%M}-{end:%H:%M}"
+
+
+def measure(function: Callable, items: List, frames: int) -> float:
+    """Return the seconds per frame of calling function on every item."""
+    start = time.perf_counter()
+    for _ in range(frames):
+        for item in items:
+            function(item)
+    return (time.perf_counter() - start) / frames
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000, help="number of tasks")
+    parser.add_argument("--frames", type=int, default=10, help="rendered frames")
+    args = parser.parse_args(argv)
+
+    data = make_data(args.tasks)
+
+    tasks = []
+    for task_data in data:
+        task = ScheduledTask(None)
+        task._load_data(task_data)
+        tasks.append(task)
+
+    def scheduled_end(task: ScheduledTask):
+        for _ in range(END_LOOKUPS):
+            task.scheduled_end_datetime
+
+    def legacy_scheduled_ends(task: ScheduledTask):
+        for _ in range(END_LOOKUPS):
+            legacy_scheduled_end(task)
+
+    parse_estimate_duration.cache_clear()
+    start = time.perf_counter()
+    records = [TaskRecord(None, task_data) for task_data in data]
+    build = time.perf_counter() - start
+
+    results = [
+        (
+            "ScheduledTask end",
+            measure(legacy_scheduled_ends, tasks, args.frames),
+            measure(scheduled_end, tasks, args.frames),
+        ),
+        (
+            "TaskRecord time column",
+            measure(legacy_format_time, records, args.frames),
+            measure(format_time, records, args.frames),
+        ),
+    ]
+
+    print(f"{args.tasks} tasks, {args.frames} frames")
+    print(f"building records: {build * 1000:.1f} ms")
+    print(f"{'':<24} {'before':>10} {'after':>10} {'speedup':>8}")
+    for name, before, after in results:
+        print(
+            f"{name:<24} {before * 1000:>7.2f} ms {after * 1000:>7.2f} ms "
+            f"{before / after:>7.1f}x"
+        )
+    print(f"parsed durations: {parse_estimate_duration.cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
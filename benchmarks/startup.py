@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark the startup time of taskschedule.
+
+   Measures the import time of taskschedule.main with `python -X importtime`
+   and the wall-clock time of running `python -m taskschedule --help`, and
+   checks that modules which are only needed by the interface or optional
+   features are not imported on startup.
+
+   Exits with status 1 if a limit is exceeded, so it can guard the startup
+   time in CI:
+
+       $ python benchmarks/startup.py --max-import-ms 150"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Modules which must only be imported when they are used
+DEFERRED_MODULES = (
+    "curses",
+    "asyncio",
+    "tasklib",
+    "isodate",
+    "concurrent.futures",
+    "ctypes",
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(args: List[str]) -> subprocess.CompletedProcess:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return subprocess.run(
+        [sys.executable] + args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        check=True,
+    )
+
+
+def measure_imports(module: str) -> Dict[str, Tuple[int, int]]:
+    """Return the self and cumulative import times in microseconds of the
+       modules imported by the given module."""
+    result = run_python(["-X", "importtime", "-c", f"import {module}"])
+
+    times = {}
+    for line in result.stderr.decode("utf-8").splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def find_deferred_imports(module: str) -> List[str]:
+    """Return the deferred modules which are imported by the given module."""
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    return run_python(["-c", code]).stdout.decode("utf-8").split()
+
+
+def measure_wall_clock(args: List[str], runs: int) -> List[float]:
+    """Return the wall-clock times in seconds of running python with args."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_python(args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="wall-clock runs")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports shown")
+    parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        help="fail if importing taskschedule.main takes longer",
+    )
+    args = parser.parse_args(argv)
+
+    # Warm up the filesystem cache
+    run_python(["-c", "import taskschedule.main"])
+
+    times = measure_imports("taskschedule.main")
+    import_ms = times["taskschedule.main"][1] / 1000
+    print(f"import taskschedule.main: {import_ms:.1f} ms")
+
+    print("slowest imports (cumulative):")
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (_, cumulative_us) in slowest[1 : args.top + 1]:
+        print(f"  {cumulative_us / 1000:7.1f} ms  {name}")
+
+    timings = measure_wall_clock(["-m", "taskschedule", "--help"], args.runs)
+    print(
+        f"taskschedule --help: median {statistics.median(timings) * 1000:.1f} ms, "
+        f"min {min(timings) * 1000:.1f} ms ({args.runs} runs)"
+    )
+
+    failed = False
+    deferred = find_deferred_imports("taskschedule.main")
+    if deferred:
+        print(f"error: imported on startup: {', '.join(deferred)}")
+        failed = True
+
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"error: import took longer than {args.max_import_ms} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -33,5 +33,5 @@ setup(
     scripts=["scripts/taskschedule"],
     include_package_data=True,
     install_requires=["tasklib", "isodate"],
-    extras_require={"dev": ["black", "flake8"]},
+    extras_require={"dev": ["black", "flake8", "isort"]},
 )
@@ -0,0 +1,175 @@
+"""This module provides the AsyncExporter class, which runs taskwarrior
+   exports in the background so the interface keeps handling input while
+   `task export` runs."""
+
+import asyncio
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from tasklib.backends import TaskWarriorException
+
+from taskschedule.sources import Backend, MergedBackend, merge_exports
+from taskschedule.taskwarrior import PatchedTaskWarrior, parse_export_line
+
+
+class AsyncExporter:
+    """Runs exports of a PatchedTaskWarrior or MergedBackend on an asyncio
+       event loop. The loop does not get a thread of its own: the interface's
+       main loop advances it in small, non-blocking steps with `poll`.
+
+       Only the latest request matters. A new request cancels an export that
+       is still running, since its data is out of date, which also kills its
+       `task` process.
+    >>> exporter.request()
+    >>> data = exporter.poll()
+    >>> while data is None:
+    ...     handle_input()
+    ...     data = exporter.poll()
+    >>> schedule.apply(data)
+    """
+
+    def __init__(
+        self, backend: Backend, loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        self.backend = backend
+        self.loop = loop or asyncio.new_event_loop()
+
+        # Before Python 3.8, the exit of a subprocess is only noticed by a
+        # child watcher which is attached to the loop the process runs on
+        self.attached_watcher = sys.platform != "win32" and sys.version_info < (3, 8)
+        if self.attached_watcher:
+            asyncio.set_event_loop(self.loop)
+            asyncio.get_child_watcher().attach_loop(self.loop)
+
+        self.current: Optional[asyncio.Task] = None
+        self.generation = 0
+        self.result: Optional[List[Dict]] = None
+        self.error: Optional[Exception] = None
+
+        # Number of exports which were cancelled by a newer request
+        self.cancelled = 0
+
+    @property
+    def busy(self) -> bool:
+        """Return True if an export is running."""
+        return self.current is not None and not self.current.done()
+
+    def request(self, filter_params: Sequence[str] = ()) -> int:
+        """Start a new export, cancelling the one still running. Return the
+           generation of the new export."""
+        if self.current is not None and not self.current.done():
+            self.current.cancel()
+            self.cancelled += 1
+
+        self.generation += 1
+        self.result = None
+        self.error = None
+        self.current = self.loop.create_task(
+            self.run_export(self.generation, filter_params)
+        )
+        return self.generation
+
+    def pump(self):
+        """Run the callbacks of the event loop which are ready, without
+           waiting for new events."""
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+
+    def poll(self) -> Optional[List[Dict]]:
+        """Advance the event loop and return the data of the latest export
+           once it has finished, or None if there is no new data. Errors of
+           the export are raised here."""
+        self.pump()
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+        result, self.result = self.result, None
+        return result
+
+    def wait(self) -> Optional[List[Dict]]:
+        """Block until the latest export has finished and return its data."""
+        if self.current is not None:
+            self.loop.run_until_complete(asyncio.wait([self.current]))
+        return self.poll()
+
+    def close(self):
+        """Cancel the running export and close the event loop."""
+        if self.current is not None and not self.current.done():
+            self.current.cancel()
+            self.loop.run_until_complete(asyncio.wait([self.current]))
+
+        if self.attached_watcher:
+            asyncio.get_child_watcher().attach_loop(None)
+            asyncio.set_event_loop(None)
+        self.loop.close()
+
+    async def run_export(self, generation: int, filter_params: Sequence[str]):
+        """Export the tasks and store the result, unless a newer export has
+           been requested in the meantime."""
+        try:
+            data = await self.export_data(filter_params)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            if generation == self.generation:
+                self.error = err
+            return
+
+        if generation == self.generation:
+            self.result = data
+
+    async def export_data(self, filter_params: Sequence[str] = ()) -> List[Dict]:
+        """Return the export data of the tasks matching the given filter. The
+           backends of merged data locations are exported concurrently."""
+        if isinstance(self.backend, MergedBackend):
+            sources = list(self.backend.backends)
+            exports = await asyncio.gather(
+                *(
+                    self.export_backend_data(backend, filter_params)
+                    for backend in self.backend.backends.values()
+                )
+            )
+            return list(merge_exports(dict(zip(sources, exports))))
+
+        return await self.export_backend_data(self.backend, filter_params)
+
+    async def export_backend_data(
+        self, backend: PatchedTaskWarrior, filter_params: Sequence[str]
+    ) -> List[Dict]:
+        if backend.native and not filter_params:
+            # Reading the data files does not block on a subprocess, but can
+            # still take a while for large databases
+            return await self.loop.run_in_executor(None, backend.export_data)
+
+        backend.export_count += 1
+        command_args, env = backend.get_export_command(filter_params)
+        process = await asyncio.create_subprocess_exec(
+            *command_args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        try:
+            stdout, stderr = await process.communicate()
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+        if process.returncode:
+            raise TaskWarriorException(
+                stderr.decode("utf-8").strip()
+                + "\nCommand used: "
+                + " ".join(command_args)
+            )
+
+        backend.finish_recurrence()
+
+        tasks = []
+        for raw_line in stdout.splitlines():
+            data = parse_export_line(raw_line)
+            if data is not None:
+                tasks.append(data)
+        return tasks
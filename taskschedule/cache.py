@@ -0,0 +1,91 @@
+"""This module provides the SnapshotCache class, which stores the last
+   exported tasks on disk so that taskschedule can draw its first frame
+   without running taskwarrior."""
+
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+class SnapshotCache:
+    """A cache of the tasks of the last refresh, along with the schedule's
+       date range. An entry is only valid while the data files and the taskrc
+       are unchanged (by modification time and size) and on the same day it
+       was written, since the date range is usually relative to today."""
+
+    version = 1
+
+    def __init__(
+        self,
+        cache_dir: str,
+        data_locations: Sequence[str],
+        taskrc_locations: Sequence[str],
+        arguments: Dict,
+    ):
+        self.files: List[str] = []
+        for data_location in data_locations:
+            self.files.append(os.path.join(data_location, "pending.data"))
+            self.files.append(os.path.join(data_location, "completed.data"))
+        self.files.extend(taskrc_locations)
+        self.arguments = arguments
+
+        identity = json.dumps([list(data_locations), list(taskrc_locations), arguments])
+        name = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+        self.path = os.path.join(os.path.expanduser(cache_dir), f"{name}.json")
+
+    def get_key(self) -> List[Optional[List[float]]]:
+        """Return the modification times and sizes of the watched files."""
+        key: List[Optional[List[float]]] = []
+        for filename in self.files:
+            try:
+                stat = os.stat(filename)
+                key.append([stat.st_mtime, stat.st_size])
+            except FileNotFoundError:
+                key.append(None)
+        return key
+
+    def load(self) -> Optional[Dict]:
+        """Return the cached entry if it is still valid, otherwise None. The
+           entry's scheduled_after and scheduled_before are datetimes."""
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if (
+            entry.get("version") != self.version
+            or entry.get("date") != date.today().isoformat()
+            or entry.get("key") != self.get_key()
+        ):
+            return None
+
+        entry["scheduled_after"] = datetime.fromisoformat(entry["scheduled_after"])
+        entry["scheduled_before"] = datetime.fromisoformat(entry["scheduled_before"])
+        return entry
+
+    def save(
+        self,
+        key: List,
+        scheduled_after: datetime,
+        scheduled_before: datetime,
+        tasks: Iterable[Dict],
+    ):
+        """Write a new entry. The key should be taken before the tasks were
+           exported, so changes made during the export invalidate the entry."""
+        entry = {
+            "version": self.version,
+            "date": date.today().isoformat(),
+            "key": key,
+            "scheduled_after": scheduled_after.isoformat(),
+            "scheduled_before": scheduled_before.isoformat(),
+            "tasks": list(tasks),
+        }
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file, separators=(",", ":"))
+        os.replace(temp_path, self.path)
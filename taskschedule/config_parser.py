@@ -6,7 +6,12 @@ DEFAULTS: dict = {
         "underestimated_glyph": "◆",
         "progress_pending_glyph": "▰",
         "progress_done_glyph": "▰",
-    }
+    },
+    "schedule": {"conflict_glyph": "!", "projected_glyph": "◌"},
+    "planner": {
+        "working_hours": "09:00-17:00",
+        "working_days": ["mon", "tue", "wed", "thu", "fri"],
+    },
 }
 
 
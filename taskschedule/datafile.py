@@ -0,0 +1,218 @@
+"""This module provides a native reader for taskwarrior's 2.x data files
+   (pending.data and completed.data), which is used to retrieve tasks without
+   running `task export`."""
+
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+DATE_FORMAT = "%Y%m%dT%H%M%SZ"
+
+DATE_ATTRIBUTES = (
+    "entry",
+    "modified",
+    "start",
+    "end",
+    "due",
+    "scheduled",
+    "until",
+    "wait",
+)
+LIST_ATTRIBUTES = ("tags", "depends")
+
+# Only these statuses are given an ID by taskwarrior
+ID_STATUSES = ("pending", "waiting", "recurring")
+
+# UDAs used by taskschedule; other UDAs are passed through as strings
+DEFAULT_UDA_TYPES: Dict[str, str] = {
+    "estimate": "duration",
+    "tb_estimate": "numeric",
+    "tb_real": "numeric",
+}
+
+ATTRIBUTE_REGEX = re.compile(r'([^\s:"]+):"((?:\\.|[^"\\])*)"')
+
+
+class DataFileParseError(Exception):
+    """Raised when a line in a taskwarrior data file cannot be parsed."""
+
+    # pylint: disable=unnecessary-pass
+    pass
+
+
+def decode_value(value: str) -> str:
+    """Decode an attribute value as written by taskwarrior's FF4 format."""
+    try:
+        decoded = json.loads(f'"{value}"', strict=False)
+    except ValueError:
+        decoded = value
+
+    return (
+        decoded.replace("&open;", "[").replace("&close;", "]").replace("&dquot;", '"')
+    )
+
+
+def parse_line(line: str) -> Dict[str, str]:
+    """Parse a single FF4 line into a dict of raw attribute values.
+    >>> parse_line('[description:"Buy cat food" status:"pending"]')
+    {'description': 'Buy cat food', 'status': 'pending'}
+    """
+    line = line.strip()
+    if not line.startswith("[") or not line.endswith("]"):
+        raise DataFileParseError(f"Invalid line in data file: {line}")
+
+    return {
+        key: decode_value(value) for key, value in ATTRIBUTE_REGEX.findall(line[1:-1])
+    }
+
+
+def format_timestamp(epoch: str) -> str:
+    """Convert an epoch timestamp to taskwarrior's export date format."""
+    return datetime.fromtimestamp(int(epoch), timezone.utc).strftime(DATE_FORMAT)
+
+
+def format_duration(seconds: int) -> str:
+    """Convert a number of seconds to an ISO-8601 duration."""
+    days, remainder = divmod(seconds, 86400)
+    hours, remainder = divmod(remainder, 3600)
+    minutes, seconds = divmod(remainder, 60)
+
+    duration = "P"
+    if days:
+        duration += f"{days}D"
+    if hours or minutes or seconds or not days:
+        duration += "T"
+        if hours:
+            duration += f"{hours}H"
+        if minutes:
+            duration += f"{minutes}M"
+        if seconds or not (hours or minutes):
+            duration += f"{seconds}S"
+
+    return duration
+
+
+def to_export_data(
+    attributes: Dict[str, str], task_id: int, uda_types: Dict[str, str]
+) -> Dict:
+    """Convert raw FF4 attributes to the data `task export` would return."""
+    data: Dict = {"id": task_id}
+    annotations = []
+
+    for key, value in attributes.items():
+        if key in DATE_ATTRIBUTES or uda_types.get(key) == "date":
+            data[key] = format_timestamp(value)
+        elif key in LIST_ATTRIBUTES:
+            data[key] = value.split(",") if value else []
+        elif key.startswith("annotation_"):
+            entry = key[len("annotation_") :]
+            annotations.append((int(entry), value))
+        elif uda_types.get(key) == "numeric":
+            data[key] = float(value) if "." in value else int(value)
+        elif uda_types.get(key) == "duration" and value.isdigit():
+            data[key] = format_duration(int(value))
+        else:
+            data[key] = value
+
+    if annotations:
+        data["annotations"] = [
+            {"entry": format_timestamp(str(entry)), "description": description}
+            for entry, description in sorted(annotations)
+        ]
+
+    return data
+
+
+class RangeFilter:
+    """Evaluates the filter Main passes to taskwarrior (`status.not:` and
+       `scheduled.after:`/`scheduled.before:`, or `status:recurring` if
+       `include_templates` is True) on raw task attributes."""
+
+    def __init__(
+        self,
+        scheduled_after: datetime,
+        scheduled_before: datetime,
+        excluded_statuses: Sequence[str] = ("deleted",),
+        include_templates: bool = False,
+    ):
+        self.after_ts = scheduled_after.timestamp()
+        self.before_ts = scheduled_before.timestamp()
+        self.excluded_statuses = tuple(excluded_statuses)
+        self.include_templates = include_templates
+
+    def matches(self, attributes: Dict[str, str]) -> bool:
+        """Return True if the task should be included in the schedule."""
+        if attributes.get("status") in self.excluded_statuses:
+            return False
+
+        if self.include_templates and attributes.get("status") == "recurring":
+            return True
+
+        scheduled = attributes.get("scheduled")
+        if not scheduled:
+            return False
+
+        return self.after_ts < int(scheduled) < self.before_ts
+
+
+class UnscheduledFilter:
+    """Evaluates the filter of the tasks which can be planned (`status:pending
+       scheduled.none: estimate.any:`) on raw task attributes."""
+
+    # The same filter for `task export`
+    filter_params = ("status:pending", "scheduled.none:", "estimate.any:")
+
+    def matches(self, attributes: Dict[str, str]) -> bool:
+        return (
+            attributes.get("status") == "pending"
+            and not attributes.get("scheduled")
+            and bool(attributes.get("estimate"))
+        )
+
+
+TaskFilter = Union[RangeFilter, UnscheduledFilter]
+
+
+class DataFileReader:
+    """Reads tasks directly from a taskwarrior data location."""
+
+    filenames = ("pending.data", "completed.data")
+
+    def __init__(self, data_location: str, uda_types: Optional[Dict[str, str]] = None):
+        self.data_location = os.path.expanduser(data_location)
+        self.uda_types = uda_types or DEFAULT_UDA_TYPES
+
+    def iter_data(self, range_filter: Optional[TaskFilter] = None) -> Iterator[Dict]:
+        """Yield the export data of every task matching the given filter, in
+           the same order as `task export`."""
+        next_id = 1
+        for filename in self.filenames:
+            path = os.path.join(self.data_location, filename)
+            try:
+                file = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                continue
+
+            with file:
+                for line in file:
+                    if not line.strip():
+                        continue
+
+                    attributes = parse_line(line)
+
+                    task_id = 0
+                    if filename == "pending.data":
+                        if attributes.get("status") in ID_STATUSES:
+                            task_id = next_id
+                            next_id += 1
+
+                    if range_filter and not range_filter.matches(attributes):
+                        continue
+
+                    yield to_export_data(attributes, task_id, self.uda_types)
+
+    def read(self, range_filter: Optional[TaskFilter] = None) -> List[Dict]:
+        """Return the export data of every task matching the given filter."""
+        return list(self.iter_data(range_filter))
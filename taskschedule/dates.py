@@ -0,0 +1,117 @@
+"""This module evaluates common taskwarrior date expressions, like
+   `today-1s`, `tomorrow+3days` or `2019-12-08`, without running `task`.
+
+   Results are local, timezone-aware datetimes, like the ones returned by
+   tasklib. Expressions which are not supported here evaluate to None."""
+
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from functools import partial
+from typing import Callable, Dict, Optional
+
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+
+# Duration units and their length in seconds. Months and years are not
+# supported, since their length depends on the date.
+UNITS: Dict[str, int] = {}
+for names, seconds in (
+    (("s", "sec", "secs", "second", "seconds"), 1),
+    (("min", "mins", "minute", "minutes"), 60),
+    (("h", "hr", "hrs", "hour", "hours"), 3600),
+    (("d", "day", "days"), 86400),
+    (("w", "wk", "wks", "week", "weeks"), 604800),
+):
+    for name in names:
+        UNITS[name] = seconds
+
+EXPRESSION_REGEX = re.compile(
+    r"^(?P<base>[a-z]+"
+    r"|\d{4}-\d{2}-\d{2}(?:t\d{2}:\d{2}(?::\d{2})?)?"
+    r"|\d{8}t\d{6}z)"
+    r"(?P<offsets>(?:[+-]\d*[a-z]+)*)$"
+)
+OFFSET_REGEX = re.compile(r"([+-])(\d*)([a-z]+)")
+
+
+def local_midnight(day: date) -> datetime:
+    """Return the start of the given day in the local timezone."""
+    return datetime.combine(day, time.min).astimezone()
+
+
+def next_weekday(now: datetime, weekday: int) -> datetime:
+    """Return the start of the first given weekday after today."""
+    days = (weekday - now.weekday() - 1) % 7 + 1
+    return local_midnight(now.date() + timedelta(days=days))
+
+
+SYNONYMS: Dict[str, Callable[[datetime], datetime]] = {
+    "now": lambda now: now,
+    "today": lambda now: local_midnight(now.date()),
+    "sod": lambda now: local_midnight(now.date()),
+    "eod": lambda now: local_midnight(now.date() + timedelta(days=1)),
+    "yesterday": lambda now: local_midnight(now.date() - timedelta(days=1)),
+    "tomorrow": lambda now: local_midnight(now.date() + timedelta(days=1)),
+}
+for index, name in enumerate(WEEKDAYS):
+    SYNONYMS[name] = partial(next_weekday, weekday=index)
+    SYNONYMS[name[:3]] = SYNONYMS[name]
+
+
+def parse_base(base: str, now: datetime) -> Optional[datetime]:
+    """Evaluate a synonym or an ISO-8601 date."""
+    if base in SYNONYMS:
+        return SYNONYMS[base](now)
+
+    if base.endswith("z"):
+        value = datetime.strptime(base, "%Y%m%dt%H%M%Sz")
+        return value.replace(tzinfo=timezone.utc).astimezone()
+
+    if base[0].isdigit():
+        return datetime.fromisoformat(base.replace("t", "T")).astimezone()
+
+    return None
+
+
+def evaluate_date(
+    expression: str, now: Optional[datetime] = None
+) -> Optional[datetime]:
+    """Evaluate a date expression: a synonym or an ISO-8601 date, followed
+       by any number of durations to add or subtract. Return None if the
+       expression is not supported.
+    >>> evaluate_date("today-1s")
+    datetime.datetime(2019, 12, 7, 23, 59, 59, tzinfo=...)
+    """
+    match = EXPRESSION_REGEX.match(expression.strip().lower())
+    if match is None:
+        return None
+
+    if now is None:
+        now = datetime.now().astimezone()
+
+    try:
+        value = parse_base(match.group("base"), now)
+    except ValueError:
+        return None
+    if value is None:
+        return None
+
+    # Like taskwarrior, durations are added to the timestamp, so adding a
+    # day across a DST change shifts the local time
+    seconds = 0
+    for sign, amount, unit in OFFSET_REGEX.findall(match.group("offsets")):
+        if unit not in UNITS:
+            return None
+        offset = int(amount or 1) * UNITS[unit]
+        seconds += offset if sign == "+" else -offset
+
+    if seconds:
+        value = datetime.fromtimestamp(value.timestamp() + seconds).astimezone()
+    return value
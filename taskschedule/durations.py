@@ -0,0 +1,22 @@
+"""This module provides a memoized parser for the ISO-8601 durations of task
+   estimates. Schedules hold few distinct estimates, like PT30M or PT1H,
+   so most tasks share a parsed duration."""
+
+from datetime import timedelta
+from functools import lru_cache
+from typing import Union
+
+from isodate import Duration, parse_duration
+
+# Number of distinct estimates kept
+CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_estimate_duration(estimate: str) -> Union[timedelta, Duration]:
+    """Return the parsed duration of an estimate. Durations are immutable,
+       so the cached objects can be shared between tasks.
+    >>> parse_estimate_duration("PT1H30M")
+    datetime.timedelta(seconds=5400)
+    """
+    return parse_duration(estimate)
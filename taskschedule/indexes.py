@@ -0,0 +1,149 @@
+"""This module provides the TaskIndex class, which indexes the tasks of a
+   snapshot by project, tag and status, so the schedule can be narrowed to a
+   project or tag in memory instead of exporting the tasks again."""
+
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+if TYPE_CHECKING:
+    from taskschedule.task_record import TaskRecord
+
+# Criteria of a ViewFilter which can be cycled through
+CRITERIA = ("project", "tag", "status")
+
+
+def iter_project_ancestors(project: str) -> Iterator[str]:
+    """Yield a project and the projects it is a subproject of.
+    >>> list(iter_project_ancestors("work.client"))
+    ['work', 'work.client']
+    """
+    parts = project.split(".")
+    for length in range(1, len(parts) + 1):
+        yield ".".join(parts[:length])
+
+
+def cycle(values: Sequence[str], current: Optional[str]) -> Optional[str]:
+    """Return the value after current, the first value if current is None,
+       or None after the last value.
+    >>> cycle(["a", "b"], "a")
+    'b'
+    """
+    if current is None or current not in values:
+        return values[0] if values else None
+
+    index = values.index(current) + 1
+    return values[index] if index < len(values) else None
+
+
+class ViewFilter:
+    """Narrows the shown tasks to a project and its subprojects, to the tasks
+       with all of the given tags, and to a status. Criteria which are not
+       given match every task."""
+
+    __slots__ = ("project", "tags", "status")
+
+    def __init__(
+        self,
+        project: Optional[str] = None,
+        tags: Iterable[str] = (),
+        status: Optional[str] = None,
+    ):
+        self.project = project
+        self.tags: FrozenSet[str] = frozenset(tags)
+        self.status = status
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ViewFilter):
+            return NotImplemented
+        return (self.project, self.tags, self.status) == (
+            other.project,
+            other.tags,
+            other.status,
+        )
+
+    def __repr__(self) -> str:
+        return f"ViewFilter({str(self)!r})"
+
+    def __str__(self) -> str:
+        """Return the filter in taskwarrior's syntax."""
+        parts = []
+        if self.project is not None:
+            parts.append(f"project:{self.project}")
+        parts.extend(f"+{tag}" for tag in sorted(self.tags))
+        if self.status is not None:
+            parts.append(f"status:{self.status}")
+        return " ".join(parts)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.project is None and not self.tags and self.status is None
+
+    def replace(self, criterion: str, value: Optional[str]) -> "ViewFilter":
+        """Return a copy of the filter with one of `CRITERIA` replaced. A tag
+           replaces all tags, and None removes the criterion."""
+        if criterion not in CRITERIA:
+            raise ValueError(f"invalid filter criterion: {criterion}")
+
+        project, tags, status = self.project, self.tags, self.status
+        if criterion == "project":
+            project = value
+        elif criterion == "tag":
+            tags = frozenset([value] if value is not None else [])
+        else:
+            status = value
+        return ViewFilter(project, tags, status)
+
+
+class TaskIndex:
+    """Inverted indexes of tasks by project, tag and status. Tasks are
+       indexed under their project and all of its parent projects, like
+       taskwarrior's `project:` filter matches subprojects."""
+
+    def __init__(self, tasks: Iterable["TaskRecord"]):
+        self.by_project: Dict[str, Set["TaskRecord"]] = {}
+        self.by_tag: Dict[str, Set["TaskRecord"]] = {}
+        self.by_status: Dict[str, Set["TaskRecord"]] = {}
+
+        for task in tasks:
+            if task.project:
+                for project in iter_project_ancestors(task.project):
+                    self.by_project.setdefault(project, set()).add(task)
+            for tag in task.tags:
+                self.by_tag.setdefault(tag, set()).add(task)
+            self.by_status.setdefault(task.status, set()).add(task)
+
+    def get_values(self, criterion: str) -> List[str]:
+        """Return the sorted projects, tags or statuses of the tasks."""
+        indexes = {
+            "project": self.by_project,
+            "tag": self.by_tag,
+            "status": self.by_status,
+        }
+        return sorted(indexes[criterion])
+
+    def select(self, view_filter: ViewFilter) -> Optional[FrozenSet["TaskRecord"]]:
+        """Return the tasks matching the filter, or None if the filter is
+           empty and every task matches."""
+        if view_filter.is_empty:
+            return None
+
+        matches: List[Set["TaskRecord"]] = []
+        if view_filter.project is not None:
+            matches.append(self.by_project.get(view_filter.project, set()))
+        for tag in view_filter.tags:
+            matches.append(self.by_tag.get(tag, set()))
+        if view_filter.status is not None:
+            matches.append(self.by_status.get(view_filter.status, set()))
+
+        # Intersecting from the smallest set keeps the intermediate sets small
+        matches.sort(key=len)
+        return frozenset(matches[0].intersection(*matches[1:]))
@@ -0,0 +1,123 @@
+"""This module provides the IntervalIndex class, which answers overlap
+   queries on the scheduled time ranges of tasks, and the StartIndex class,
+   which finds tasks by their scheduled start."""
+
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from typing import Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    """An interval tree over half-open intervals [start, end), each holding
+       an item.
+
+       The tree is implicit: the intervals are sorted by start, the middle
+       interval of every index range is the root of the subtree of that
+       range, and `max_ends` holds the latest end within each subtree. A
+       query skips every subtree which ends before the queried range, or
+       starts after it, so it takes O(log n + k) for k results."""
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, T]]):
+        ordered = sorted(intervals, key=lambda interval: interval[:2])
+        self.starts: List[float] = [interval[0] for interval in ordered]
+        self.ends: List[float] = [interval[1] for interval in ordered]
+        self.items: List[T] = [interval[2] for interval in ordered]
+
+        self.max_ends: List[float] = list(self.ends)
+        self.build(0, len(ordered))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def build(self, low: int, high: int) -> float:
+        """Compute the max ends of the subtree of the range [low, high)."""
+        if low >= high:
+            return -math.inf
+
+        middle = (low + high) // 2
+        max_end = max(
+            self.ends[middle], self.build(low, middle), self.build(middle + 1, high)
+        )
+        self.max_ends[middle] = max_end
+        return max_end
+
+    def search(
+        self, low: int, high: int, start: float, end: float, closed: bool, found: List
+    ):
+        """Add the items of the subtree of [low, high) overlapping the range
+           to found, in order of start. If closed is True, intervals starting
+           at the end of the range also overlap."""
+        if low >= high:
+            return
+
+        middle = (low + high) // 2
+        if self.max_ends[middle] <= start:
+            return
+
+        self.search(low, middle, start, end, closed, found)
+
+        middle_start = self.starts[middle]
+        if middle_start < end or (closed and middle_start == end):
+            if self.ends[middle] > start:
+                found.append(self.items[middle])
+            self.search(middle + 1, high, start, end, closed, found)
+
+    def overlapping(self, start: float, end: float) -> List[T]:
+        """Return the items whose intervals overlap [start, end)."""
+        found: List[T] = []
+        self.search(0, len(self.items), start, end, False, found)
+        return found
+
+    def at(self, moment: float) -> List[T]:
+        """Return the items whose intervals contain the given moment."""
+        found: List[T] = []
+        self.search(0, len(self.items), moment, moment, True, found)
+        return found
+
+    def overlapping_pairs(self) -> List[Tuple[T, T]]:
+        """Return all pairs of overlapping items, by sweeping over the
+           intervals in order of start."""
+        pairs: List[Tuple[T, T]] = []
+        active: List[Tuple[float, int]] = []
+
+        for index, start in enumerate(self.starts):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+
+            for _, other in sorted(active, key=lambda entry: entry[1]):
+                pairs.append((self.items[other], self.items[index]))
+
+            heapq.heappush(active, (self.ends[index], index))
+
+        return pairs
+
+
+class StartIndex(Generic[T]):
+    """Items sorted by their start, searched with bisect, so finding the
+       next, previous or current item takes O(log n)."""
+
+    def __init__(self, items: Iterable[Tuple[float, T]]):
+        ordered = sorted(items, key=lambda item: item[0])
+        self.starts: List[float] = [item[0] for item in ordered]
+        self.items: List[T] = [item[1] for item in ordered]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def next_after(self, moment: float) -> Optional[T]:
+        """Return the first item starting after the given moment."""
+        index = bisect_right(self.starts, moment)
+        return self.items[index] if index < len(self.items) else None
+
+    def previous_before(self, moment: float) -> Optional[T]:
+        """Return the last item starting before the given moment."""
+        index = bisect_left(self.starts, moment)
+        return self.items[index - 1] if index > 0 else None
+
+    def last_started(self, moment: float) -> Optional[T]:
+        """Return the last item starting at or before the given moment."""
+        index = bisect_right(self.starts, moment)
+        return self.items[index - 1] if index > 0 else None
@@ -0,0 +1,110 @@
+"""This module provides the columns of the schedule table and the
+   ColumnLayout class, which computes their widths and offsets. A layout is
+   computed once per snapshot of the tasks and screen width, so rendering a
+   row does not scan the tasks again."""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Supported widths of the time slots, in minutes
+SLOT_WIDTHS = (15, 30, 60)
+
+
+class Column:
+    """A column of the schedule table. The width includes a trailing space
+       and is either fixed, or fits the longest value of the column's key.
+       Fitted widths are at least `min_width`, and at most `max_fraction` of
+       the screen width."""
+
+    def __init__(
+        self,
+        name: str,
+        header: str,
+        key: Optional[str] = None,
+        width: Optional[int] = None,
+        min_width: int = 0,
+        max_fraction: Optional[float] = None,
+    ):
+        if width is None and key is None:
+            raise ValueError(f"column {name} needs either a width or a key")
+
+        self.name = name
+        self.header = header
+        self.key = key
+        self.width = width
+        self.min_width = min_width
+        self.max_fraction = max_fraction
+
+    def __repr__(self) -> str:
+        return f"Column({self.name!r})"
+
+    def get_width(
+        self, max_length: Callable[[str], int], max_x: Optional[int] = None
+    ) -> int:
+        """Return the width of the column on a screen max_x wide, or
+           without a limit if max_x is None."""
+        if self.width is not None:
+            return self.width
+
+        # Columns without a width have a key, see __init__
+        assert self.key is not None
+        width = max(max_length(self.key) + 1, self.min_width)
+        if max_x is not None and self.max_fraction is not None:
+            width = min(width, max(round(max_x * self.max_fraction), 1))
+        return width
+
+    def format(self, task) -> str:
+        """Return the text of the column for a task."""
+        value = task[self.key] if self.key is not None else None
+        return "" if value is None else str(value)
+
+
+# The columns of the schedule table, after the time slot and glyph columns.
+# The last column takes the rest of the screen.
+DEFAULT_COLUMNS: Tuple[Column, ...] = (
+    Column("id", "ID", key="id"),
+    Column("time", "Time", width=12),
+    Column("timeboxes", "Timeboxes", width=10),
+    Column("project", "Project", key="project", min_width=8, max_fraction=1 / 8),
+    Column("description", "Description", key="description"),
+)
+
+
+class ColumnLayout:
+    """The offsets and widths of the visible columns of the schedule table.
+       Offsets are keyed by column name, including the leading `slot` and
+       `glyph` columns."""
+
+    def __init__(
+        self,
+        columns: Sequence[Column],
+        max_length: Callable[[str], int],
+        slot_label_width: int,
+        max_x: Optional[int] = None,
+        hidden: Iterable[str] = (),
+    ):
+        hidden = set(hidden)
+        self.columns = tuple(column for column in columns if column.name not in hidden)
+        self.max_x = max_x
+
+        self.offsets: Dict[str, int] = {"slot": 0, "glyph": slot_label_width + 1}
+        self.widths: Dict[str, int] = {"slot": slot_label_width + 1, "glyph": 2}
+
+        offset = slot_label_width + 3
+        for column in self.columns:
+            width = column.get_width(max_length, max_x)
+            self.offsets[column.name] = offset
+            self.widths[column.name] = width
+            offset += width
+
+    def get_offsets(self) -> List[int]:
+        """Return the offsets of the time slot column and of the visible
+           columns, in order."""
+        return [0] + [self.offsets[column.name] for column in self.columns]
+
+    def get_cell_width(self, name: str) -> int:
+        """Return the room for text in a column. The last column takes the
+           rest of the screen width, if there is one."""
+        if self.columns and self.columns[-1].name == name and self.max_x is not None:
+            return max(self.max_x - self.offsets[name], 0)
+
+        return self.widths[name] - 1
@@ -3,23 +3,29 @@ import argparse
 import os
 import sys
 import time
-from curses import KEY_RESIZE
-from curses import error as curses_error
-from curses import napms
 from datetime import datetime
-
-from tasklib import TaskWarrior
-
-from taskschedule.notifier import Notifier, SoundDoesNotExistError
-from taskschedule.schedule import (
-    Schedule,
-    TaskDirDoesNotExistError,
-    TaskrcDoesNotExistError,
-    UDADoesNotExistError,
-)
-from taskschedule.screen import Screen
-from taskschedule.taskwarrior import PatchedTaskWarrior
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from taskschedule.cache import SnapshotCache
+from taskschedule.config_parser import ConfigParser
+from taskschedule.datafile import RangeFilter, UnscheduledFilter
+from taskschedule.indexes import ViewFilter
+from taskschedule.layout import SLOT_WIDTHS
+from taskschedule.snapshot import RefreshCycle
+from taskschedule.sources import Backend, MergedBackend, unique_source_names
+from taskschedule.taskrc import Taskrc, load_taskrc
 from taskschedule.utils import calculate_datetime
+from taskschedule.watcher import create_watcher
+
+# The modules which depend on tasklib and isodate are imported once the
+# arguments have been parsed, since importing those is slow
+if TYPE_CHECKING:
+    from taskschedule.async_backend import AsyncExporter
+    from taskschedule.planner import Planner
+    from taskschedule.task_record import TaskRecord
+
+# Keys which narrow the shown tasks to the next project, tag or status
+FILTER_KEYS: Dict[int, str] = {112: "project", 116: "tag", 115: "status"}  # p t s
 
 
 class Main:
@@ -27,56 +33,143 @@ class Main:
         self.home_dir = os.path.expanduser("~")
 
         self.parse_args(argv)
+
+        from taskschedule.schedule import Schedule
+        from taskschedule.taskwarrior import PatchedTaskWarrior
+
+        # Only cache ranges that do not depend on the current time of day
+        self.cache: Optional[SnapshotCache] = None
+        if self.use_cache and "now" not in self.after + self.before:
+            self.cache = SnapshotCache(
+                f"{self.home_dir}/.taskschedule/cache",
+                self.data_locations,
+                self.taskrc_locations,
+                {
+                    "from": self.after,
+                    "to": self.before,
+                    "completed": self.show_completed,
+                    "projections": self.show_projections,
+                },
+            )
+
+        cached = self.cache.load() if self.cache else None
+        if cached:
+            self.scheduled_after: datetime = cached["scheduled_after"]
+            self.scheduled_before: datetime = cached["scheduled_before"]
+        else:
+            self.scheduled_after = calculate_datetime(self.after)
+            self.scheduled_before = calculate_datetime(self.before)
+
         self.check_files()
 
         task_command_args = ["task", "status.not:deleted"]
 
-        task_command_args.append(f"scheduled.after:{self.scheduled_after}")
-        task_command_args.append(f"scheduled.before:{self.scheduled_before}")
-
+        range_args = [
+            f"scheduled.after:{self.scheduled_after}",
+            f"scheduled.before:{self.scheduled_before}",
+        ]
+        if self.show_projections:
+            # Also export the templates of recurring tasks, whose instances
+            # are projected into the range
+            range_args = ["(", "("] + range_args + [")", "or", "status:recurring", ")"]
+        task_command_args.extend(range_args)
+
+        excluded_statuses = ["deleted"]
         if not self.show_completed:
-            task_command_args.append(f"status.not:{self.show_completed}")
+            task_command_args.append("status.not:completed")
+            excluded_statuses.append("completed")
+
+        self.backends: List[PatchedTaskWarrior] = []
+        for data_location, taskrc_location, taskrc in zip(
+            self.data_locations, self.taskrc_locations, self.taskrcs
+        ):
+            backend = PatchedTaskWarrior(
+                data_location=data_location,
+                create=False,
+                taskrc_location=taskrc_location,
+                task_command=" ".join(task_command_args),
+                native=self.native,
+                taskrc=taskrc,
+                recurrence_interval=self.recurrence_interval,
+                range_filter=RangeFilter(
+                    self.scheduled_after,
+                    self.scheduled_before,
+                    excluded_statuses,
+                    include_templates=self.show_projections,
+                ),
+            )
+            self.backends.append(backend)
 
-        self.backend = PatchedTaskWarrior(
-            data_location=self.data_location,
-            create=False,
-            taskrc_location=self.taskrc_location,
-            task_command=" ".join(task_command_args),
-        )
+        # Tasks of multiple data locations are read concurrently and merged
+        self.backend: Backend = self.backends[0]
+        if len(self.backends) > 1:
+            names = unique_source_names(self.data_locations)
+            self.backend = MergedBackend(dict(zip(names, self.backends)))
 
         self.schedule = Schedule(
             self.backend,
             scheduled_after=self.scheduled_after,
             scheduled_before=self.scheduled_before,
+            slot_width=self.slot_width,
+            project_recurrences=self.show_projections,
+            view_filter=ViewFilter(
+                self.filter_project, self.filter_tags, self.filter_status
+            ),
         )
 
+        self.refresh_cycle = RefreshCycle(self.backend)
+
+        self.exporter: Optional["AsyncExporter"] = None
+        if self.use_async:
+            # Importing asyncio is slow, so only do it when it is used
+            from taskschedule import async_backend
+
+            self.exporter = async_backend.AsyncExporter(self.backend)
+
+        # Watch the data files before loading the cache, so changes made in
+        # the meantime are picked up
+        self.watchers = [
+            create_watcher(data_location) for data_location in self.data_locations
+        ]
+
+        # Whether the tasks have been read, from taskwarrior or the cache
+        self.loaded = False
+        if cached and self.cache and cached["key"] == self.cache.get_key():
+            self.schedule.apply(cached["tasks"])
+            self.loaded = True
+
     def check_files(self):
         """Check if the required files, directories and settings are present."""
-        # Create a temporary taskwarrior instance to read the config
-        taskwarrior = TaskWarrior(
-            data_location=self.data_location,
-            create=False,
-            taskrc_location=self.taskrc_location,
+        from taskschedule.notifier import SoundDoesNotExistError
+        from taskschedule.schedule import (
+            TaskDirDoesNotExistError,
+            TaskrcDoesNotExistError,
+            UDADoesNotExistError,
         )
 
-        # Disable _forcecolor because it breaks tw config output
-        taskwarrior.overrides.update({"_forcecolor": "off"})
-
-        # Check taskwarrior directory and taskrc
-        if os.path.isdir(self.data_location) is False:
-            raise TaskDirDoesNotExistError(".task directory not found")
-        if os.path.isfile(self.taskrc_location) is False:
-            raise TaskrcDoesNotExistError(".taskrc not found")
-
-        # Check if required UDAs exist
-        if taskwarrior.config.get("uda.estimate.type") is None:
-            raise UDADoesNotExistError(
-                ("uda.estimate.type does not exist " "in .taskrc")
-            )
-        if taskwarrior.config.get("uda.estimate.label") is None:
-            raise UDADoesNotExistError(
-                ("uda.estimate.label does not exist " "in .taskrc")
-            )
+        self.taskrcs: List[Taskrc] = []
+        for data_location, taskrc_location in zip(
+            self.data_locations, self.taskrc_locations
+        ):
+            # Check taskwarrior directory and taskrc
+            if os.path.isdir(data_location) is False:
+                raise TaskDirDoesNotExistError(".task directory not found")
+            if os.path.isfile(taskrc_location) is False:
+                raise TaskrcDoesNotExistError(".taskrc not found")
+
+            # Read the config, which is shared with the backend
+            taskrc = load_taskrc(taskrc_location, {"data.location": data_location})
+            self.taskrcs.append(taskrc)
+
+            # Check if required UDAs exist
+            if taskrc.get("uda.estimate.type") is None:
+                raise UDADoesNotExistError(
+                    ("uda.estimate.type does not exist " "in .taskrc")
+                )
+            if taskrc.get("uda.estimate.label") is None:
+                raise UDADoesNotExistError(
+                    ("uda.estimate.label does not exist " "in .taskrc")
+                )
 
         # Check sound file
         sound_file = self.home_dir + "/.taskschedule/hooks/drip.wav"
@@ -118,18 +211,20 @@ class Main:
         parser.add_argument(
             "-d",
             "--data-location",
-            help="""data location (e.g. ~/.task)""",
+            help="""data location (e.g. ~/.task), can be given multiple times
+            to merge the tasks of several databases""",
             type=str,
-            dest="data_location",
-            default=f"{self.home_dir}/.task",
+            action="append",
+            dest="data_locations",
         )
         parser.add_argument(
             "-t",
             "--taskrc-location",
-            help="""taskrc location (e.g. ~/.taskrc)""",
+            help="""taskrc location (e.g. ~/.taskrc), given once for all data
+            locations or once for each""",
             type=str,
-            dest="taskrc_location",
-            default=f"{self.home_dir}/.taskrc",
+            action="append",
+            dest="taskrc_locations",
         )
         parser.add_argument(
             "-a",
@@ -152,6 +247,29 @@ class Main:
             action="store_true",
             default=False,
         )
+        parser.add_argument(
+            "--filter-project",
+            help="""only show the tasks of a project and its subprojects;
+            press p to cycle through the projects""",
+            type=str,
+            metavar="PROJECT",
+        )
+        parser.add_argument(
+            "--filter-tag",
+            help="""only show the tasks with a tag, can be given several times;
+            press t to cycle through the tags""",
+            action="append",
+            default=[],
+            metavar="TAG",
+            dest="filter_tags",
+        )
+        parser.add_argument(
+            "--filter-status",
+            help="""only show the tasks with a status; press s to cycle through
+            the statuses and x to show all tasks again""",
+            type=str,
+            metavar="STATUS",
+        )
         parser.add_argument(
             "--no-notifications",
             help="disable notifications",
@@ -159,6 +277,85 @@ class Main:
             default=True,
             dest="notifications",
         )
+        parser.add_argument(
+            "--slot-width",
+            help="length of the time slots in minutes (default: 60)",
+            type=int,
+            choices=SLOT_WIDTHS,
+            default=60,
+            dest="slot_width",
+        )
+        parser.add_argument(
+            "--conflicts",
+            help="list the tasks which are scheduled at the same time and exit",
+            action="store_true",
+            default=False,
+            dest="conflicts",
+        )
+        parser.add_argument(
+            "--stats",
+            help="print the real and estimated timeboxes by day and project and exit",
+            action="store_true",
+            default=False,
+            dest="stats",
+        )
+        parser.add_argument(
+            "--plan",
+            help="""place pending tasks with an estimate but no scheduled time
+            into the free working hours until --to, print the plan and exit""",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--apply-plan",
+            help="like --plan, but also schedule the tasks as planned",
+            action="store_true",
+            default=False,
+            dest="apply_plan",
+        )
+        parser.add_argument(
+            "--working-hours",
+            help="working hours for --plan, e.g. 09:00-17:00",
+            type=str,
+            dest="working_hours",
+        )
+        parser.add_argument(
+            "--native",
+            help="read tasks directly from the data files instead of running "
+            "`task export`",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--recurrence-interval",
+            help="generate recurring tasks at most every n seconds (default: 300)",
+            type=int,
+            default=300,
+            dest="recurrence_interval",
+        )
+        parser.add_argument(
+            "--no-projections",
+            help="""only show the instances of recurring tasks which
+            taskwarrior has generated, instead of projecting them into the range""",
+            action="store_false",
+            default=True,
+            dest="projections",
+        )
+        parser.add_argument(
+            "--no-cache",
+            help="do not use the cached tasks of the previous run on startup",
+            action="store_false",
+            default=True,
+            dest="cache",
+        )
+        parser.add_argument(
+            "--async",
+            help="run taskwarrior in the background, so the interface does not "
+            "block while the tasks are exported",
+            action="store_true",
+            default=False,
+            dest="use_async",
+        )
         args = parser.parse_args(argv)
 
         if args.before and not args.after or not args.before and args.after:
@@ -167,27 +364,76 @@ class Main:
             )
             sys.exit(1)
 
-        self.data_location = args.data_location
-        self.taskrc_location = args.taskrc_location
+        self.data_locations: List[str] = args.data_locations or [
+            f"{self.home_dir}/.task"
+        ]
+        self.taskrc_locations: List[str] = args.taskrc_locations or [
+            f"{self.home_dir}/.taskrc"
+        ]
+        if len(self.taskrc_locations) == 1:
+            self.taskrc_locations *= len(self.data_locations)
+        elif len(self.taskrc_locations) != len(self.data_locations):
+            print(
+                "Error: --taskrc-location must be used once, or once for every "
+                "--data-location."
+            )
+            sys.exit(1)
 
-        # Parse schedule date range
-        self.scheduled_after: datetime = calculate_datetime(args.after)
-        self.scheduled_before: datetime = calculate_datetime(args.before)
+        # Schedule date range, parsed in __init__
+        self.after = args.after
+        self.before = args.before
 
         self.show_completed = args.completed
         self.hide_empty = not args.all
         self.hide_projects = args.project
+        self.filter_project = args.filter_project
+        self.filter_tags = args.filter_tags
+        self.filter_status = args.filter_status
         self.refresh_rate = args.refresh
         self.show_notifications = args.notifications
+        self.native = args.native
+        self.show_conflicts = args.conflicts
+        self.show_stats = args.stats
+        self.plan = args.plan or args.apply_plan
+        self.apply_plan = args.apply_plan
+        self.working_hours = args.working_hours
+        self.slot_width = args.slot_width
+        self.recurrence_interval = args.recurrence_interval
+        self.use_cache = args.cache
+        self.show_projections = args.projections
+        self.use_async = args.use_async
 
     def main(self):
         """Initialize the screen and notifier, and start the main loop of
            the interface."""
+        if self.show_conflicts:
+            self.print_conflicts()
+            return
+
+        if self.show_stats:
+            self.print_stats()
+            return
+
+        if self.plan:
+            self.print_plan()
+            return
+
+        # curses is only imported for the interface
+        from curses import error as curses_error
+
+        from taskschedule.notifier import Notifier, SoundDoesNotExistError
+        from taskschedule.schedule import (
+            TaskDirDoesNotExistError,
+            TaskrcDoesNotExistError,
+            UDADoesNotExistError,
+        )
+        from taskschedule.screen import Screen
 
+        self.notifier: Optional[Notifier] = None
         if self.show_notifications:
-            self.notifier = Notifier(self.backend)
-        else:
-            self.notifier = None
+            # Notifications are sent from the snapshot, which holds the tasks
+            # of all data locations; the first one is only queried as a fallback
+            self.notifier = Notifier(self.backends[0])
 
         self.screen = Screen(
             self.schedule,
@@ -195,6 +441,7 @@ class Main:
             scheduled_before=self.scheduled_before,
             hide_empty=self.hide_empty,
             hide_projects=self.hide_projects,
+            refresh_cycle=self.refresh_cycle,
         )
 
         try:
@@ -225,14 +472,154 @@ class Main:
             except curses_error as err:
                 print(err.with_traceback)
 
+    def print_conflicts(self):
+        """Print the pairs of tasks which are scheduled at the same time."""
+        conflicts = self.schedule.get_conflicts()
+        if not conflicts:
+            print("No conflicting tasks.")
+            return
+
+        for first, second in conflicts:
+            print(f"{self.format_task(first)}\n  overlaps {self.format_task(second)}")
+
+    def print_stats(self):
+        """Print the real and estimated timeboxes by day, by project and of
+           all scheduled tasks."""
+        timeboxes = self.schedule.get_timeboxes()
+        groups = (
+            ("Day", timeboxes.by_day, "unscheduled"),
+            ("Project", timeboxes.by_project, "no project"),
+        )
+        for title, totals_by_key, none_label in groups:
+            print(f"{title:<20} {'Real':>6} {'Est':>6}")
+            for key in sorted(totals_by_key, key=lambda key: (key is None, key)):
+                totals = totals_by_key[key]
+                label = none_label if key is None else key
+                print(f"{label:<20} {totals.real:>6} {totals.estimate:>6}")
+            print()
+
+        total = timeboxes.total
+        print(f"{'Total':<20} {total.real:>6} {total.estimate:>6}")
+
+    def create_planner(self) -> "Planner":
+        """Return a planner for the data locations. Its backends are not
+           limited to the range of the schedule."""
+        from taskschedule.planner import Planner, WorkingHours, parse_weekdays
+        from taskschedule.taskwarrior import PatchedTaskWarrior
+
+        config = ConfigParser().config()["planner"]
+        working_hours = WorkingHours.parse(
+            self.working_hours or config["working_hours"],
+            parse_weekdays(config["working_days"]),
+        )
+
+        backends = {}
+        names = unique_source_names(self.data_locations)
+        for name, data_location, taskrc_location, taskrc in zip(
+            names, self.data_locations, self.taskrc_locations, self.taskrcs
+        ):
+            backends[name] = PatchedTaskWarrior(
+                data_location=data_location,
+                create=False,
+                taskrc_location=taskrc_location,
+                native=self.native,
+                taskrc=taskrc,
+                recurrence_interval=self.recurrence_interval,
+                range_filter=UnscheduledFilter(),
+            )
+
+        return Planner(self.schedule, backends, working_hours)
+
+    def print_plan(self):
+        """Print where the unscheduled tasks would be placed, and schedule
+           them if --apply-plan is given."""
+        try:
+            planner = self.create_planner()
+        except ValueError as err:
+            print("Error: {}".format(err))
+            sys.exit(1)
+
+        placements, unplaced = planner.plan()
+        for placement in placements:
+            print(placement.format())
+        if unplaced:
+            print(f"{len(unplaced)} tasks do not fit into the free working hours.")
+
+        if not placements and not unplaced:
+            print("No tasks to plan.")
+        elif placements and self.apply_plan:
+            planner.apply(placements)
+            print(f"Scheduled {len(placements)} tasks.")
+
+    @staticmethod
+    def format_task(task: "TaskRecord") -> str:
+        start = task.scheduled_start_datetime
+        end = task.scheduled_end_datetime
+        source = f"[{task.source}] " if task.source is not None else ""
+        return (
+            f"{start:%Y-%m-%d %H:%M}-{end:%H:%M} "
+            f"{task.id or task.uuid[:8]} {source}{task.description}"
+        )
+
     def run(self):
         """The main loop of the interface."""
+        try:
+            self.run_loop()
+        finally:
+            for watcher in self.watchers:
+                watcher.close()
+            if self.exporter:
+                self.exporter.close()
+
+    def update(self, redraw: bool, cache_key: Optional[List]):
+        """Redraw the screen after the tasks have been read, and store the
+           tasks in the cache. Nothing is cached without a key, which was
+           taken before the export, or before the tasks have been read."""
+        if redraw:
+            self.screen.refresh_buffer()
+            self.screen.draw()
+
+        if self.cache and cache_key is not None and self.schedule.snapshot is not None:
+            self.cache.save(
+                cache_key,
+                self.scheduled_after,
+                self.scheduled_before,
+                self.schedule.snapshot.export_data(),
+            )
 
-        filename = f"{self.data_location}/pending.data"
-        cached_stamp = 0.0
+    def poll_watchers(self, refresh_due: bool) -> bool:
+        """Return True if the data files changed. Watchers with a file
+           descriptor cost a single read when nothing changed, so they are
+           polled on every iteration of the main loop and a change is
+           reloaded right away; the others are only polled once the refresh
+           is due."""
+        changes = [
+            watcher.poll()
+            for watcher in self.watchers
+            if refresh_due or watcher.fileno() is not None
+        ]
+        return any(changes)
+
+    def run_loop(self):
+        from curses import KEY_RESIZE, napms
+
+        export_key: Optional[List] = None
+
+        # Draw the tasks loaded from the cache right away
+        if self.schedule.snapshot is not None:
+            self.screen.refresh_buffer()
+            self.screen.draw()
 
         last_refresh_time = 0.0
         while True:
+            # Swap in the data of a finished background export
+            if self.exporter:
+                data = self.exporter.poll()
+                if data is not None:
+                    first = self.schedule.snapshot is None
+                    changed = self.schedule.apply(data)
+                    self.update(changed or first, export_key)
+
             key = self.screen.stdscr.getch()
             if key == 113:  # q
                 break
@@ -250,25 +637,70 @@ class Main:
                 max_y, max_x = self.screen.get_maxyx()
                 self.screen.scroll(-(max_y - 4))
                 last_refresh_time = time.time()
+            elif key in FILTER_KEYS:
+                self.schedule.cycle_view_filter(FILTER_KEYS[key])
+                self.screen.scroll_level = 0
+                self.screen.refresh_buffer()
+                self.screen.draw(force=True)
+                last_refresh_time = time.time()
+            elif key == 120:  # x
+                # Show all tasks again
+                if self.schedule.set_view_filter(ViewFilter()):
+                    self.screen.scroll_level = 0
+                    self.screen.refresh_buffer()
+                    self.screen.draw(force=True)
+                last_refresh_time = time.time()
             elif key == KEY_RESIZE:
                 last_refresh_time = time.time()
                 self.screen.refresh_buffer()
                 self.screen.draw()
-            elif time.time() > last_refresh_time + self.refresh_rate:
-                if self.notifier:
-                    self.notifier.send_notifications()
-
-                # Redraw if task data has changed
-                stamp = os.stat(filename).st_mtime
-                if stamp != cached_stamp:
-                    cached_stamp = stamp
-                    self.schedule.clear_cache()
-                    self.screen.refresh_buffer()
-                    self.screen.draw()
-
-                last_refresh_time = time.time()
+            elif self.screen.statuses.is_stale():
+                # Recolor the tasks when one of them starts, ends or becomes
+                # overdue
+                self.screen.refresh_buffer()
+                self.screen.draw()
+            else:
+                refresh_due = time.time() > last_refresh_time + self.refresh_rate
+                files_changed = self.poll_watchers(refresh_due)
+                if files_changed or refresh_due:
+                    with self.refresh_cycle:
+                        # Reload if task data has changed, or was never read
+                        first = not self.loaded
+                        if files_changed or first:
+                            self.loaded = True
+                            cache_key = self.cache.get_key() if self.cache else None
+                            if self.exporter:
+                                # Replaces an export of older data that is running
+                                self.exporter.request()
+                                export_key = cache_key
+                            else:
+                                changed = self.schedule.refresh()
+                                self.update(changed or first, cache_key)
+
+                        # Without a snapshot, the notifier would query taskwarrior
+                        if self.notifier and (
+                            not self.exporter or self.schedule.snapshot is not None
+                        ):
+                            self.notifier.send_notifications(self.schedule.snapshot)
+
+                    # Update the export counters in the footnote
+                    if self.schedule.snapshot is not None:
+                        self.screen.draw()
+                    last_refresh_time = time.time()
 
             napms(1)
 
             if self.refresh_rate < 0:
                 break
+
+
+def main(argv: List[str]):
+    """Run taskschedule with the given command line arguments."""
+    try:
+        Main(argv).main()
+    except KeyboardInterrupt:
+        print("Interrupted by user.")
+        try:
+            sys.exit(0)
+        except SystemExit:
+            os._exit(0)  # pylint: disable=protected-access
@@ -1,7 +1,11 @@
 import os
 import subprocess
+from datetime import datetime
+from typing import Optional, Union
 
 from taskschedule.scheduled_task import ScheduledTask
+from taskschedule.snapshot import TaskSnapshot
+from taskschedule.task_record import TaskRecord
 
 
 class SoundDoesNotExistError(Exception):
@@ -12,7 +16,7 @@ class Notifier:
     def __init__(self, backend):
         self.backend = backend
 
-    def notify(self, task: ScheduledTask):
+    def notify(self, task: Union[ScheduledTask, TaskRecord]):
         """Send a notification for the given task."""
 
         home = os.path.expanduser("~")
@@ -77,12 +81,27 @@ class Notifier:
                     f"The specified sound file does not exist: {sound_file}"
                 )
 
-    def send_notifications(self):
-        """Send notifications for scheduled tasks that should be started."""
+    def send_notifications(self, snapshot: Optional[TaskSnapshot] = None):
+        """Send notifications for scheduled tasks that should be started.
+           If the given snapshot covers today, it is queried instead of
+           exporting the tasks again."""
 
-        tasks = self.backend.tasks.filter(
-            "-ACTIVE -COMPLETED scheduled.before:now scheduled.after:today"
-        )
+        now = datetime.now().astimezone()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if snapshot is not None and snapshot.covers(today, now):
+            # Projected instances of recurring tasks do not exist in
+            # taskwarrior yet, so they can not be started from a notification
+            tasks = snapshot.filter(
+                lambda task: not task.active
+                and not task.completed
+                and not task.projected
+                and today < task["scheduled"] < now
+            )
+        else:
+            tasks = self.backend.tasks.filter(
+                "-ACTIVE -COMPLETED scheduled.before:now scheduled.after:today"
+            ).iterator()
 
         for task in tasks:
             if not task.notified:
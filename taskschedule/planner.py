@@ -0,0 +1,316 @@
+"""This module provides the Planner class, which places pending tasks that
+   have an estimate but no scheduled time into the free time of a schedule,
+   within working hours."""
+
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from taskschedule.datafile import DATE_FORMAT, UnscheduledFilter
+from taskschedule.schedule import Schedule
+from taskschedule.sources import tag_source
+from taskschedule.task_record import parse_estimate, to_datetime
+from taskschedule.taskwarrior import PatchedTaskWarrior
+
+# A time range as POSIX timestamps [start, end)
+Interval = Tuple[float, float]
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Ranks of taskwarrior's priorities; tasks without a priority come last
+PRIORITY_RANKS = {"H": 0, "M": 1, "L": 2}
+
+# Sorts after all dates in taskwarrior's export format, for tasks without a due
+# date
+NO_DUE = "~"
+
+# Fields of the export data which are not imported back into taskwarrior
+NOT_IMPORTED = ("id", "urgency", "source")
+
+
+def parse_weekdays(days: Iterable[str]) -> List[int]:
+    """Convert weekday abbreviations to weekday numbers.
+    >>> parse_weekdays(["mon", "fri"])
+    [0, 4]
+    """
+    numbers = []
+    for day in days:
+        try:
+            numbers.append(WEEKDAYS.index(day.strip().lower()[0:3]))
+        except ValueError:
+            raise ValueError(f"invalid weekday: {day}")
+    return numbers
+
+
+class WorkingHours:
+    """The time of day in which tasks can be planned, on the given weekdays
+       (0 is Monday), in the local timezone."""
+
+    def __init__(self, start: time, end: time, days: Iterable[int] = range(5)):
+        if end <= start:
+            raise ValueError("working hours must end after they start")
+
+        self.start = start
+        self.end = end
+        self.days = frozenset(days)
+
+    @classmethod
+    def parse(cls, hours: str, days: Iterable[int] = range(5)) -> "WorkingHours":
+        """Parse working hours given as HH:MM-HH:MM."""
+        try:
+            start, end = hours.split("-")
+            return cls(time.fromisoformat(start), time.fromisoformat(end), days)
+        except ValueError:
+            raise ValueError(f"invalid working hours, expected HH:MM-HH:MM: {hours}")
+
+    def windows(self, after: datetime, before: datetime) -> Iterator[Interval]:
+        """Yield the working hours between after and before, in order."""
+        after_ts, before_ts = after.timestamp(), before.timestamp()
+
+        day = after.astimezone().date()
+        end_day = before.astimezone().date()
+        while day <= end_day:
+            if day.weekday() in self.days:
+                start = datetime.combine(day, self.start).astimezone().timestamp()
+                end = datetime.combine(day, self.end).astimezone().timestamp()
+                start, end = max(start, after_ts), min(end, before_ts)
+                if start < end:
+                    yield start, end
+            day += timedelta(days=1)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping intervals into disjoint intervals sorted by start."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(
+    windows: Iterable[Interval], busy: Iterable[Interval]
+) -> List[Interval]:
+    """Return the parts of the windows, sorted by start, which are not
+       covered by any of the busy intervals."""
+    merged = merge_intervals(busy)
+    free: List[Interval] = []
+
+    index = 0
+    for window_start, window_end in windows:
+        while index < len(merged) and merged[index][1] <= window_start:
+            index += 1
+
+        cursor = window_start
+        other = index
+        while other < len(merged) and merged[other][0] < window_end:
+            if merged[other][0] > cursor:
+                free.append((cursor, merged[other][0]))
+            cursor = max(cursor, merged[other][1])
+            other += 1
+
+        if cursor < window_end:
+            free.append((cursor, window_end))
+
+    return free
+
+
+class GapTree:
+    """The free gaps of a schedule in a max segment tree over their
+       remaining lengths, so the earliest gap a task fits in is found in
+       O(log n). Taking time from a gap shortens it from its start."""
+
+    def __init__(self, gaps: Sequence[Interval]):
+        self.starts = [gap[0] for gap in gaps]
+        self.ends = [gap[1] for gap in gaps]
+
+        self.size = 1
+        while self.size < len(gaps):
+            self.size *= 2
+
+        self.tree = [0.0] * (2 * self.size)
+        for index, (start, end) in enumerate(gaps):
+            self.tree[self.size + index] = end - start
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def find(self, length: float) -> Optional[int]:
+        """Return the index of the earliest gap of at least the given length,
+           or None if no gap is long enough."""
+        if not self.starts or self.tree[1] < length:
+            return None
+
+        node = 1
+        while node < self.size:
+            node *= 2
+            if self.tree[node] < length:
+                node += 1
+        return node - self.size
+
+    def take(self, index: int, length: float) -> Interval:
+        """Take time of the given length from the start of a gap."""
+        start = self.starts[index]
+        self.starts[index] = start + length
+
+        node = self.size + index
+        self.tree[node] = self.ends[index] - self.starts[index]
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+        return start, start + length
+
+
+def priority_key(data: Dict) -> Tuple:
+    """Return the planning order of a task: by urgency, then priority, due
+       date and entry date."""
+    return (
+        -float(data.get("urgency") or 0),
+        PRIORITY_RANKS.get(data.get("priority") or "", len(PRIORITY_RANKS)),
+        data.get("due") or NO_DUE,
+        data.get("entry") or "",
+    )
+
+
+class Placement:
+    """A task placed at a time by the planner."""
+
+    __slots__ = ("data", "start_ts", "end_ts")
+
+    def __init__(self, data: Dict, start_ts: float, end_ts: float):
+        self.data = data
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+
+    def __repr__(self) -> str:
+        return f"Placement({self.data.get('uuid')!r}, {self.scheduled!r})"
+
+    @property
+    def source(self) -> Optional[str]:
+        return self.data.get("source")
+
+    @property
+    def scheduled(self) -> str:
+        """Return the start in taskwarrior's export format."""
+        start = datetime.fromtimestamp(self.start_ts, timezone.utc)
+        return start.strftime(DATE_FORMAT)
+
+    def to_export_data(self) -> Dict:
+        """Return the data of the task, scheduled at the placement, for
+           importing into taskwarrior."""
+        data = {
+            key: value for key, value in self.data.items() if key not in NOT_IMPORTED
+        }
+        data["scheduled"] = self.scheduled
+        return data
+
+    def format(self) -> str:
+        start, end = to_datetime(self.start_ts), to_datetime(self.end_ts)
+        source = f"[{self.source}] " if self.source is not None else ""
+        return (
+            f"{start:%Y-%m-%d %H:%M}-{end:%H:%M} "
+            f"{self.data.get('id') or self.data['uuid'][:8]} "
+            f"{source}{self.data.get('description', '')}"
+        )
+
+
+def place(
+    candidates: Iterable[Dict], free: Sequence[Interval], now: datetime
+) -> Tuple[List[Placement], List[Dict]]:
+    """Place the candidates in order of `priority_key`, each in the earliest
+       free gap it fits in. Return the placements, and the candidates which
+       did not fit anywhere or have no positive estimate."""
+    gaps = GapTree(free)
+    placements: List[Placement] = []
+    unplaced: List[Dict] = []
+
+    for data in sorted(candidates, key=priority_key):
+        seconds = parse_estimate(data.get("estimate"), now)
+        if seconds is None or seconds <= 0:
+            unplaced.append(data)
+            continue
+
+        index = gaps.find(seconds)
+        if index is None:
+            unplaced.append(data)
+            continue
+
+        start, end = gaps.take(index, seconds)
+        placements.append(Placement(data, start, end))
+
+    placements.sort(key=lambda placement: placement.start_ts)
+    return placements, unplaced
+
+
+class Planner:
+    """Plans the pending tasks of the backends which have an estimate but no
+       scheduled time into the free working hours of a schedule, from now
+       until the end of the schedule. The backends are keyed by source name,
+       and must not be limited to the schedule's range like the backend of
+       the schedule is."""
+
+    def __init__(
+        self,
+        schedule: Schedule,
+        backends: Mapping[str, PatchedTaskWarrior],
+        working_hours: WorkingHours,
+        now: Optional[datetime] = None,
+    ):
+        self.schedule = schedule
+        self.backends = dict(backends)
+        self.working_hours = working_hours
+        self.now = now or datetime.now().astimezone()
+
+    def get_candidates(self) -> List[Dict]:
+        """Return the export data of the tasks which can be planned: pending
+           tasks with an estimate and without a scheduled time. Tasks are
+           tagged with their source if there are several backends."""
+        unscheduled = UnscheduledFilter()
+        candidates: List[Dict] = []
+        for source, backend in self.backends.items():
+            if backend.native:
+                # The backend's range filter selects the candidates
+                export_data = backend.export_data()
+            else:
+                export_data = backend.export_data(UnscheduledFilter.filter_params)
+
+            # Backends which are not limited to the candidates, like a
+            # backend without a range filter, may export any task
+            export_data = [data for data in export_data if unscheduled.matches(data)]
+
+            if len(self.backends) > 1:
+                export_data = list(tag_source(source, export_data))
+            candidates.extend(export_data)
+        return candidates
+
+    def get_free_intervals(self) -> List[Interval]:
+        """Return the working hours which are not taken by the tasks of the
+           schedule, from now until the end of the schedule."""
+        after = max(self.schedule.scheduled_after, self.now)
+        windows = self.working_hours.windows(after, self.schedule.scheduled_before)
+
+        intervals = self.schedule.intervals
+        return subtract_intervals(windows, zip(intervals.starts, intervals.ends))
+
+    def plan(self) -> Tuple[List[Placement], List[Dict]]:
+        """Return the placements of the candidates, and the candidates which
+           did not fit anywhere."""
+        return place(self.get_candidates(), self.get_free_intervals(), self.now)
+
+    def apply(self, placements: Sequence[Placement]):
+        """Schedule the placed tasks, with one import for every backend."""
+        by_source: Dict[Optional[str], List[Dict]] = {}
+        for placement in placements:
+            by_source.setdefault(placement.source, []).append(
+                placement.to_export_data()
+            )
+
+        for source, export_data in by_source.items():
+            if source is None:
+                backend = next(iter(self.backends.values()))
+            else:
+                backend = self.backends[source]
+            backend.import_data(export_data)
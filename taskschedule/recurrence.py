@@ -0,0 +1,292 @@
+"""This module projects the instances of recurring tasks into the schedule's
+   range in memory, so recurring tasks show up before taskwarrior has
+   generated their instances."""
+
+import calendar
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from isodate import Duration, ISO8601Error, parse_duration
+
+from taskschedule.datafile import DATE_FORMAT
+from taskschedule.task_record import parse_timestamp
+
+# Named recurrence periods, as (months, days)
+NAMED_PERIODS: Dict[str, Tuple[int, int]] = {
+    "daily": (0, 1),
+    "day": (0, 1),
+    "weekly": (0, 7),
+    "week": (0, 7),
+    "sennight": (0, 7),
+    "biweekly": (0, 14),
+    "fortnight": (0, 14),
+    "monthly": (1, 0),
+    "month": (1, 0),
+    "bimonthly": (2, 0),
+    "quarterly": (3, 0),
+    "semiannual": (6, 0),
+    "annual": (12, 0),
+    "yearly": (12, 0),
+    "year": (12, 0),
+    "biannual": (24, 0),
+    "biyearly": (24, 0),
+}
+
+# Units of numeric recurrence periods like `2w`, as (months, seconds)
+PERIOD_UNITS: Dict[str, Tuple[int, int]] = {
+    "s": (0, 1),
+    "sec": (0, 1),
+    "secs": (0, 1),
+    "min": (0, 60),
+    "mins": (0, 60),
+    "h": (0, 3600),
+    "hr": (0, 3600),
+    "hrs": (0, 3600),
+    "d": (0, 86400),
+    "day": (0, 86400),
+    "days": (0, 86400),
+    "w": (0, 604800),
+    "wk": (0, 604800),
+    "wks": (0, 604800),
+    "week": (0, 604800),
+    "weeks": (0, 604800),
+    "mo": (1, 0),
+    "mos": (1, 0),
+    "month": (1, 0),
+    "months": (1, 0),
+    "q": (3, 0),
+    "qtr": (3, 0),
+    "qtrs": (3, 0),
+    "quarter": (3, 0),
+    "quarters": (3, 0),
+    "y": (12, 0),
+    "yr": (12, 0),
+    "yrs": (12, 0),
+    "year": (12, 0),
+    "years": (12, 0),
+}
+
+PERIOD_REGEX = re.compile(r"^(\d+)\s*([a-z]+)$")
+
+# Instances started before the estimated first instance in a range, since
+# months and weekdays are not all equally long
+SKIP_MARGIN = 5
+
+
+class RecurrenceError(Exception):
+    """Raised when the recurrence period of a task can not be parsed."""
+
+    # pylint: disable=unnecessary-pass
+    pass
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """Add months to a datetime, clamping the day to the end of the month."""
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+
+class Period:
+    """The period of a recurring task: a number of months and a duration,
+       or every weekday. Instances are computed in local time, so they keep
+       their time of day across daylight saving time changes."""
+
+    def __init__(
+        self, months: int = 0, delta: timedelta = timedelta(), weekdays: bool = False
+    ):
+        if not weekdays and months <= 0 and delta <= timedelta():
+            raise RecurrenceError("the recurrence period must be positive")
+
+        self.months = months
+        self.delta = delta
+        self.weekdays = weekdays
+
+    def __repr__(self) -> str:
+        if self.weekdays:
+            return "Period(weekdays=True)"
+        return f"Period(months={self.months}, delta={self.delta!r})"
+
+    @classmethod
+    def parse(cls, recur: str) -> "Period":
+        """Parse taskwarrior's recurrence periods: names like `weekly`,
+           numbers with a unit like `3d` and ISO-8601 durations like `P2W`.
+        >>> Period.parse("2wks")
+        Period(months=0, delta=datetime.timedelta(days=14))
+        """
+        recur = recur.strip().lower()
+        if recur == "weekdays":
+            return cls(weekdays=True)
+
+        if recur in NAMED_PERIODS:
+            months, days = NAMED_PERIODS[recur]
+            return cls(months, timedelta(days=days))
+
+        match = PERIOD_REGEX.match(recur)
+        if match and match.group(2) in PERIOD_UNITS:
+            months, seconds = PERIOD_UNITS[match.group(2)]
+            number = int(match.group(1))
+            return cls(months * number, timedelta(seconds=seconds * number))
+
+        try:
+            duration = parse_duration(recur.upper())
+        except (ISO8601Error, ValueError):
+            raise RecurrenceError(f"unsupported recurrence period: {recur}")
+
+        if isinstance(duration, Duration):
+            months = int(duration.years * 12 + duration.months)
+            return cls(months, duration.tdelta)
+        return cls(0, duration)
+
+    def approximate_seconds(self) -> float:
+        """Return the approximate length of the period in seconds, for
+           skipping ahead to the instances in a range."""
+        if self.weekdays:
+            return 7 / 5 * 86400
+        return self.months * 30.436875 * 86400 + self.delta.total_seconds()
+
+    def get_instance(self, first: datetime, index: int) -> datetime:
+        """Return the index-th instance of a recurrence starting at first,
+           a naive datetime in local time."""
+        if self.weekdays:
+            # Every 5 instances are one week later
+            weeks, remainder = divmod(index, 5)
+            moment = first + timedelta(weeks=weeks)
+            while remainder:
+                moment += timedelta(days=1)
+                if moment.weekday() < 5:
+                    remainder -= 1
+            return moment
+
+        moment = first + self.delta * index
+        if self.months:
+            moment = add_months(moment, self.months * index)
+        return moment
+
+
+def format_timestamp(timestamp: float) -> str:
+    """Convert a POSIX timestamp to taskwarrior's export format."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(DATE_FORMAT)
+
+
+class RecurrenceTemplate:
+    """A recurring task, whose instances are due every period from its due
+       date until its `until` date. Instances which taskwarrior already
+       generated are recorded in the template's mask, so they are not
+       projected. The scheduled time of an instance keeps the template's
+       offset between the scheduled and due dates."""
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.uuid: str = data["uuid"]
+        self.period = Period.parse(data["recur"])
+        self.due_ts = parse_timestamp(data.get("due"))
+        self.scheduled_ts = parse_timestamp(data.get("scheduled"))
+        self.until_ts = parse_timestamp(data.get("until"))
+        self.generated = len(data.get("mask") or "")
+
+    def iter_instances(
+        self, after_ts: float, before_ts: float
+    ) -> Iterator[Tuple[int, float, float]]:
+        """Yield the (index, due, scheduled) timestamps of the instances that
+           are not generated yet and are scheduled between after and
+           before, lazily and in order."""
+        if self.due_ts is None or self.scheduled_ts is None:
+            return
+
+        first = datetime.fromtimestamp(self.due_ts)
+        offset = self.scheduled_ts - self.due_ts
+
+        # Skip ahead to shortly before the range
+        skipped = int(
+            (after_ts - self.scheduled_ts) / self.period.approximate_seconds()
+        )
+        index = max(self.generated, skipped - SKIP_MARGIN)
+
+        while True:
+            due_ts = self.period.get_instance(first, index).timestamp()
+            scheduled_ts = due_ts + offset
+            if scheduled_ts >= before_ts:
+                return
+            if self.until_ts is not None and due_ts > self.until_ts:
+                return
+            if scheduled_ts > after_ts:
+                yield index, due_ts, scheduled_ts
+            index += 1
+
+    def project(self, index: int, due_ts: float, scheduled_ts: float) -> Dict:
+        """Return the export data of a projected instance."""
+        data = {
+            key: value
+            for key, value in self.data.items()
+            if key not in ("id", "mask", "urgency")
+        }
+        data.update(
+            {
+                "id": 0,
+                "uuid": f"{self.uuid}:{index}",
+                "status": "pending",
+                "parent": self.uuid,
+                "imask": index,
+                "due": format_timestamp(due_ts),
+                "scheduled": format_timestamp(scheduled_ts),
+                "projected": True,
+            }
+        )
+        return data
+
+
+class RecurrenceProjector:
+    """Projects the instances of recurring tasks into a range. The projected
+       instances of a template are cached until the template is modified, or
+       taskwarrior generates more of its instances."""
+
+    def __init__(self, scheduled_after: datetime, scheduled_before: datetime):
+        self.after_ts = scheduled_after.timestamp()
+        self.before_ts = scheduled_before.timestamp()
+
+        # Projected instances by template uuid, with the cache key
+        self.cache: Dict[str, Tuple[Tuple, List[Dict]]] = {}
+
+    @staticmethod
+    def get_key(data: Dict) -> Tuple:
+        return (data.get("modified"), data.get("mask"))
+
+    def project(self, data: Dict) -> List[Dict]:
+        """Return the projected instances of a recurring task. Tasks with an
+           unsupported recurrence period are not projected."""
+        key = self.get_key(data)
+        cached = self.cache.get(data["uuid"])
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        try:
+            template = RecurrenceTemplate(data)
+        except RecurrenceError:
+            instances: List[Dict] = []
+        else:
+            instances = [
+                template.project(*instance)
+                for instance in template.iter_instances(self.after_ts, self.before_ts)
+            ]
+
+        self.cache[data["uuid"]] = (key, instances)
+        return instances
+
+    def iter_projections(self, templates: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield the projected instances of the templates, and forget the
+           cached instances of templates which are gone."""
+        seen = set()
+        for data in templates:
+            seen.add(data["uuid"])
+            yield from self.project(data)
+
+        for uuid in set(self.cache) - seen:
+            del self.cache[uuid]
+
+
+def is_template(data: Dict) -> bool:
+    """Return True for the export data of a recurring task's template."""
+    return data.get("status") == "recurring" and bool(data.get("recur"))
@@ -0,0 +1,77 @@
+"""This module provides the TimeboxRollup class, which keeps the estimated
+   and real timebox totals of the scheduled tasks by day, by project and
+   overall. The totals are updated as tasks are added and removed, so
+   reading them does not scan the tasks."""
+
+from typing import Dict, Optional
+
+from taskschedule.task_record import TaskRecord
+
+
+class TimeboxTotals:
+    """The estimated and real timeboxes of a group of tasks."""
+
+    __slots__ = ("estimate", "real", "count")
+
+    def __init__(self):
+        self.estimate = 0
+        self.real = 0
+        self.count = 0
+
+    def __repr__(self) -> str:
+        return f"TimeboxTotals(real={self.real}, estimate={self.estimate})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TimeboxTotals):
+            return NotImplemented
+        return (self.estimate, self.real) == (other.estimate, other.real)
+
+    def add(self, task: TaskRecord, sign: int = 1):
+        self.estimate += sign * (task.tb_estimate or 0)
+        self.real += sign * (task.tb_real or 0)
+        self.count += sign
+
+
+class TimeboxRollup:
+    """Timebox totals by day, by project and overall. Tasks are grouped by
+       the ISO date of their scheduled start; unscheduled tasks and tasks
+       without a project are grouped under None."""
+
+    def __init__(self):
+        self.total = TimeboxTotals()
+        self.by_day: Dict[Optional[str], TimeboxTotals] = {}
+        self.by_project: Dict[Optional[str], TimeboxTotals] = {}
+
+    @staticmethod
+    def get_day(task: TaskRecord) -> Optional[str]:
+        start = task.scheduled_start_datetime
+        return start.date().isoformat() if start else None
+
+    def add(self, task: TaskRecord):
+        """Add the timeboxes of a task to the totals of its groups."""
+        self.update(task, 1)
+
+    def remove(self, task: TaskRecord):
+        """Subtract the timeboxes of a task from the totals of its groups."""
+        self.update(task, -1)
+
+    def update(self, task: TaskRecord, sign: int):
+        self.total.add(task, sign)
+        for groups, key in (
+            (self.by_day, self.get_day(task)),
+            (self.by_project, task.project),
+        ):
+            totals = groups.get(key)
+            if totals is None:
+                totals = groups[key] = TimeboxTotals()
+            totals.add(task, sign)
+            if not totals.count:
+                del groups[key]
+
+    def day(self, day: Optional[str]) -> TimeboxTotals:
+        """Return the totals of a day, given as an ISO date."""
+        return self.by_day.get(day) or TimeboxTotals()
+
+    def project(self, project: Optional[str]) -> TimeboxTotals:
+        """Return the totals of a project."""
+        return self.by_project.get(project) or TimeboxTotals()
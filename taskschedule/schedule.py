@@ -1,13 +1,35 @@
 """This module provides a Schedule class, which is used for retrieving
    scheduled tasks from taskwarrior and displaying them in a table."""
 
+import math
+import sys
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-
-from cached_property import cached_property
-
-from taskschedule.scheduled_task import ScheduledTask, ScheduledTaskQuerySet
-from taskschedule.taskwarrior import PatchedTaskWarrior
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+# A version check instead of catching the ImportError, which mypy
+# understands for either target version
+if sys.version_info >= (3, 8):
+    from functools import cached_property
+else:
+    from cached_property import cached_property
+
+from taskschedule.indexes import TaskIndex, ViewFilter, cycle
+from taskschedule.intervals import IntervalIndex, StartIndex
+from taskschedule.layout import DEFAULT_COLUMNS, SLOT_WIDTHS, Column, ColumnLayout
+from taskschedule.recurrence import RecurrenceProjector, is_template
+from taskschedule.rollups import TimeboxRollup, TimeboxTotals
+from taskschedule.snapshot import TaskSnapshot
+from taskschedule.sources import Backend, MergedBackend
+from taskschedule.task_record import TaskRecord
 
 
 class UDADoesNotExistError(Exception):
@@ -31,40 +53,82 @@ class TaskDirDoesNotExistError(Exception):
     pass
 
 
+def scheduled_key(task: TaskRecord) -> float:
+    """Sort tasks by their scheduled start, with unscheduled tasks last."""
+    return task.scheduled_ts if task.scheduled_ts is not None else math.inf
+
+
 class Schedule:
     """This class provides methods to format tasks and display them in
-       a schedule report."""
+       a schedule report. Tasks are grouped in time slots of `slot_width`
+       minutes, and shown in the given table columns.
+
+       If `project_recurrences` is True, the templates of recurring tasks
+       are not shown themselves; instead, their instances in the range which
+       taskwarrior has not generated yet are projected.
+
+       The shown tasks can be narrowed with a `ViewFilter`, which is applied
+       to indexes of the tasks instead of re-exporting them."""
 
     def __init__(
         self,
-        backend: PatchedTaskWarrior,
+        backend: Backend,
         scheduled_after: datetime,
         scheduled_before: datetime,
+        slot_width: int = 60,
+        table_columns: Sequence[Column] = DEFAULT_COLUMNS,
+        project_recurrences: bool = True,
+        view_filter: Optional[ViewFilter] = None,
     ):
+        if slot_width not in SLOT_WIDTHS:
+            raise ValueError(f"slot width must be one of {SLOT_WIDTHS} minutes")
+
         self.backend = backend
 
         self.scheduled_before = scheduled_before
         self.scheduled_after = scheduled_after
-
-        self.timeboxed_task: Optional[ScheduledTask] = None
+        self.slot_width = slot_width
+        self.table_columns = tuple(table_columns)
+        self.view_filter = view_filter or ViewFilter()
+
+        self.timeboxed_task: Optional[TaskRecord] = None
+
+        # Tasks by uuid, with the export data they were built from
+        self.tasks_by_uuid: Dict[str, TaskRecord] = {}
+        self.data_by_uuid: Dict[str, Dict] = {}
+        # Occupied time slots, by date and slot label
+        self.time_slots: Optional[Dict[str, Dict[str, List[TaskRecord]]]] = None
+        self.snapshot: Optional[TaskSnapshot] = None
+
+        # Timebox totals, kept up to date by `apply`
+        self.timeboxes = TimeboxRollup()
+
+        self.recurrences: Optional[RecurrenceProjector] = None
+        if project_recurrences:
+            self.recurrences = RecurrenceProjector(scheduled_after, scheduled_before)
+
+    def get_timeboxes(self) -> TimeboxRollup:
+        """Return the timebox totals of the tasks by day, by project and
+           overall, retrieving the tasks if needed."""
+        if "tasks" not in self.__dict__:
+            self.refresh()
+        return self.timeboxes
+
+    def get_timebox_totals(self, day: Optional[str] = None) -> TimeboxTotals:
+        """Return the timebox totals of a day given as an ISO date, or of
+           all tasks if no day is given."""
+        timeboxes = self.get_timeboxes()
+        return timeboxes.total if day is None else timeboxes.day(day)
 
     def get_timebox_estimate_count(self) -> int:
-        """"Return today's estimated timebox count."""
-        total = 0
-        for task in self.tasks:
-            if task["tb_estimate"]:
-                total += task["tb_estimate"]
-        return total
+        """"Return the estimated timebox count of all tasks."""
+        return self.get_timeboxes().total.estimate
 
     def get_timebox_real_count(self) -> int:
-        """"Return today's real timebox count."""
-        total = 0
-        for task in self.tasks:
-            if task["tb_real"]:
-                total += task["tb_real"]
-        return total
+        """"Return the real timebox count of all tasks."""
+        return self.get_timeboxes().total.real
 
-    def get_active_timeboxed_task(self) -> Optional[ScheduledTask]:
+    def get_active_timeboxed_task(self) -> Optional[TaskRecord]:
         """If a timeboxed task is currently active, return it. Otherwise,
            return None."""
         for task in self.tasks:
@@ -79,96 +143,472 @@ class Schedule:
     def stop_active_timeboxed_task(self):
         """Stop the current timeboxed task."""
         timeboxed_task = self.get_active_timeboxed_task()
-        timeboxed_task.stop()
+        if timeboxed_task is None:
+            return
+
+        timeboxed_task.to_task().stop()
         self.timeboxed_task = None
 
     def clear_cache(self):
         """Clear the scheduled tasks cache."""
-        if self.tasks:
-            del self.__dict__["tasks"]
+        self.tasks_by_uuid = {}
+        self.data_by_uuid = {}
+        self.time_slots = None
+        self.snapshot = None
+        self.timeboxes = TimeboxRollup()
+        self.__dict__.pop("tasks", None)
+        self.clear_views()
+
+    def clear_views(self):
+        """Clear the views derived from the tasks, after the tasks changed."""
+        for name in self.views:
+            self.__dict__.pop(name, None)
 
     @cached_property
-    def tasks(self) -> ScheduledTaskQuerySet:
+    def tasks(self) -> List[TaskRecord]:
         """Retrieve scheduled tasks from taskwarrior."""
-        queryset: ScheduledTaskQuerySet = ScheduledTaskQuerySet(backend=self.backend)
+        self.refresh()
+        return self.__dict__["tasks"]
+
+    # The cached properties below are derived from the tasks, and cleared by
+    # `clear_views` when the tasks change
+    views = (
+        "intervals",
+        "starts",
+        "index",
+        "visible",
+        "max_lengths",
+        "layouts",
+        "conflicting",
+    )
 
-        return queryset
+    @cached_property
+    def intervals(self) -> IntervalIndex[TaskRecord]:
+        """Return an interval index of the scheduled time ranges of the tasks
+           which are not completed. Tasks without a scheduled time of day or
+           without an estimate are left out, since they do not occupy a
+           specific time range."""
+        return IntervalIndex(
+            (task.scheduled_ts, task.scheduled_end_ts, task)
+            for task in self.tasks
+            if task.has_scheduled_time
+            and task.scheduled_ts is not None
+            and task.scheduled_end_ts is not None
+            and not task.completed
+        )
 
-    def get_time_slots(self) -> Dict:
-        """Return a dict with dates and their tasks.
-        >>> get_time_slots()
-        {datetime.date(2019, 6, 27): {00: [], 01: [], ..., 23: [task, task]},
-         datetime.date(2019, 6, 28): {00: [], ..., 10: [task, task], ...}]
-        """
-        start_time = "0:00"
-        end_time = "23:00"
-        slot_time = 60
+    @cached_property
+    def starts(self) -> StartIndex[TaskRecord]:
+        """Return an index of the scheduled tasks by their start."""
+        return StartIndex(
+            (task.scheduled_ts, task)
+            for task in self.tasks
+            if task.scheduled_ts is not None
+        )
 
-        start_date = self.scheduled_after.date()
-        end_date = self.scheduled_before.date()
+    @cached_property
+    def index(self) -> TaskIndex:
+        """Return the indexes of the tasks by project, tag and status."""
+        return TaskIndex(self.tasks)
+
+    @cached_property
+    def visible(self) -> Optional[FrozenSet[TaskRecord]]:
+        """Return the tasks matching the view filter, or None if all tasks
+           are shown."""
+        return self.index.select(self.view_filter)
+
+    def set_view_filter(self, view_filter: ViewFilter) -> bool:
+        """Narrow the shown tasks to the ones matching a filter. Return True
+           if the filter changed."""
+        if view_filter == self.view_filter:
+            return False
+
+        self.view_filter = view_filter
+        self.__dict__.pop("visible", None)
+        return True
+
+    def cycle_view_filter(self, criterion: str) -> ViewFilter:
+        """Narrow the shown tasks to the next project, tag or status of the
+           tasks, or stop filtering by it after the last one. Return the new
+           view filter."""
+        if criterion == "tag":
+            current = min(self.view_filter.tags, default=None)
+        else:
+            current = getattr(self.view_filter, criterion)
+
+        value = cycle(self.index.get_values(criterion), current)
+        self.set_view_filter(self.view_filter.replace(criterion, value))
+        return self.view_filter
+
+    def is_visible(self, task: TaskRecord) -> bool:
+        return self.visible is None or task in self.visible
+
+    def get_visible_tasks(self) -> List[TaskRecord]:
+        """Return the tasks matching the view filter, in export order."""
+        if self.visible is None:
+            return self.tasks
+        return [task for task in self.tasks if task in self.visible]
+
+    @cached_property
+    def max_lengths(self) -> Dict[str, int]:
+        """Return the max string lengths by key, filled by `get_max_length`
+           and kept until the tasks change."""
+        return {}
 
-        days = {}
-        date = start_date
+    @cached_property
+    def layouts(self) -> Dict[Tuple, ColumnLayout]:
+        """Return the column layouts by screen width and hidden columns,
+           filled by `get_layout` and kept until the tasks change."""
+        return {}
+
+    @cached_property
+    def conflicting(self) -> FrozenSet[str]:
+        """Return the uuids of the tasks which overlap another task."""
+        return frozenset(task.uuid for pair in self.get_conflicts() for task in pair)
+
+    def get_overlapping(self, start: datetime, end: datetime) -> List[TaskRecord]:
+        """Return the tasks scheduled to run during part of [start, end)."""
+        return self.intervals.overlapping(start.timestamp(), end.timestamp())
+
+    def get_running_at(self, moment: datetime) -> List[TaskRecord]:
+        """Return the tasks scheduled to run at the given moment."""
+        return self.intervals.at(moment.timestamp())
+
+    def get_conflicts(self) -> List[Tuple[TaskRecord, TaskRecord]]:
+        """Return the pairs of tasks which are scheduled at the same time."""
+        return self.intervals.overlapping_pairs()
+
+    def has_conflict(self, task: TaskRecord) -> bool:
+        return task.uuid in self.conflicting
+
+    def get_backend(self, source: Optional[str]) -> Backend:
+        """Return the backend of the given source, for modifying its tasks.
+           Tasks without a source belong to the single backend."""
+        if source is not None and isinstance(self.backend, MergedBackend):
+            return self.backend.backends[source]
+
+        return self.backend
+
+    def refresh(self) -> bool:
+        """Retrieve the scheduled tasks from taskwarrior and apply only what
+           changed since the last refresh. Return True if anything changed."""
+        return self.apply(self.backend.iter_export_data())
+
+    def apply(self, export_data: Iterable[Dict]) -> bool:
+        """Update the tasks, time slots and snapshot from exported task data.
+           Only tasks that were added, removed or modified (according to their
+           `modified` field and ID) are rebuilt. Return True if anything
+           changed."""
+        tasks: List[TaskRecord] = []
+        templates: List[Dict] = []
+        changed = False
+
+        for data in self.project_recurrences(export_data, templates):
+            uuid = data["uuid"]
+
+            task = self.tasks_by_uuid.get(uuid)
+            if task is None or self.is_modified(self.data_by_uuid[uuid], data):
+                if task is not None:
+                    self.unslot_task(task)
+                    self.timeboxes.remove(task)
+
+                task = TaskRecord(self.get_backend(data.get("source")), data)
+                self.tasks_by_uuid[uuid] = task
+                self.slot_task(task)
+                self.timeboxes.add(task)
+                changed = True
+
+            self.data_by_uuid[uuid] = data
+            tasks.append(task)
+
+        if len(tasks) != len(self.tasks_by_uuid):
+            current = set(task["uuid"] for task in tasks)
+            for uuid in list(self.tasks_by_uuid):
+                if uuid not in current:
+                    task = self.tasks_by_uuid.pop(uuid)
+                    self.unslot_task(task)
+                    self.timeboxes.remove(task)
+                    del self.data_by_uuid[uuid]
+            changed = True
+
+        if changed or self.snapshot is None:
+            self.__dict__["tasks"] = tasks
+            self.snapshot = TaskSnapshot(
+                tasks,
+                self.data_by_uuid,
+                self.scheduled_after,
+                self.scheduled_before,
+                templates,
+            )
+            self.clear_views()
+
+        return changed
+
+    def project_recurrences(
+        self, export_data: Iterable[Dict], templates: List[Dict]
+    ) -> Iterator[Dict]:
+        """Yield the exported tasks, followed by the projected instances of
+           recurring tasks. The templates of recurring tasks are added to
+           templates instead of being yielded."""
+        if self.recurrences is None:
+            yield from export_data
+            return
+
+        for data in export_data:
+            if is_template(data):
+                templates.append(data)
+            else:
+                yield data
+
+        yield from self.recurrences.iter_projections(templates)
+
+    @staticmethod
+    def is_modified(old_data: Dict, new_data: Dict) -> bool:
+        """Return True if a task changed between two exports. The ID is
+           compared as well, since taskwarrior renumbers tasks without
+           updating their `modified` field."""
+        for key in ("modified", "id"):
+            if old_data.get(key) != new_data.get(key):
+                return True
+
+        return False
+
+    @property
+    def slot_label_width(self) -> int:
+        """Return the length of the time slot labels."""
+        return 2 if self.slot_width == 60 else 5
+
+    def get_slot_label(self, hour: int, minute: int) -> str:
+        """Return the label of a time slot: the hour for slots of an hour,
+           otherwise the hour and minute."""
+        if self.slot_width == 60:
+            return f"{hour:02d}"
+        return f"{hour:02d}:{minute:02d}"
+
+    def get_slot_key_at(self, moment: datetime) -> Tuple[str, str]:
+        """Return the (day, slot label) of the time slot holding a moment."""
+        minute = moment.minute - moment.minute % self.slot_width
+        return moment.date().isoformat(), self.get_slot_label(moment.hour, minute)
+
+    def get_slot_key(self, task: TaskRecord) -> Optional[Tuple[str, str]]:
+        """Return the (day, slot label) time slot of a task, or None if it
+           falls outside of the schedule's days."""
+        start = task.scheduled_start_datetime
+        if not start:
+            return None
+
+        day = start.date()
+        if day < self.scheduled_after.date() or day > self.scheduled_before.date():
+            return None
+
+        return self.get_slot_key_at(start)
+
+    def is_current_slot(self, day: str, slot: str) -> bool:
+        """Return True if the given time slot holds the current time."""
+        return (day, slot) == self.get_slot_key_at(datetime.now())
+
+    @cached_property
+    def slot_labels(self) -> List[str]:
+        """Return the labels of the time slots of a day, in order."""
+        return [
+            self.get_slot_label(*divmod(minutes, 60))
+            for minutes in range(0, 24 * 60, self.slot_width)
+        ]
+
+    def slot_task(self, task: TaskRecord):
+        """Add a task to its time slot, keeping the slot sorted."""
+        if self.time_slots is None:
+            return
+
+        key = self.get_slot_key(task)
+        if key:
+            slot = self.time_slots.setdefault(key[0], {}).setdefault(key[1], [])
+            slot.append(task)
+            slot.sort(key=scheduled_key)
+
+    def unslot_task(self, task: TaskRecord):
+        """Remove a task from its time slot, and the slot if it is empty."""
+        if self.time_slots is None:
+            return
+
+        key = self.get_slot_key(task)
+        if key:
+            day = self.time_slots[key[0]]
+            slot = day[key[1]]
+            slot[:] = [task_ for task_ in slot if task_ is not task]
+            if not slot:
+                del day[key[1]]
+                if not day:
+                    del self.time_slots[key[0]]
+
+    def get_occupied_slots(self) -> Dict[str, Dict[str, List[TaskRecord]]]:
+        """Return the time slots holding tasks, by date and slot label. Only
+           occupied slots are stored, so the size of the dict depends on the
+           number of tasks, not on the length of the schedule's range. The
+           dict is built once and then kept up to date by `apply`."""
+        if self.time_slots is not None:
+            return self.time_slots
+
+        days: Dict[str, Dict[str, List[TaskRecord]]] = {}
+        scheduled = [task for task in self.tasks if task.scheduled_ts is not None]
+        for task in sorted(scheduled, key=scheduled_key):
+            key = self.get_slot_key(task)
+            if key:
+                days.setdefault(key[0], {}).setdefault(key[1], []).append(task)
+
+        self.time_slots = days
+        return days
+
+    def iter_days(self) -> Iterator[str]:
+        """Yield the dates of the schedule's range, in ISO format."""
+        date = self.scheduled_after.date()
+        end_date = self.scheduled_before.date()
         while date <= end_date:
-            hours = {}
-            time = datetime.strptime(start_time, "%H:%M")
-            end = datetime.strptime(end_time, "%H:%M")
-            while time <= end:
-                task_list = []
-                task: ScheduledTask
-                for task in self.tasks:
-                    start = task.scheduled_start_datetime
-                    if start and start.date() == date:
-                        if start.hour == int(time.strftime("%H")):
-                            task_list.append(task)
-
-                task_list = sorted(task_list, key=lambda k: k["scheduled"])
-                hours[time.strftime("%H")] = task_list
-                time += timedelta(minutes=slot_time)
-            days[date.isoformat()] = hours
+            yield date.isoformat()
             date += timedelta(days=1)
 
-        return days
+    def iter_time_slots(
+        self, include_empty: bool = False
+    ) -> Iterator[Tuple[str, Iterator[Tuple[str, Sequence[TaskRecord]]]]]:
+        """Yield the days in order, each with its (label, tasks) time slots
+           in order. Unless include_empty is True, only occupied days and
+           slots are yielded; otherwise the empty ones are generated as they
+           are iterated. Only the tasks matching the view filter are
+           yielded."""
+        occupied = self.get_occupied_slots()
+
+        if not include_empty:
+            for day in sorted(occupied):
+                if self.visible is not None and not any(
+                    task in self.visible
+                    for tasks in occupied[day].values()
+                    for task in tasks
+                ):
+                    continue
+                yield day, self.iter_day_slots(occupied[day], include_empty)
+            return
+
+        for day in self.iter_days():
+            yield day, self.iter_day_slots(occupied.get(day, {}), include_empty)
+
+    def iter_day_slots(
+        self, slots: Dict[str, List[TaskRecord]], include_empty: bool
+    ) -> Iterator[Tuple[str, Sequence[TaskRecord]]]:
+        """Yield the (label, tasks) time slots of a day in order."""
+        labels = self.slot_labels if include_empty else sorted(slots)
+        for label in labels:
+            tasks: Sequence[TaskRecord] = slots.get(label, ())
+            if self.visible is not None:
+                tasks = [task for task in tasks if task in self.visible]
+            if tasks or include_empty:
+                yield label, tasks
+
+    def get_time_slots(self) -> Dict:
+        """Return a dict with dates and their tasks by time slot, including
+           the empty slots. Slots are labeled by hour, or by hour and minute
+           for slots shorter than an hour. Prefer `iter_time_slots` for long
+           ranges, since this builds a list for every slot.
+        >>> get_time_slots()
+        {'2019-06-27': {'00': [], '01': [], ..., '23': [task, task]},
+         '2019-06-28': {'00': [], ..., '10': [task, task], ...}]
+        """
+        return {
+            day: {label: tasks or [] for label, tasks in slots}
+            for day, slots in self.iter_time_slots(include_empty=True)
+        }
 
     def get_max_length(self, key: str) -> int:
         """Return the max string length of a given key's value of all tasks
-           in the schedule. Useful for determining column widths.
+           in the schedule. Useful for determining column widths. Lengths
+           are computed once per key until the tasks change.
         """
-        max_length = 0
-        for task in self.tasks:
-            length = len(str(task[key]))
-            if length > max_length:
-                max_length = length
+        max_length = self.max_lengths.get(key)
+        if max_length is not None:
+            return max_length
 
+        max_length = max((len(str(task[key])) for task in self.tasks), default=0)
+        self.max_lengths[key] = max_length
         return max_length
 
+    def get_layout(
+        self, max_x: Optional[int] = None, hidden: Iterable[str] = ()
+    ) -> ColumnLayout:
+        """Return the layout of the table columns on a screen max_x wide,
+           without the hidden columns. Layouts are computed once per screen
+           width until the tasks change."""
+        key = (max_x, frozenset(hidden))
+        layout = self.layouts.get(key)
+        if layout is None:
+            layout = ColumnLayout(
+                self.table_columns,
+                self.get_max_length,
+                self.slot_label_width,
+                max_x,
+                hidden,
+            )
+            self.layouts[key] = layout
+        return layout
+
     def get_column_offsets(self) -> List[int]:
         """Return the offsets for each column in the schedule for rendering
            a table."""
-        offsets = [0, 5]  # Hour, glyph
-        offsets.append(5 + self.get_max_length("id") + 1)  # ID
-        offsets.append(offsets[2] + 12)  # Time
-        offsets.append(offsets[3] + 10)  # Timeboxes
-
-        add_offset = self.get_max_length("project") + 1
-
-        if add_offset < 8:
-            add_offset = 8
+        return self.get_layout().get_offsets()
 
-        offsets.append(offsets[4] + add_offset)  # Project
-        return offsets
-
-    def get_next_task(self, task: ScheduledTask) -> Optional[ScheduledTask]:
+    def get_next_task(self, task: TaskRecord) -> Optional[TaskRecord]:
         """Get the next scheduled task after the given task. If there is no
            next scheduled task, return None."""
-        next_tasks = []
-        for task_ in self.tasks:
-            if task_.scheduled_start_datetime > task.scheduled_start_datetime:
-                next_tasks.append(task_)
-
-        next_tasks.sort(key=lambda task: task.scheduled_start_datetime)
-
-        if next_tasks:
-            return next_tasks[0]
-
-        return None
+        if task.scheduled_ts is None:
+            return None
+
+        return self.starts.next_after(task.scheduled_ts)
+
+    def get_previous_task(self, task: TaskRecord) -> Optional[TaskRecord]:
+        """Get the last task scheduled before the given task. If there is no
+           previous scheduled task, return None."""
+        if task.scheduled_ts is None:
+            return None
+
+        return self.starts.previous_before(task.scheduled_ts)
+
+    def get_task_end_ts(self, task: TaskRecord) -> Optional[float]:
+        """Return the end of the time a task should be active: its scheduled
+           end, or the start of the next task if it has no estimate."""
+        if task.scheduled_end_ts is not None:
+            return task.scheduled_end_ts
+
+        next_task = self.get_next_task(task)
+        return next_task.scheduled_ts if next_task is not None else None
+
+    def should_be_active(
+        self, task: TaskRecord, now_ts: Optional[float] = None
+    ) -> bool:
+        """Return True if the task should be active: it has started and it
+           has not reached its end, see `get_task_end_ts`."""
+        if task.scheduled_ts is None:
+            return False
+
+        end_ts = self.get_task_end_ts(task)
+        if end_ts is None:
+            return False
+
+        if now_ts is None:
+            now_ts = datetime.now().timestamp()
+        return task.scheduled_ts < now_ts < end_ts
+
+    def get_current_task(self, now_ts: Optional[float] = None) -> Optional[TaskRecord]:
+        """Return the task which should be active now. If several tasks
+           should be, return the one which started last."""
+        if now_ts is None:
+            now_ts = datetime.now().timestamp()
+
+        task = self.starts.last_started(now_ts)
+        if task is None or self.should_be_active(task, now_ts):
+            return task
+
+        # An earlier task with a longer estimate may still be running
+        running = [
+            task_
+            for task_ in self.intervals.at(now_ts)
+            if self.should_be_active(task_, now_ts)
+        ]
+        return running[-1] if running else None
@@ -3,24 +3,94 @@ import os
 import tempfile
 import time
 from datetime import datetime as dt
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional, Union
 
-from isodate import parse_duration
 from tasklib.task import Task, TaskQuerySet
 
+from taskschedule.durations import parse_estimate_duration
+
+
+class NotCached:
+    """The type of NOT_CACHED, which marks a memoized value as not computed
+       yet, since None is a valid value."""
+
+    def __repr__(self) -> str:
+        return "NOT_CACHED"
+
+
+NOT_CACHED = NotCached()
+
+
+def check_notified(uuid: str) -> bool:
+    """Return True if a notification was sent for the task with the given
+       uuid recently. Otherwise, record that one is being sent now and return
+       False."""
+    filename = tempfile.gettempdir() + "/taskschedule"
+
+    # TODO Move this logic into Notifier; this is only used there
+
+    min_delay = 300  # TODO Make configurable
+    if os.path.exists(filename):
+        mode = "r+"
+    else:
+        mode = "w+"
+
+    with open(filename, mode) as f:
+        raw_data = f.read()
+
+        if not raw_data:
+            raw_data = "{}"
+
+        data = json.loads(raw_data)
+
+        # TODO Refactor to de-duplicate code
+        if uuid not in data:
+            data[uuid] = time.time()
+            f.seek(0)
+            f.truncate(0)
+            f.write(json.dumps(data))
+            return False
+        else:
+            if time.time() > float(data[uuid]) + min_delay:
+                data[uuid] = time.time()
+                f.seek(0)
+                f.truncate(0)
+                f.write(json.dumps(data))
+                return False
+            else:
+                return True
+
 
 class ScheduledTaskQuerySet(TaskQuerySet):
-    ...
+    def iterator(self) -> Iterator["ScheduledTask"]:
+        """Yield the tasks as they are exported, without caching them."""
+        return self.backend.iter_tasks(self.filter_obj)
 
 
 class ScheduledTask(Task):
     """A scheduled task."""
 
     def __init__(self, *args, **kwargs):
+        # The scheduled end, computed on first use and cleared when the
+        # scheduled time or the estimate change
+        self._scheduled_end: Union[dt, None, NotCached] = NOT_CACHED
         super(ScheduledTask, self).__init__(*args, **kwargs)
         # TODO Create reference to Schedule
         self.glyph = "○"
 
+    def __setitem__(self, key, value):
+        super(ScheduledTask, self).__setitem__(key, value)
+        if key in ("scheduled", "estimate"):
+            self._scheduled_end = NOT_CACHED
+
+    def _load_data(self, data):
+        super(ScheduledTask, self)._load_data(data)
+        self._scheduled_end = NOT_CACHED
+
+    def _update_data(self, data, *args, **kwargs):
+        super(ScheduledTask, self)._update_data(data, *args, **kwargs)
+        self._scheduled_end = NOT_CACHED
+
     @property
     def has_scheduled_time(self) -> bool:
         """If task's scheduled time is 00:00:00, it has been scheduled for a
@@ -51,77 +121,32 @@ class ScheduledTask(Task):
     @property
     def scheduled_end_datetime(self) -> Optional[dt]:
         """Return the task's scheduled end datetime."""
-        try:
-            estimate: dt = self["estimate"]
-            duration = parse_duration(estimate)
-            return self["scheduled"] + duration
-        except TypeError:
-            return None
+        if isinstance(self._scheduled_end, NotCached):
+            end: Optional[dt] = None
+            try:
+                end = self["scheduled"] + parse_estimate_duration(self["estimate"])
+            except TypeError:
+                pass
+            self._scheduled_end = end
+            return end
+        return self._scheduled_end
 
     @property
     def notified(self) -> bool:
-        filename = tempfile.gettempdir() + "/taskschedule"
-        uuid = self["uuid"]
-
-        # TODO Move this logic into Notifier; this is only used there
-
-        min_delay = 300  # TODO Make configurable
-        if os.path.exists(filename):
-            mode = "r+"
-        else:
-            mode = "w+"
-
-        with open(filename, mode) as f:
-            raw_data = f.read()
-
-            if not raw_data:
-                raw_data = "{}"
-
-            data = json.loads(raw_data)
-
-            # TODO Refactor to de-duplicate code
-            if uuid not in data:
-                data[uuid] = time.time()
-                f.seek(0)
-                f.truncate(0)
-                f.write(json.dumps(data))
-                return False
-            else:
-                if time.time() > float(data[uuid]) + min_delay:
-                    data[uuid] = time.time()
-                    f.seek(0)
-                    f.truncate(0)
-                    f.write(json.dumps(data))
-                    return False
-                else:
-                    return True
+        return check_notified(self["uuid"])
 
     @property
     def should_be_active(self) -> bool:
-        """Return true if the task should be active."""
-
-        if self.scheduled_start_datetime is None:
+        """Return true if the task should be active, i.e. it is between its
+           scheduled start and end. See `Schedule.should_be_active` for
+           tasks without an estimate."""
+        start = self.scheduled_start_datetime
+        end = self.scheduled_end_datetime
+        if start is None or end is None:
             return False
 
-        start_ts: float = dt.timestamp(self.scheduled_start_datetime)
-
-        now = dt.now()
-        now_ts = dt.timestamp(now)
-
-        if self["end"] is None:
-            # TODO Implement get_next_task differently
-            # next_task = self.schedule.get_next_task(self)
-            next_task = None
-            if next_task is not None:
-                next_task_start_ts = dt.timestamp(next_task.start)
-                if now_ts > start_ts and next_task_start_ts > now_ts:
-                    return True
-        else:
-            end_ts = dt.timestamp(self["end"])
-            if now_ts > start_ts and end_ts > now_ts:
-                return True
-
-        return False
+        now_ts = dt.timestamp(dt.now())
+        return dt.timestamp(start) < now_ts < dt.timestamp(end)
 
     @property
     def overdue(self) -> bool:
@@ -1,12 +1,20 @@
 import curses
-import time
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from taskschedule.config_parser import ConfigParser
 from taskschedule.hooks import run_hooks
+from taskschedule.layout import ColumnLayout
 from taskschedule.schedule import Schedule
-from taskschedule.scheduled_task import ScheduledTask
+from taskschedule.snapshot import RefreshCycle
+from taskschedule.status import (
+    ACTIVE,
+    COMPLETED,
+    OVERDUE,
+    SHOULD_BE_ACTIVE,
+    StatusEngine,
+)
+from taskschedule.task_record import TaskRecord
 from taskschedule.utils import calculate_datetime
 
 BufferType = List[Tuple[int, int, str, int]]
@@ -22,6 +30,7 @@ class Screen:
         scheduled_before: datetime,
         hide_projects=False,
         hide_empty=False,
+        refresh_cycle: Optional[RefreshCycle] = None,
     ):
         self.config = ConfigParser().config()
         self.scheduled_before = scheduled_before
@@ -42,9 +51,11 @@ class Screen:
         self.prev_buffer: BufferType = []
         self.init_colors()
 
-        self.current_task = None
+        self.current_task: Optional[TaskRecord] = None
 
         self.schedule = schedule
+        self.statuses = StatusEngine(schedule)
+        self.refresh_cycle = refresh_cycle
 
     def close(self):
         """Close the curses screen."""
@@ -111,23 +122,25 @@ class Screen:
             self.COLOR_DIVIDER_TEXT = curses.color_pair(0)
             self.COLOR_BLUE = curses.color_pair(0)
 
-    def get_task_color(self, task: ScheduledTask, alternate: bool) -> int:
-        """Return the color for the given task."""
+    def get_task_color(self, task: TaskRecord, alternate: bool) -> int:
+        """Return the color for the given task, according to its status as
+           of the last refresh of the buffer."""
         color = None
+        status = self.statuses.get_status(task)
 
-        if task.completed:
+        if status == COMPLETED:
             if alternate:
                 color = self.COLOR_COMPLETED_ALTERNATE
             else:
                 color = self.COLOR_COMPLETED
-        elif task.active:
+        elif status == ACTIVE:
             color = self.COLOR_ACTIVE
-        elif task.should_be_active:
+        elif status == SHOULD_BE_ACTIVE:
             if alternate:
                 color = self.COLOR_SHOULD_BE_ACTIVE_ALTERNATE
             else:
                 color = self.COLOR_SHOULD_BE_ACTIVE
-        elif task.overdue and not task.completed:
+        elif status == OVERDUE:
             if alternate:
                 color = self.COLOR_OVERDUE_ALTERNATE
             else:
@@ -163,14 +176,40 @@ class Screen:
         after = self.scheduled_after.strftime(date_format)
         footnote = f"{count} tasks - from {after} until {before}"
 
+        view_filter = self.schedule.view_filter
+        if not view_filter.is_empty:
+            visible = len(self.schedule.get_visible_tasks())
+            footnote = f"{visible} of {footnote} - {view_filter}"
+
+        cycle = self.refresh_cycle
+        if cycle is not None and cycle.cycles:
+            footnote = (
+                f"{footnote} - exports: {cycle.last_exports} last refresh,"
+                f" {cycle.exports} in {cycle.cycles} refreshes"
+            )
+
         return footnote
 
+    def prerender_timebox_footnote(self) -> str:
+        """Pre-render the real and estimated timeboxes of today and of all
+           tasks, or an empty string if no task is timeboxed."""
+        timeboxes = self.schedule.get_timeboxes()
+        total = timeboxes.total
+        if not total.estimate and not total.real:
+            return ""
+
+        today = timeboxes.day(datetime.now().date().isoformat())
+        return (
+            f"today: {today.real} / {today.estimate}"
+            f"  total: {total.real} / {total.estimate}"
+        )
+
     def draw_footnote(self):
         """Draw the footnote at the bottom of the screen."""
         max_y, max_x = self.get_maxyx()
 
         # Draw timebox status
-        # timeboxed_task: ScheduledTask = self.schedule.get_active_timeboxed_task()
+        # timeboxed_task: TaskRecord = self.schedule.get_active_timeboxed_task()
         # if timeboxed_task:
         #     active_start_time: datetime = timeboxed_task["start"]
         #     active_start_time.replace(tzinfo=None)
@@ -244,17 +283,15 @@ class Screen:
         # else:
         #     self.stdscr.addstr(max_y - 2, 1, "no active timebox", self.COLOR_DEFAULT)
 
-        # estimated_count = self.schedule.get_timebox_estimate_count()
-        # real_count = self.schedule.get_timebox_real_count()
-
-        # footnote_timebox_right: str = f"total: {real_count} / {estimated_count}"
-
-        # self.stdscr.addstr(
-        #     max_y - 2,
-        #     max_x - len(footnote_timebox_right) - 1,
-        #     footnote_timebox_right,
-        #     self.COLOR_DEFAULT,
-        # )
+        # Draw timebox totals
+        footnote_timebox = self.prerender_timebox_footnote()
+        if footnote_timebox and len(footnote_timebox) < max_x - 1:
+            self.stdscr.addstr(
+                max_y - 2,
+                max_x - len(footnote_timebox) - 1,
+                footnote_timebox,
+                self.COLOR_DEFAULT,
+            )
 
         # Draw footnote
         footnote = self.prerender_footnote()
@@ -284,7 +321,7 @@ class Screen:
             self.draw_footnote()
             self.pad.refresh(self.scroll_level + 1, 0, 1, 0, max_y - 3, max_x - 1)
 
-    def render_timeboxes(self, task: ScheduledTask, color: int) -> List[dict]:
+    def render_timeboxes(self, task: TaskRecord, color: int) -> List[dict]:
         """Render a task's timebox column."""
 
         timeboxes: List[dict] = []
@@ -315,44 +352,34 @@ class Screen:
         """Pre-render the headers."""
 
         header_buffer: BufferType = []
-
-        # Determine offsets
-        max_y, max_x = self.get_maxyx()
-        offsets = self.schedule.get_column_offsets()
-        max_project_column_length = round(max_x / 8)
-        if offsets[5] - offsets[4] > max_project_column_length:
-            offsets[5] = offsets[4] + max_project_column_length
-
-        # Draw headers
-        headers = ["", "", "ID", "Time", "Timeboxes", "Project", "Description"]
-        column_lengths = [2, 1]
-        column_lengths.append(self.schedule.get_max_length("id"))
-        column_lengths.append(11)
-        column_lengths.append(9)
-        column_lengths.append(max_project_column_length - 1)
-        column_lengths.append(self.schedule.get_max_length("description"))
-
-        for i, header in enumerate(headers):
-            try:
-                extra_length = column_lengths[i] - len(header)
-                headers[i] += " " * extra_length
-            except IndexError:
-                pass
-
-        header_buffer.append((0, offsets[1], headers[2], self.COLOR_HEADER))
-        header_buffer.append((0, offsets[2], headers[3], self.COLOR_HEADER))
-        header_buffer.append((0, offsets[3], headers[4], self.COLOR_HEADER))
-        header_buffer.append((0, offsets[4], headers[5], self.COLOR_HEADER))
-
-        if not self.hide_projects:
-            header_buffer.append((0, offsets[5], headers[6], self.COLOR_HEADER))
+        layout = self.get_layout()
+
+        # Pad the headers to the width of their columns, and the header of
+        # the last column to its longest value
+        for column in layout.columns:
+            width = layout.get_cell_width(column.name)
+            if column is layout.columns[-1] and column.key is not None:
+                width = min(width, self.schedule.get_max_length(column.key))
+
+            header = column.header[0:width].ljust(width)
+            header_buffer.append(
+                (0, layout.offsets[column.name], header, self.COLOR_HEADER)
+            )
 
         return header_buffer
 
+    def get_layout(self) -> ColumnLayout:
+        """Return the layout of the table columns for the screen width. It
+           is computed once per screen width until the tasks change."""
+        max_y, max_x = self.get_maxyx()
+        hidden = ("project",) if self.hide_projects else ()
+        return self.schedule.get_layout(max_x, hidden)
+
     def prerender_divider(self, day: str, current_line: int) -> BufferType:
         max_y, max_x = self.get_maxyx()
-        offsets = self.schedule.get_column_offsets()
-        divider_pt1 = "─" * (offsets[2] - 1)
+        layout = self.get_layout()
+        first = layout.columns[0].name
+        divider_pt1 = "─" * (layout.offsets[first] + layout.widths[first] - 1)
 
         divider_buffer: BufferType = []
         divider_buffer.append((current_line, 0, divider_pt1, self.COLOR_DIVIDER))
@@ -383,26 +410,34 @@ class Screen:
 
     def run_hook(self):
         # TODO This does not belong here, move it somewhere appropriate
-        current_task = None
-        for task_ in self.schedule.tasks:
-            if task_.should_be_active:
-                current_task = task_
+        current_task = self.schedule.get_current_task()
 
         if current_task is not None:
             if self.current_task is None:
                 self.current_task = current_task
                 if current_task["id"] != 0:
-                    run_hooks("on-progress", data=current_task.as_dict())
+                    data = self.get_task_data(current_task)
+                    run_hooks("on-progress", data=data)
             else:
                 if self.current_task["id"] != current_task["id"]:
                     self.current_task = current_task
                     if current_task["id"] != 0:
-                        run_hooks("on-progress", data=current_task.as_dict())
+                        data = self.get_task_data(current_task)
+                        run_hooks("on-progress", data=data)
+
+    def get_task_data(self, task: TaskRecord) -> dict:
+        """Return the exported data of a task for passing to hooks."""
+        snapshot = self.schedule.snapshot
+        if snapshot is not None and task["uuid"] in snapshot.data_by_uuid:
+            return snapshot.as_dict(task)
+
+        return task.as_dict()
 
     def prerender_empty_line(
-        self, alternate: bool, current_line: int, hour: int, day: str
+        self, alternate: bool, current_line: int, slot: str, day: str
     ) -> BufferType:
         max_y, max_x = self.get_maxyx()
+        start = self.get_layout().offsets["glyph"] + 2
 
         _buffer: BufferType = []
 
@@ -412,117 +447,113 @@ class Screen:
             color = self.COLOR_DEFAULT
 
         # Fill line to screen length
-        _buffer.append((current_line, 5, " " * (max_x - 5), color))
+        _buffer.append((current_line, start, " " * (max_x - start), color))
 
-        # Draw hour column, highlight current hour
-        current_hour = time.localtime().tm_hour
-        if int(hour) == current_hour and day == datetime.now().date().isoformat():
-            _buffer.append((current_line, 0, str(hour), self.COLOR_HOUR_CURRENT))
+        # Draw time slot column, highlight current time slot
+        if self.schedule.is_current_slot(day, slot):
+            _buffer.append((current_line, 0, slot, self.COLOR_HOUR_CURRENT))
         else:
-            _buffer.append((current_line, 0, str(hour), self.COLOR_HOUR))
+            _buffer.append((current_line, 0, slot, self.COLOR_HOUR))
 
         return _buffer
 
     def prerender_task(
         self,
         task_num: int,
-        task: ScheduledTask,
+        task: TaskRecord,
         alternate: bool,
-        hour: int,
+        slot: str,
         current_line: int,
         day: str,
     ) -> BufferType:
         """Pre-render a task."""
         max_y, max_x = self.get_maxyx()
-        offsets = self.schedule.get_column_offsets()
+        layout = self.get_layout()
+        glyph_offset = layout.offsets["glyph"]
+        start = glyph_offset + 2
 
         _buffer: BufferType = []
 
         color = self.get_task_color(task, alternate)
 
-        # Only draw hour once for multiple tasks
+        # Draw time slot column only once for multiple tasks, highlight
+        # current time slot
         if task_num == 0:
-            hour_ = str(hour)
-        else:
-            hour_ = ""
-
-        # Draw hour column, highlight current hour
-        current_hour = time.localtime().tm_hour
-        if hour_ != "":
-            if int(hour) == current_hour and day == datetime.now().date().isoformat():
-                _buffer.append((current_line, 0, hour_, self.COLOR_HOUR_CURRENT))
+            if self.schedule.is_current_slot(day, slot):
+                _buffer.append((current_line, 0, slot, self.COLOR_HOUR_CURRENT))
             else:
-                _buffer.append((current_line, 0, hour_, self.COLOR_HOUR))
+                _buffer.append((current_line, 0, slot, self.COLOR_HOUR))
 
         # Fill line to screen length
-        _buffer.append((current_line, 5, " " * (max_x - 5), color))
+        _buffer.append((current_line, start, " " * (max_x - start), color))
+
+        # Draw glyph column, marking tasks scheduled at the same time and
+        # projected instances of recurring tasks
+        if self.schedule.has_conflict(task):
+            glyph = self.config["schedule"]["conflict_glyph"]
+            _buffer.append((current_line, glyph_offset, glyph, self.COLOR_OVERDUE))
+        elif task.projected:
+            glyph = self.config["schedule"]["projected_glyph"]
+            _buffer.append((current_line, glyph_offset, glyph, self.COLOR_HOUR))
+        else:
+            _buffer.append((current_line, glyph_offset, task.glyph, self.COLOR_GLYPH))
+
+        for column in layout.columns:
+            offset = layout.offsets[column.name]
+            width = layout.get_cell_width(column.name)
+
+            if column.name == "timeboxes":
+                timeboxes = self.render_timeboxes(task, color)
+                for i, timebox in enumerate(timeboxes[0:width]):
+                    _buffer.append(
+                        (
+                            current_line,
+                            offset + i,
+                            timebox.get("char"),
+                            timebox.get("color"),
+                        )
+                    )
+                continue
+
+            if column.name == "id":
+                if task["id"] == 0:
+                    continue
+                text = str(task["id"])
+            elif column.name == "time":
+                text = self.format_time(task)
+            elif column.name == "description" and task.source is not None:
+                # Prefix the description with the source of the task if
+                # tasks are merged from multiple data locations
+                text = f"[{task.source}] {task['description']}"
+            else:
+                text = column.format(task)
 
-        # Draw glyph column
-        _buffer.append((current_line, 3, task.glyph, self.COLOR_GLYPH))
+            _buffer.append((current_line, offset, text[0:width], color))
 
-        # Draw task id column
-        if task["id"] != 0:
-            _buffer.append((current_line, 5, str(task["id"]), color))
+        return _buffer
 
-        # Draw the time column.
-        # Do not show the start time if the task is not scheduled at a
-        # specific time, so the column is not cluttered with tasks
-        # having start times as 00:00.
-        start_dt = task.scheduled_start_datetime
-        if start_dt:
-            if not task.has_scheduled_time:
-                if task.scheduled_end_datetime:
-                    end_time = "{}".format(
-                        task.scheduled_end_datetime.strftime("%H:%M")
-                    )
-                    formatted_time = "      {}".format(end_time)
-                else:
-                    formatted_time = ""
-            else:
-                start_time = "{}".format(start_dt.strftime("%H:%M"))
-                if task.scheduled_end_datetime is None:
-                    formatted_time = start_time
-                else:
-                    end_time = "{}".format(
-                        task.scheduled_end_datetime.strftime("%H:%M")
-                    )
-                    formatted_time = "{}-{}".format(start_time, end_time)
-        else:
-            formatted_time = ""
-
-        _buffer.append((current_line, offsets[2], formatted_time, color))
-
-        # Draw timeboxes column
-        timeboxes = self.render_timeboxes(task, color)
-        for i, timebox in enumerate(timeboxes):
-            _buffer.append(
-                (
-                    current_line,
-                    offsets[3] + i,
-                    timebox.get("char"),
-                    timebox.get("color"),
-                )
-            )
+    @staticmethod
+    def format_time(task: TaskRecord) -> str:
+        """Return the text of the time column of a task.
 
-        # Optionally draw project column
-        offset = 0
-        if not self.hide_projects:
-            if task["project"] is None:
-                project = ""
-            else:
-                max_length = offsets[5] - offsets[4] - 1
-                project = task["project"][0:max_length]
+           Do not show the start time if the task is not scheduled at a
+           specific time, so the column is not cluttered with tasks having
+           start times as 00:00."""
+        start_dt = task.scheduled_start_datetime
+        end_dt = task.scheduled_end_datetime
+        if not start_dt:
+            return ""
 
-            _buffer.append((current_line, offsets[4], project, color))
-            offset = offsets[5]
-        else:
-            offset = offsets[4]
+        if not task.has_scheduled_time:
+            if end_dt:
+                return "      {}".format(end_dt.strftime("%H:%M"))
+            return ""
 
-        # Draw description column
-        description = task["description"][0 : max_x - offset]
-        _buffer.append((current_line, offset, description, color))
+        start_time = start_dt.strftime("%H:%M")
+        if end_dt is None:
+            return start_time
 
-        return _buffer
+        return "{}-{}".format(start_time, end_dt.strftime("%H:%M"))
 
     def refresh_buffer(self):
         """Refresh the buffer."""
@@ -530,9 +561,10 @@ class Screen:
         self.prev_buffer = self.buffer
         self.buffer = []
 
-        tasks = self.schedule.tasks
+        # Classify the tasks once for the whole frame
+        self.statuses.refresh()
 
-        if not self.schedule.tasks:
+        if not self.schedule.get_visible_tasks():
             return
 
         # Run on-progress hook
@@ -557,29 +589,21 @@ class Screen:
         #    first_hour = 0
         #    last_hour = 23
 
-        time_slots = self.schedule.get_time_slots()
-        for day in time_slots:
-
-            # Draw divider if day has tasks
-            day_has_tasks = False
-            for hour in time_slots[day]:
-                tasks = time_slots[day][hour]
-                if tasks:
-                    day_has_tasks = True
-
-            if day_has_tasks or not self.hide_empty:
-                divider_buffer = self.prerender_divider(day, current_line)
-                for divider_part in divider_buffer:
-                    self.buffer.append(divider_part)
+        # Only days and time slots with tasks are iterated, unless empty ones
+        # are shown
+        time_slots = self.schedule.iter_time_slots(include_empty=not self.hide_empty)
+        for day, slots in time_slots:
+            divider_buffer = self.prerender_divider(day, current_line)
+            for divider_part in divider_buffer:
+                self.buffer.append(divider_part)
 
-                current_line += 1
-                alternate = False
+            current_line += 1
+            alternate = False
 
-            for hour in time_slots[day]:
-                tasks = time_slots[day][hour]
-                if not tasks and not self.hide_empty:
+            for slot, tasks in slots:
+                if not tasks:
                     empty_line_buffer = self.prerender_empty_line(
-                        alternate, current_line, hour, day
+                        alternate, current_line, slot, day
                     )
                     for part in empty_line_buffer:
                         self.buffer.append(part)
@@ -587,10 +611,10 @@ class Screen:
                     current_line += 1
                     alternate = not alternate
 
-                task: ScheduledTask
+                task: TaskRecord
                 for task_num, task in enumerate(tasks):
                     task_buffer = self.prerender_task(
-                        task_num, task, alternate, hour, current_line, day
+                        task_num, task, alternate, slot, current_line, day
                     )
                     for part in task_buffer:
                         self.buffer.append(part)
@@ -0,0 +1,96 @@
+"""This module provides the TaskSnapshot class, an immutable view of the
+   scheduled tasks of one refresh, and RefreshCycle, which counts how often
+   taskwarrior is read during a refresh cycle."""
+
+import copy
+import time
+from datetime import datetime
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from taskschedule.task_record import TaskRecord
+
+
+class TaskSnapshot:
+    """The scheduled tasks as read during one refresh. The schedule, the
+       notifier and the hooks all query the same snapshot, so a refresh
+       cycle reads taskwarrior at most once."""
+
+    def __init__(
+        self,
+        tasks: Sequence["TaskRecord"],
+        data_by_uuid: Mapping[str, Dict],
+        scheduled_after: datetime,
+        scheduled_before: datetime,
+        templates: Sequence[Dict] = (),
+    ):
+        self.tasks: Tuple["TaskRecord", ...] = tuple(tasks)
+        self.templates: Tuple[Dict, ...] = tuple(templates)
+        self.data_by_uuid: Mapping[str, Dict] = MappingProxyType(dict(data_by_uuid))
+        self.scheduled_after = scheduled_after
+        self.scheduled_before = scheduled_before
+        self.created = time.time()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __iter__(self) -> Iterator["TaskRecord"]:
+        return iter(self.tasks)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """Return True if the snapshot holds every task scheduled between
+           start and end."""
+        return self.scheduled_after <= start and end <= self.scheduled_before
+
+    def filter(self, predicate: Callable[["TaskRecord"], bool]) -> List:
+        """Return the tasks matching the given predicate."""
+        return [task for task in self.tasks if predicate(task)]
+
+    def export_data(self) -> List[Dict]:
+        """Return the exported data of all tasks, in export order, and of
+           the templates of recurring tasks instead of their projected
+           instances."""
+        export_data = [
+            self.data_by_uuid[task.uuid] for task in self.tasks if not task.projected
+        ]
+        return export_data + list(self.templates)
+
+    def as_dict(self, task: "TaskRecord") -> Dict:
+        """Return the exported data of a task, without a JSON round trip."""
+        return copy.deepcopy(self.data_by_uuid[task["uuid"]])
+
+
+class RefreshCycle:
+    """Context manager which counts the taskwarrior exports that run during
+       a refresh cycle.
+    >>> with cycle:
+    ...     schedule.refresh()
+    >>> cycle.last_exports
+    1
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.cycles = 0
+        self.exports = 0
+        self.last_exports = 0
+        self.start_count = 0
+
+    def __enter__(self):
+        self.start_count = self.backend.export_count
+        return self
+
+    def __exit__(self, *exc_info):
+        self.last_exports = self.backend.export_count - self.start_count
+        self.exports += self.last_exports
+        self.cycles += 1
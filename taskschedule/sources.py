@@ -0,0 +1,133 @@
+"""This module provides the MergedBackend class, which reads the tasks of
+   several taskwarrior databases concurrently and merges them into one
+   stream, ordered by scheduled time."""
+
+import heapq
+import os
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from taskschedule.taskwarrior import PatchedTaskWarrior
+
+# Sorts after all dates in taskwarrior's export format, for unscheduled tasks
+UNSCHEDULED = "99999999T999999Z"
+
+
+def source_name(data_location: str) -> str:
+    """Return a short name for a data location: the name of the directory,
+       or of its parent for the default `.task` directories.
+    >>> source_name("~/clients/acme/.task")
+    'acme'
+    """
+    path = os.path.normpath(os.path.expanduser(data_location))
+    name = os.path.basename(path)
+    if name.startswith("."):
+        name = os.path.basename(os.path.dirname(path)) or name
+    return name
+
+
+def unique_source_names(data_locations: Sequence[str]) -> List[str]:
+    """Return a name for every data location, numbering duplicate names."""
+    names: List[str] = []
+    for data_location in data_locations:
+        name = source_name(data_location)
+        candidate, number = name, 2
+        while candidate in names:
+            candidate = f"{name}{number}"
+            number += 1
+        names.append(candidate)
+    return names
+
+
+def scheduled_key(data: Dict) -> str:
+    """Return the sort key of exported task data. Dates in the export
+       format sort chronologically as strings."""
+    return data.get("scheduled") or UNSCHEDULED
+
+
+def tag_source(source: str, export_data: Iterable[Dict]) -> Iterator[Dict]:
+    """Yield copies of the exported tasks tagged with the name of their
+       source, leaving the data of the export unchanged."""
+    for data in export_data:
+        yield dict(data, source=source)
+
+
+def get_owners(exports: Mapping[str, List[Dict]]) -> Dict[str, str]:
+    """Return the source of every task uuid. A task found in several
+       sources, like a database synced to several data locations, belongs to
+       the source where it was modified last, or else to the first source.
+    >>> get_owners({"a": [{"uuid": "1"}], "b": [{"uuid": "1", "modified": "2"}]})
+    {'1': 'b'}
+    """
+    owners: Dict[str, str] = {}
+    modified: Dict[str, str] = {}
+    for source, export_data in exports.items():
+        for data in export_data:
+            uuid = data["uuid"]
+            if uuid not in owners or data.get("modified", "") > modified[uuid]:
+                owners[uuid] = source
+                modified[uuid] = data.get("modified", "")
+    return owners
+
+
+def merge_exports(exports: Mapping[str, List[Dict]]) -> Iterable[Dict]:
+    """Merge the exported tasks of several sources into one stream ordered
+       by scheduled time, with a k-way merge of the sorted exports. The
+       data of each task is tagged with the name of its source, and a task
+       found in several sources is only kept once (see `get_owners`)."""
+    owners = get_owners(exports)
+    streams = [
+        tag_source(
+            source,
+            sorted(
+                (data for data in export_data if owners[data["uuid"]] == source),
+                key=scheduled_key,
+            ),
+        )
+        for source, export_data in exports.items()
+    ]
+    return heapq.merge(*streams, key=scheduled_key)
+
+
+class MergedBackend:
+    """Reads the tasks of several backends in a thread pool, so reading
+       takes as long as the slowest backend instead of all of them combined.
+       The tasks of each backend are tagged with its source name."""
+
+    def __init__(self, backends: Mapping[str, "PatchedTaskWarrior"]):
+        self.backends: Dict[str, "PatchedTaskWarrior"] = dict(backends)
+
+    @property
+    def export_count(self) -> int:
+        return sum(backend.export_count for backend in self.backends.values())
+
+    def export_data(self, filter_params: Sequence[str] = ()) -> List[Dict]:
+        """Return the export data of the tasks matching the given filter."""
+        return list(self.iter_export_data(filter_params))
+
+    def iter_export_data(self, filter_params: Sequence[str] = ()) -> Iterable[Dict]:
+        """Return the export data of all backends, ordered by scheduled time."""
+        # Importing concurrent.futures is slow, so only do it when it is used
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(self.backends)) as pool:
+            futures = {
+                source: pool.submit(backend.export_data, filter_params)
+                for source, backend in self.backends.items()
+            }
+            exports = {source: future.result() for source, future in futures.items()}
+
+        return merge_exports(exports)
+
+
+# A backend whose tasks are shown in the schedule
+Backend = Union["PatchedTaskWarrior", MergedBackend]
@@ -0,0 +1,115 @@
+"""This module provides the StatusEngine class, which classifies the tasks of
+   a schedule once per frame against a single timestamp, and knows when the
+   next task changes its status so the screen is only redrawn then."""
+
+import math
+import time
+from typing import Dict, Iterable, Optional
+
+from taskschedule.schedule import Schedule
+from taskschedule.snapshot import TaskSnapshot
+from taskschedule.task_record import TaskRecord
+
+# Statuses of a task, in the order they take precedence
+COMPLETED = "completed"
+ACTIVE = "active"
+SHOULD_BE_ACTIVE = "should_be_active"
+OVERDUE = "overdue"
+DEFAULT = "default"
+
+
+def classify(task: TaskRecord, end_ts: Optional[float], now_ts: float) -> str:
+    """Return the status of a task at now_ts, given the end of the time it
+       should be active (see `Schedule.get_task_end_ts`)."""
+    if task.completed:
+        return COMPLETED
+
+    if task.active:
+        return ACTIVE
+
+    if task.scheduled_ts is None:
+        return DEFAULT
+
+    if end_ts is not None and task.scheduled_ts < now_ts < end_ts:
+        return SHOULD_BE_ACTIVE
+
+    overdue_ts = task.end_ts if task.end_ts is not None else task.scheduled_ts
+    if now_ts > overdue_ts:
+        return OVERDUE
+
+    return DEFAULT
+
+
+def next_transition(
+    task: TaskRecord, end_ts: Optional[float], now_ts: float
+) -> Optional[float]:
+    """Return the time after which the status of a task changes next, or
+       None if it does not change with time. Completed and active tasks only
+       change when their data changes."""
+    if task.completed or task.active or task.scheduled_ts is None:
+        return None
+
+    times = (task.scheduled_ts, end_ts, task.end_ts)
+    return min((ts for ts in times if ts is not None and ts > now_ts), default=None)
+
+
+class StatusEngine:
+    """Classifies the tasks of a schedule against a timestamp captured once
+       per refresh. The statuses are kept until the snapshot of the schedule
+       changes, or the earliest upcoming transition of a task (starting,
+       ending or becoming overdue) has passed."""
+
+    def __init__(self, schedule: Schedule):
+        self.schedule = schedule
+
+        self.statuses: Dict[TaskRecord, str] = {}
+        self.now_ts: Optional[float] = None
+        self.next_transition_ts = math.inf
+        self.snapshot: Optional[TaskSnapshot] = None
+
+    def refresh(self, now_ts: Optional[float] = None):
+        """Classify all tasks of the schedule at now_ts."""
+        if now_ts is None:
+            now_ts = time.time()
+
+        self.classify_tasks(self.schedule.tasks, now_ts)
+        self.snapshot = self.schedule.snapshot
+
+    def classify_tasks(self, tasks: Iterable[TaskRecord], now_ts: float):
+        statuses: Dict[TaskRecord, str] = {}
+        next_transition_ts = math.inf
+
+        for task in tasks:
+            end_ts = self.schedule.get_task_end_ts(task)
+            statuses[task] = classify(task, end_ts, now_ts)
+
+            transition_ts = next_transition(task, end_ts, now_ts)
+            if transition_ts is not None and transition_ts < next_transition_ts:
+                next_transition_ts = transition_ts
+
+        self.statuses = statuses
+        self.now_ts = now_ts
+        self.next_transition_ts = next_transition_ts
+
+    def is_stale(self, now_ts: Optional[float] = None) -> bool:
+        """Return True if the statuses must be refreshed: the tasks changed,
+           or a task changed its status since they were classified. Returns
+           False while the schedule has not read any tasks."""
+        if self.schedule.snapshot is None:
+            return False
+
+        if self.snapshot is not self.schedule.snapshot:
+            return True
+
+        if now_ts is None:
+            now_ts = time.time()
+        return now_ts > self.next_transition_ts
+
+    def get_status(self, task: TaskRecord) -> str:
+        """Return the status of a task as of the last refresh. Tasks which
+           were not classified yet are classified at the same timestamp."""
+        status = self.statuses.get(task)
+        if status is None:
+            now_ts = self.now_ts if self.now_ts is not None else time.time()
+            status = classify(task, self.schedule.get_task_end_ts(task), now_ts)
+        return status
@@ -0,0 +1,209 @@
+"""This module provides the TaskRecord class, a compact read-only view of an
+   exported task which is used for displaying the schedule."""
+
+from datetime import datetime, time, timezone
+from typing import Dict, FrozenSet, Optional, Union
+
+from isodate import Duration
+
+from taskschedule.durations import parse_estimate_duration
+from taskschedule.scheduled_task import (
+    NOT_CACHED,
+    NotCached,
+    ScheduledTask,
+    check_notified,
+)
+
+# Fields which are returned as datetimes by __getitem__
+DATETIME_FIELDS = ("scheduled", "start", "end")
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert a date in taskwarrior's export format to a POSIX timestamp.
+    >>> parse_timestamp("20191208T090000Z")
+    1575795600.0
+    """
+    if not value:
+        return None
+
+    return datetime(
+        int(value[0:4]),
+        int(value[4:6]),
+        int(value[6:8]),
+        int(value[9:11]),
+        int(value[11:13]),
+        int(value[13:15]),
+        tzinfo=timezone.utc,
+    ).timestamp()
+
+
+def to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    """Convert a POSIX timestamp to a datetime in the local timezone."""
+    if timestamp is None:
+        return None
+
+    return datetime.fromtimestamp(timestamp).astimezone()
+
+
+def parse_estimate(estimate: Optional[str], start: datetime) -> Optional[float]:
+    """Return the number of seconds of an ISO-8601 estimate."""
+    if not estimate:
+        return None
+
+    duration = parse_estimate_duration(estimate)
+    if isinstance(duration, Duration):
+        duration = duration.totimedelta(start=start)
+
+    return duration.total_seconds()
+
+
+class TaskRecord:
+    """A read-only task, with its scheduled, estimate and end times parsed
+       into timestamps up front. Records are promoted to a full
+       ScheduledTask with `to_task` when the task needs to be modified."""
+
+    __slots__ = (
+        "backend",
+        "source",
+        "uuid",
+        "id",
+        "description",
+        "project",
+        "status",
+        "tags",
+        "priority",
+        "urgency",
+        "estimate",
+        "tb_estimate",
+        "tb_real",
+        "scheduled_ts",
+        "start_ts",
+        "end_ts",
+        "estimate_seconds",
+        "scheduled_end_ts",
+        "has_scheduled_time",
+        "projected",
+        "glyph",
+        "_scheduled_start_datetime",
+        "_scheduled_end_datetime",
+    )
+
+    def __init__(self, backend, data: Dict):
+        self.backend = backend
+        self.source: Optional[str] = data.get("source")
+        self.uuid: str = data["uuid"]
+        self.id: int = data.get("id", 0)
+        self.description: str = data.get("description", "")
+        self.project: Optional[str] = data.get("project")
+        self.status: str = data.get("status", "pending")
+        self.tags: FrozenSet[str] = frozenset(data.get("tags", ()))
+        self.priority: Optional[str] = data.get("priority")
+        self.urgency: float = data.get("urgency", 0.0)
+        self.estimate: Optional[str] = data.get("estimate")
+        self.tb_estimate: Optional[int] = data.get("tb_estimate")
+        self.tb_real: Optional[int] = data.get("tb_real")
+
+        self.scheduled_ts = parse_timestamp(data.get("scheduled"))
+        self.start_ts = parse_timestamp(data.get("start"))
+        self.end_ts = parse_timestamp(data.get("end"))
+
+        self.estimate_seconds: Optional[float] = None
+        self.scheduled_end_ts: Optional[float] = None
+        self.has_scheduled_time = False
+        if self.scheduled_ts is not None:
+            start = datetime.fromtimestamp(self.scheduled_ts)
+            self.has_scheduled_time = start.time() != time.min
+
+            self.estimate_seconds = parse_estimate(self.estimate, start)
+            if self.estimate_seconds is not None:
+                self.scheduled_end_ts = self.scheduled_ts + self.estimate_seconds
+
+        # Projected instances of recurring tasks do not exist in taskwarrior
+        self.projected: bool = data.get("projected", False)
+        self.glyph = "○"
+
+        # Converted to datetimes on first use, since rendering a task asks
+        # for them several times
+        self._scheduled_start_datetime: Union[datetime, None, NotCached] = NOT_CACHED
+        self._scheduled_end_datetime: Union[datetime, None, NotCached] = NOT_CACHED
+
+    def __getitem__(self, key: str):
+        if key in DATETIME_FIELDS:
+            return to_datetime(getattr(self, key + "_ts"))
+
+        if key in self.__slots__:
+            return getattr(self, key)
+
+        raise KeyError(f"{key} is not available on a TaskRecord, use to_task()")
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TaskRecord) and self.uuid == other.uuid
+
+    def __hash__(self) -> int:
+        return hash(self.uuid)
+
+    def __repr__(self) -> str:
+        return f"TaskRecord({self.uuid}, {self.description!r})"
+
+    @property
+    def completed(self) -> bool:
+        return self.status == "completed"
+
+    @property
+    def pending(self) -> bool:
+        return self.status == "pending"
+
+    @property
+    def active(self) -> bool:
+        return self.start_ts is not None
+
+    @property
+    def scheduled_start_datetime(self) -> Optional[datetime]:
+        """Return the task's scheduled start datetime."""
+        start = self._scheduled_start_datetime
+        if isinstance(start, NotCached):
+            start = self._scheduled_start_datetime = to_datetime(self.scheduled_ts)
+        return start
+
+    @property
+    def scheduled_end_datetime(self) -> Optional[datetime]:
+        """Return the task's scheduled end datetime."""
+        end = self._scheduled_end_datetime
+        if isinstance(end, NotCached):
+            end = self._scheduled_end_datetime = to_datetime(self.scheduled_end_ts)
+        return end
+
+    @property
+    def notified(self) -> bool:
+        return check_notified(self.uuid)
+
+    @property
+    def should_be_active(self) -> bool:
+        """Return true if the task should be active, i.e. it is between its
+           scheduled start and end. See `Schedule.should_be_active` for
+           tasks without an estimate."""
+        if self.scheduled_ts is None or self.scheduled_end_ts is None:
+            return False
+
+        now_ts = datetime.now().timestamp()
+        return self.scheduled_ts < now_ts < self.scheduled_end_ts
+
+    @property
+    def overdue(self) -> bool:
+        """If the task is overdue (current time is past end time),
+           return True. Else, return False."""
+        if self.scheduled_ts is None:
+            return False
+
+        now_ts = datetime.now().timestamp()
+        if self.end_ts is None:
+            return now_ts > self.scheduled_ts
+
+        return now_ts > self.end_ts
+
+    def to_task(self) -> ScheduledTask:
+        """Return the full task from taskwarrior, which can be modified."""
+        return self.backend.tasks.get(uuid=self.uuid)
+
+    def as_dict(self) -> Dict:
+        return self.to_task().as_dict()
@@ -0,0 +1,150 @@
+"""This module provides a native parser for taskwarrior's configuration
+   file, so the configuration can be read without running `task show`."""
+
+import os
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Directories searched for relative includes, like themes, after the
+# directory of the including file
+INCLUDE_DIRECTORIES = (
+    "/usr/share/taskwarrior",
+    "/usr/local/share/doc/task/rc",
+    "/usr/share/doc/task/rc",
+)
+
+# Parsed configurations, by taskrc path and overrides
+_cache: Dict[Tuple, "Taskrc"] = {}
+
+
+class TaskrcParseError(Exception):
+    """Raised when a line of a taskrc can not be parsed."""
+
+    # pylint: disable=unnecessary-pass
+    pass
+
+
+class Taskrc:
+    """The settings of a taskrc and the files it includes. Overrides, with
+       or without an `rc.` prefix, take precedence over the files."""
+
+    def __init__(self, path: str, overrides: Optional[Mapping[str, str]] = None):
+        self.path = os.path.expanduser(path)
+        self.overrides = dict(overrides or {})
+
+        values: Dict[str, str] = {}
+        self.files: List[str] = []
+        self.read_file(self.path, values)
+
+        for key, value in self.overrides.items():
+            if key.startswith("rc."):
+                key = key[3:]
+            values[key] = value
+
+        self.values: Mapping[str, str] = MappingProxyType(values)
+        self.stamp = self.get_stamp()
+
+    def read_file(self, path: str, values: Dict[str, str]):
+        """Read the settings of a file into values, following includes."""
+        if path in self.files:
+            return
+        self.files.append(path)
+
+        try:
+            with open(path, encoding="utf-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            # Missing files are part of the stamp, so they are picked up
+            # once they are created
+            return
+
+        for number, line in enumerate(lines, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+
+            if line.startswith("include "):
+                include = line[len("include ") :].strip()
+                self.read_file(self.find_include(include, path), values)
+                continue
+
+            if "=" not in line:
+                raise TaskrcParseError(f"{path}:{number}: expected key=value")
+
+            key, value = line.split("=", 1)
+            values[key.strip()] = value.strip()
+
+    @staticmethod
+    def find_include(include: str, parent: str) -> str:
+        """Return the path of an included file."""
+        include = os.path.expanduser(include)
+        if os.path.isabs(include):
+            return include
+
+        local_path = os.path.join(os.path.dirname(parent), include)
+        if os.path.exists(local_path):
+            return local_path
+
+        for directory in INCLUDE_DIRECTORIES:
+            path = os.path.join(directory, include)
+            if os.path.exists(path):
+                return path
+
+        return local_path
+
+    def get_stamp(self) -> Tuple[Optional[float], ...]:
+        """Return the modification times of the taskrc and its includes."""
+        stamp: List[Optional[float]] = []
+        for path in self.files:
+            try:
+                stamp.append(os.stat(path).st_mtime)
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    @property
+    def modified(self) -> bool:
+        """Return True if any of the files changed since they were read."""
+        return self.get_stamp() != self.stamp
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(key, default)
+
+    def __getitem__(self, key: str) -> str:
+        return self.values[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
+
+    def get_udas(self) -> Dict[str, Dict[str, str]]:
+        """Return the settings of the user defined attributes by name.
+        >>> taskrc.get_udas()
+        {'estimate': {'type': 'duration', 'label': 'Est'}}
+        """
+        udas: Dict[str, Dict[str, str]] = {}
+        for key, value in self.values.items():
+            if key.startswith("uda.") and key.count(".") >= 2:
+                _, name, setting = key.split(".", 2)
+                udas.setdefault(name, {})[setting] = value
+        return udas
+
+    def get_uda_types(self) -> Dict[str, str]:
+        """Return the types of the user defined attributes by name."""
+        return {
+            name: settings["type"]
+            for name, settings in self.get_udas().items()
+            if "type" in settings
+        }
+
+
+def load_taskrc(path: str, overrides: Optional[Mapping[str, str]] = None) -> Taskrc:
+    """Return the parsed taskrc. It is only read again when the taskrc or
+       one of its includes has been modified since it was last read."""
+    key = (os.path.expanduser(path), tuple(sorted((overrides or {}).items())))
+
+    taskrc = _cache.get(key)
+    if taskrc is None or taskrc.modified:
+        taskrc = Taskrc(path, overrides)
+        _cache[key] = taskrc
+
+    return taskrc
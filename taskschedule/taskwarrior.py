@@ -1,30 +1,225 @@
 import json
+import os
+import subprocess
+import tempfile
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from tasklib import TaskWarrior
 from tasklib.backends import TaskWarriorException
+from tasklib.task import ReadOnlyDictView
 
+from taskschedule.datafile import DEFAULT_UDA_TYPES, DataFileReader, TaskFilter
 from taskschedule.scheduled_task import ScheduledTask, ScheduledTaskQuerySet
+from taskschedule.taskrc import Taskrc
+
+
+def parse_export_line(raw_line: bytes) -> Optional[Dict]:
+    """Parse one line of `task export` output. Return None for lines
+       without a task, like the brackets around the exported array."""
+    line = raw_line.decode("utf-8").strip().strip(",")
+    if not line or line in ("[", "]"):
+        return None
+
+    try:
+        return json.loads(line)
+    except ValueError:
+        raise TaskWarriorException("Invalid JSON: %s" % line)
 
 
 class PatchedTaskWarrior(TaskWarrior):
     """A patched version of TaskWarrior which returns a custom queryset with a custom
-       Task class to provide extra functionality."""
+       Task class to provide extra functionality.
+
+       If a parsed `taskrc` is given, it is used as the config and for the
+       types of the UDAs, instead of running `task show`.
 
-    def __init__(self, *args, **kwargs):
+       If `native` is True, unfiltered querysets are read directly from the
+       data files and filtered with `range_filter` instead of running
+       `task export`.
+
+       Recurrence is enforced at most once every `recurrence_interval`
+       seconds, or when the day changes, and only if the data files changed
+       since the export which last enforced it."""
+
+    def __init__(
+        self,
+        *args,
+        native: bool = False,
+        taskrc: Optional[Taskrc] = None,
+        range_filter: Optional[TaskFilter] = None,
+        recurrence_interval: int = 300,
+        **kwargs,
+    ):
         super(PatchedTaskWarrior, self).__init__(*args, **kwargs)
         self.tasks = ScheduledTaskQuerySet(self)
 
+        self.native = native
+        self.range_filter = range_filter
+        uda_types = dict(DEFAULT_UDA_TYPES)
+        self.taskrc_config: Optional[ReadOnlyDictView] = None
+        if taskrc is not None:
+            # Use the parsed taskrc instead of running `task show`
+            self.taskrc_config = ReadOnlyDictView(dict(taskrc.values))
+            self._config = self.taskrc_config
+            uda_types.update(taskrc.get_uda_types())
+
+        self.reader = DataFileReader(
+            self.overrides.get("data.location", "~/.task"), uda_types
+        )
+
+        # Number of times the task data has been read
+        self.export_count = 0
+
+        self.recurrence_interval = recurrence_interval
+        self.recurrence_last_run: Optional[float] = None
+        self.recurrence_last_date: Optional[date] = None
+        self.recurrence_stamp: Optional[Tuple] = None
+        self.recurrence_pending = False
+        self.recurrence_runs = 0
+        self.recurrence_skips = 0
+
+    @property
+    def config(self):
+        # tasklib runs `task show` while its config is empty, so the config
+        # of a parsed taskrc without any settings is returned here
+        if self.taskrc_config is not None:
+            return self.taskrc_config
+        return super(PatchedTaskWarrior, self).config
+
+    def get_data_stamp(self) -> Tuple[Optional[Tuple[float, int]], ...]:
+        """Return the modification times and sizes of the data files."""
+        stamp: List[Optional[Tuple[float, int]]] = []
+        for filename in self.reader.filenames:
+            try:
+                stat = os.stat(os.path.join(self.reader.data_location, filename))
+                stamp.append((stat.st_mtime, stat.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def recurrence_due(self) -> bool:
+        """Return True if recurrence should be enforced: on the first export,
+           when the day changed, or when the interval has passed and the data
+           files have changed since the last run."""
+        if self.recurrence_last_run is None:
+            return True
+
+        if date.today() != self.recurrence_last_date:
+            return True
+
+        if time.time() < self.recurrence_last_run + self.recurrence_interval:
+            return False
+
+        return self.get_data_stamp() != self.recurrence_stamp
+
+    def enforce_recurrence(self) -> bool:
+        """Generate the instances of recurring tasks if recurrence is due.
+           Return True if recurrence was enforced, False if it was skipped."""
+        if not self.recurrence_due():
+            self.recurrence_skips += 1
+            return False
+
+        super(PatchedTaskWarrior, self).enforce_recurrence()
+
+        self.recurrence_last_run = time.time()
+        self.recurrence_last_date = date.today()
+        self.recurrence_stamp = None
+        self.recurrence_pending = True
+        self.recurrence_runs += 1
+        return True
+
+    def finish_recurrence(self):
+        """Take the stamp of the data files after an export has finished.
+           Taskwarrior 2.4.2+ generates the recurring instances during the
+           export which enforced recurrence, so a stamp taken before it
+           would always differ."""
+        if self.recurrence_pending:
+            self.recurrence_stamp = self.get_data_stamp()
+            self.recurrence_pending = False
+
+    def get_export_command(
+        self, filter_params: Sequence[str] = ()
+    ) -> Tuple[List[str], Dict[str, str]]:
+        """Return the command line and environment for exporting the tasks
+           matching the given filter. Enforces recurrence if it is due."""
+        config_override = {}
+        if not self.enforce_recurrence():
+            # Taskwarrior 2.4.2+ generates recurring tasks on every command,
+            # so also keep the export itself from doing so
+            config_override["recurrence"] = "off"
+
+        command_args = self._get_command_args(
+            ["export"] + list(filter_params), config_override=config_override
+        )
+
+        env = os.environ.copy()
+        if self.taskrc_location:
+            env["TASKRC"] = self.taskrc_location
+
+        return command_args, env
+
+    def export_data(self, filter_params: Sequence[str] = ()) -> List[Dict]:
+        """Return the export data of the tasks matching the given filter."""
+        return list(self.iter_export_data(filter_params))
+
+    def iter_export_data(self, filter_params: Sequence[str] = ()) -> Iterator[Dict]:
+        """Yield the export data of the tasks matching the given filter as
+           soon as each task has been read, instead of waiting for the
+           whole export to finish."""
+        self.export_count += 1
+        if self.native and not filter_params:
+            yield from self.reader.iter_data(self.range_filter)
+            return
+
+        command_args, env = self.get_export_command(filter_params)
+
+        # stderr goes to a file, since a full stderr pipe would block task
+        # while stdout is being read
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                command_args, stdout=subprocess.PIPE, stderr=stderr, env=env
+            )
+            stdout = process.stdout
+            assert stdout is not None
+            try:
+                for raw_line in stdout:
+                    data = parse_export_line(raw_line)
+                    if data is not None:
+                        yield data
+
+                if process.wait():
+                    stderr.seek(0)
+                    raise TaskWarriorException(
+                        stderr.read().decode("utf-8").strip()
+                        + "\nCommand used: "
+                        + " ".join(command_args)
+                    )
+                self.finish_recurrence()
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                stdout.close()
+
+    def import_data(self, export_data: Sequence[Dict]):
+        """Import tasks in taskwarrior's export format with a single
+           `task import`. Existing tasks are updated by their uuid."""
+        if not export_data:
+            return
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json", encoding="utf-8") as file:
+            json.dump(list(export_data), file)
+            file.flush()
+            self.execute_command(["import", file.name])
+
+    def iter_tasks(self, filter_obj) -> Iterator[ScheduledTask]:
+        """Yield the tasks matching the given filter one at a time."""
+        for data in self.iter_export_data(filter_obj.get_filter_params()):
+            task = ScheduledTask(self)
+            task._load_data(data)
+            yield task
+
     def filter_tasks(self, filter_obj):
-        self.enforce_recurrence()
-        args = ["export"] + filter_obj.get_filter_params()
-        tasks = []
-        for line in self.execute_command(args):
-            if line:
-                data = line.strip(",")
-                try:
-                    filtered_task = ScheduledTask(self)
-                    filtered_task._load_data(json.loads(data))
-                    tasks.append(filtered_task)
-                except ValueError:
-                    raise TaskWarriorException("Invalid JSON: %s" % data)
-        return tasks
+        return list(self.iter_tasks(filter_obj))
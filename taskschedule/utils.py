@@ -1,12 +1,32 @@
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 
-from taskschedule.scheduled_task import ScheduledTask
-from taskschedule.taskwarrior import PatchedTaskWarrior
+from taskschedule.dates import evaluate_date
 
 
 def calculate_datetime(date_str: str) -> datetime:
+    """Convert a date-like string to a datetime object. Common expressions
+       are evaluated natively; others fall back to the `task calc` command.
+       Results are cached for the rest of the day, except for expressions
+       relative to the current time."""
+    if "now" in date_str:
+        return evaluate_date(date_str) or calculate_datetime_with_task(date_str)
+
+    return cached_datetime(date_str, date.today())
+
+
+@lru_cache(maxsize=256)
+def cached_datetime(date_str: str, today: date) -> datetime:
+    """Memoized by the day, since most expressions are relative to today."""
+    return evaluate_date(date_str) or calculate_datetime_with_task(date_str)
+
+
+def calculate_datetime_with_task(date_str: str) -> datetime:
     """Leverage the `task calc` command to convert a date-like string
        to a datetime object."""
+    # tasklib is slow to import, and not needed for the common expressions
+    from taskschedule.scheduled_task import ScheduledTask
+    from taskschedule.taskwarrior import PatchedTaskWarrior
 
     tw = PatchedTaskWarrior()
     task = ScheduledTask(tw, description="dummy")
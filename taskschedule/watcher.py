@@ -0,0 +1,195 @@
+"""This module provides watchers which report changes to the taskwarrior
+   data files. On Linux, inotify is used through ctypes; elsewhere, the
+   files are polled with os.stat."""
+
+import abc
+import os
+import struct
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+# Files written by taskwarrior when tasks are added, modified or undone
+WATCHED_FILES = ("pending.data", "completed.data", "undo.data")
+
+# Flags and events from <sys/inotify.h>
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[]
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher(abc.ABC):
+    """Base class of the data file watchers.
+
+       `poll` reports a change once no further changes have been seen for
+       `debounce` seconds, so a burst of writes, like a `task import` of many
+       tasks, results in a single reload. While the files keep changing, a
+       change is still reported every `max_delay` seconds."""
+
+    def __init__(
+        self,
+        data_location: str,
+        filenames: Sequence[str] = WATCHED_FILES,
+        debounce: float = 0.25,
+        max_delay: float = 2.0,
+    ):
+        self.data_location = os.path.expanduser(data_location)
+        self.filenames = tuple(filenames)
+        self.debounce = debounce
+        self.max_delay = max_delay
+
+        self.first_change: Optional[float] = None
+        self.last_change: Optional[float] = None
+
+        # Number of changes reported by poll
+        self.reloads = 0
+
+    @abc.abstractmethod
+    def read_changes(self) -> bool:
+        """Return True if a watched file changed since the last call."""
+
+    def fileno(self) -> Optional[int]:
+        """Return the file descriptor which becomes readable when a watched
+           file changes, or None if the files must be polled."""
+        return None
+
+    def poll(self, now: Optional[float] = None) -> bool:
+        """Return True if the data files changed and the burst of changes
+           is over, so the tasks should be reloaded."""
+        if now is None:
+            now = time.monotonic()
+
+        if self.read_changes():
+            if self.first_change is None:
+                self.first_change = now
+            self.last_change = now
+
+        if self.first_change is None or self.last_change is None:
+            return False
+
+        if (
+            now - self.last_change < self.debounce
+            and now - self.first_change < self.max_delay
+        ):
+            return False
+
+        self.first_change = None
+        self.last_change = None
+        self.reloads += 1
+        return True
+
+    def close(self):
+        """Release the resources of the watcher."""
+
+
+class PollingWatcher(FileWatcher):
+    """Detects changes by comparing the modification times and sizes of the
+       data files."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stamp = self.get_stamp()
+
+    def get_stamp(self) -> Tuple[Optional[Tuple[float, int]], ...]:
+        stamp: List[Optional[Tuple[float, int]]] = []
+        for filename in self.filenames:
+            try:
+                stat = os.stat(os.path.join(self.data_location, filename))
+                stamp.append((stat.st_mtime, stat.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def read_changes(self) -> bool:
+        stamp = self.get_stamp()
+        if stamp == self.stamp:
+            return False
+
+        self.stamp = stamp
+        return True
+
+
+class InotifyWatcher(FileWatcher):
+    """Detects changes with an inotify watch on the data directory. Reading
+       the events does not block, and costs a single system call when
+       nothing changed. Raises OSError if inotify is not available."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fd: Optional[int] = None
+
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        # ctypes is slow to import, so only do it when inotify is used
+        import ctypes
+        import ctypes.util
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError) as err:
+            raise OSError(f"inotify is not available: {err}")
+
+        fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        path = os.fsencode(self.data_location)
+        if inotify_add_watch(fd, path, WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, os.strerror(errno), self.data_location)
+
+        self.fd = fd
+        self.names = {os.fsencode(filename) for filename in self.filenames}
+
+    def fileno(self) -> Optional[int]:
+        return self.fd
+
+    def read_changes(self) -> bool:
+        if self.fd is None:
+            return False
+
+        changed = False
+        while True:
+            try:
+                buffer = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return changed
+
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                # Events were dropped, so assume the files changed
+                if mask & IN_Q_OVERFLOW or name in self.names:
+                    changed = True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def create_watcher(data_location: str, **kwargs) -> FileWatcher:
+    """Return an inotify watcher if available, otherwise a polling one."""
+    try:
+        return InotifyWatcher(data_location, **kwargs)
+    except OSError:
+        return PollingWatcher(data_location, **kwargs)
@@ -2,18 +2,18 @@ from __future__ import annotations
 
 import os
 import shutil
-from typing import TYPE_CHECKING
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
 
 import pytest
 
-from taskschedule.schedule import Schedule, ScheduledTask
+from taskschedule.schedule import Schedule
+from taskschedule.scheduled_task import ScheduledTask
 from taskschedule.screen import Screen
+from taskschedule.task_record import TaskRecord
 from taskschedule.taskwarrior import PatchedTaskWarrior
 from taskschedule.utils import calculate_datetime
 
-if TYPE_CHECKING:
-    from datetime import datetime
-
 
 @pytest.fixture(scope="module")
 def tw():
@@ -97,3 +97,64 @@ def schedule(tw):
 def screen(tw, schedule):
     screen = Screen(schedule, schedule.scheduled_after, schedule.scheduled_before)
     yield screen
+
+
+@pytest.fixture
+def task_data() -> Callable[..., Dict]:
+    """Return a factory of task data in taskwarrior's export format, for
+       tests which do not run taskwarrior. A numeric uuid is also used as the
+       ID of the task."""
+
+    def make_task_data(
+        uuid: str,
+        scheduled: Optional[str] = None,
+        modified: str = "20191208T000000Z",
+        **kwargs,
+    ) -> Dict:
+        data = {
+            "id": int(uuid) if uuid.isdigit() else 0,
+            "uuid": uuid,
+            "description": f"task {uuid}",
+            "status": "pending",
+            "modified": modified,
+        }
+        if scheduled is not None:
+            data["scheduled"] = scheduled
+        data.update(kwargs)
+        return data
+
+    return make_task_data
+
+
+@pytest.fixture
+def task_record(task_data) -> Callable[..., TaskRecord]:
+    """Return a factory of task records without a backend, taking the same
+       arguments as `task_data`."""
+
+    def make_task_record(*args, **kwargs) -> TaskRecord:
+        return TaskRecord(None, task_data(*args, **kwargs))
+
+    return make_task_record
+
+
+@pytest.fixture
+def make_schedule() -> Callable[..., Schedule]:
+    """Return a factory of schedules without a backend, which are filled
+       with `Schedule.apply`. Keyword arguments are passed to the Schedule,
+       which shows 7 until 10 December 2019 by default."""
+
+    def make(**kwargs) -> Schedule:
+        kwargs.setdefault("backend", None)
+        kwargs.setdefault("scheduled_after", datetime(2019, 12, 7, tzinfo=timezone.utc))
+        kwargs.setdefault(
+            "scheduled_before", datetime(2019, 12, 10, tzinfo=timezone.utc)
+        )
+        return Schedule(**kwargs)
+
+    return make
+
+
+@pytest.fixture
+def offline_schedule(make_schedule) -> Schedule:
+    """Create an empty Schedule without a backend."""
+    return make_schedule()
@@ -0,0 +1,83 @@
+import os
+import stat
+import time
+
+import pytest
+from tasklib.backends import TaskWarriorException
+
+from taskschedule.async_backend import AsyncExporter
+from tests.test_taskwarrior import EXPORT, make_backend
+
+
+def slow_task_command(tmp_path) -> str:
+    """Create a script that prints the export, or only sleeps while a file
+       named `slow` exists."""
+    (tmp_path / "export.json").write_text(EXPORT)
+    script = tmp_path / "task"
+    script.write_text(
+        "#!/bin/sh\n"
+        f"if [ -f {tmp_path / 'slow'} ]; then exec sleep 10; fi\n"
+        f"cat {tmp_path / 'export.json'}\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Requires a POSIX shell")
+class TestAsyncExporter:
+    def test_poll_returns_data_once(self, tmp_path):
+        exporter = AsyncExporter(make_backend(tmp_path, EXPORT))
+        try:
+            exporter.request()
+            data = exporter.wait()
+            assert [task["id"] for task in data] == [1, 2]
+            assert exporter.poll() is None
+            assert exporter.backend.export_count == 1
+        finally:
+            exporter.close()
+
+    def test_poll_does_not_block(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+        backend.task_command = slow_task_command(tmp_path)
+        (tmp_path / "slow").write_text("")
+
+        exporter = AsyncExporter(backend)
+        try:
+            exporter.request()
+            start = time.time()
+            assert exporter.poll() is None
+            assert exporter.busy
+            assert time.time() - start < 1
+        finally:
+            exporter.close()
+
+    def test_new_request_cancels_running_export(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+        backend.task_command = slow_task_command(tmp_path)
+        (tmp_path / "slow").write_text("")
+
+        exporter = AsyncExporter(backend)
+        try:
+            exporter.request()
+            for _ in range(10):
+                exporter.pump()
+
+            (tmp_path / "slow").unlink()
+            start = time.time()
+            exporter.request()
+            data = exporter.wait()
+
+            assert len(data) == 2
+            assert exporter.cancelled == 1
+            assert time.time() - start < 5
+        finally:
+            exporter.close()
+
+    def test_poll_raises_export_errors(self, tmp_path):
+        exporter = AsyncExporter(make_backend(tmp_path, "", exit_code=2))
+        try:
+            exporter.request()
+            with pytest.raises(TaskWarriorException):
+                exporter.wait()
+        finally:
+            exporter.close()
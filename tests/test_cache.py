@@ -0,0 +1,76 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from taskschedule.cache import SnapshotCache
+
+DATA = {
+    "id": 1,
+    "uuid": "9c7c2fe6-0000-4000-8000-000000000001",
+    "description": "Buy cat food",
+    "scheduled": "20191208T090000Z",
+    "status": "pending",
+}
+
+AFTER = datetime(2019, 12, 8, tzinfo=timezone.utc)
+BEFORE = datetime(2019, 12, 9, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    data_location = tmp_path / "data"
+    data_location.mkdir()
+    (data_location / "pending.data").write_text("")
+    (tmp_path / "taskrc").write_text("")
+
+    return SnapshotCache(
+        str(tmp_path / "cache"),
+        [str(data_location)],
+        [str(tmp_path / "taskrc")],
+        {"from": "today", "to": "tomorrow"},
+    )
+
+
+def test_load_without_entry(cache):
+    assert cache.load() is None
+
+
+def test_save_and_load(cache):
+    cache.save(cache.get_key(), AFTER, BEFORE, [DATA])
+
+    entry = cache.load()
+    assert entry["tasks"] == [DATA]
+    assert entry["scheduled_after"] == AFTER
+    assert entry["scheduled_before"] == BEFORE
+
+
+def test_changed_data_file_invalidates_entry(cache):
+    cache.save(cache.get_key(), AFTER, BEFORE, [DATA])
+
+    with open(cache.files[0], "a") as file:
+        file.write("\n")
+    assert cache.load() is None
+
+
+def test_entry_of_other_day_is_invalid(cache):
+    cache.save(cache.get_key(), AFTER, BEFORE, [DATA])
+
+    with open(cache.path) as file:
+        content = file.read()
+    today = datetime.now().date().isoformat()
+    with open(cache.path, "w") as file:
+        file.write(content.replace(today, "2019-12-08"))
+    assert cache.load() is None
+
+
+def test_arguments_select_entry(cache):
+    cache.save(cache.get_key(), AFTER, BEFORE, [DATA])
+
+    other = SnapshotCache(
+        os.path.dirname(cache.path),
+        [os.path.dirname(cache.files[0])],
+        [cache.files[2]],
+        {"from": "today", "to": "eow"},
+    )
+    assert other.load() is None
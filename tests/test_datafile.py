@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from taskschedule.datafile import (
+    DataFileParseError,
+    DataFileReader,
+    RangeFilter,
+    format_duration,
+    parse_line,
+)
+
+PENDING_DATA = (
+    '[description:"Buy &open;cat&close; food" entry:"1575763200" '
+    'modified:"1575763200" scheduled:"1575792000" estimate:"PT20M" '
+    'status:"pending" tags:"home,errand" tb_estimate:"2" '
+    'uuid:"9c7c2fe6-0000-4000-8000-000000000001"]\n'
+    '[description:"Deleted" entry:"1575763200" scheduled:"1575792000" '
+    'status:"deleted" uuid:"9c7c2fe6-0000-4000-8000-000000000002"]\n'
+    '[annotation_1575763300:"Note \\"quoted\\"" description:"Unscheduled" '
+    'entry:"1575763200" status:"pending" '
+    'uuid:"9c7c2fe6-0000-4000-8000-000000000003"]\n'
+)
+
+COMPLETED_DATA = (
+    '[description:"Done" end:"1575795600" entry:"1575763200" '
+    'scheduled:"1575788400" status:"completed" '
+    'uuid:"9c7c2fe6-0000-4000-8000-000000000004"]\n'
+)
+
+
+@pytest.fixture
+def data_location(tmp_path):
+    (tmp_path / "pending.data").write_text(PENDING_DATA)
+    (tmp_path / "completed.data").write_text(COMPLETED_DATA)
+    return str(tmp_path)
+
+
+class TestDataFile:
+    def test_parse_line_decodes_values(self):
+        attributes = parse_line(PENDING_DATA.splitlines()[0])
+        assert attributes["description"] == "Buy [cat] food"
+        assert attributes["tags"] == "home,errand"
+
+    def test_parse_line_raises_on_invalid_line(self):
+        with pytest.raises(DataFileParseError):
+            parse_line('description:"Not a task"')
+
+    def test_format_duration(self):
+        assert format_duration(0) == "PT0S"
+        assert format_duration(1200) == "PT20M"
+        assert format_duration(4260) == "PT1H11M"
+        assert format_duration(90000) == "P1DT1H"
+
+    def test_reader_returns_export_data(self, data_location):
+        tasks = DataFileReader(data_location).read()
+        assert [task["id"] for task in tasks] == [1, 0, 2, 0]
+
+        task = tasks[0]
+        assert task["scheduled"] == "20191208T080000Z"
+        assert task["tags"] == ["home", "errand"]
+        assert task["tb_estimate"] == 2
+        assert task["estimate"] == "PT20M"
+
+        annotation = tasks[2]["annotations"][0]
+        assert annotation["description"] == 'Note "quoted"'
+        assert annotation["entry"] == "20191208T000140Z"
+
+    def test_reader_applies_range_filter(self, data_location):
+        range_filter = RangeFilter(
+            datetime(2019, 12, 8, tzinfo=timezone.utc),
+            datetime(2019, 12, 9, tzinfo=timezone.utc),
+        )
+        tasks = DataFileReader(data_location).read(range_filter)
+        assert [task["description"] for task in tasks] == ["Buy [cat] food", "Done"]
+
+        range_filter.excluded_statuses += ("completed",)
+        tasks = DataFileReader(data_location).read(range_filter)
+        assert [task["description"] for task in tasks] == ["Buy [cat] food"]
+
+    def test_reader_ignores_missing_files(self, tmp_path):
+        assert DataFileReader(str(tmp_path)).read() == []
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from taskschedule.dates import evaluate_date
+
+# A Sunday afternoon
+NOW = datetime(2019, 12, 8, 15, 30).astimezone()
+
+
+def local(*args) -> datetime:
+    return datetime(*args).astimezone()
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("now", NOW),
+        ("today", local(2019, 12, 8)),
+        ("sod", local(2019, 12, 8)),
+        ("eod", local(2019, 12, 9)),
+        ("yesterday", local(2019, 12, 7)),
+        ("tomorrow", local(2019, 12, 9)),
+        ("monday", local(2019, 12, 9)),
+        ("sun", local(2019, 12, 15)),
+        ("2000-01-01", local(2000, 1, 1)),
+        ("2019-12-08T09:30", local(2019, 12, 8, 9, 30)),
+        ("20191208T090000Z", datetime(2019, 12, 8, 9, tzinfo=timezone.utc)),
+        ("today-1s", local(2019, 12, 7, 23, 59, 59)),
+        ("tomorrow-3days", local(2019, 12, 6)),
+        ("today+1d-1h", local(2019, 12, 8, 23)),
+        ("Today+2weeks", local(2019, 12, 22)),
+    ],
+)
+def test_evaluate_date(expression, expected):
+    assert evaluate_date(expression, now=NOW) == expected
+
+
+@pytest.mark.parametrize(
+    "expression", ["later", "today+1mo", "eom", "2019-13-01", "today+", ""]
+)
+def test_evaluate_date_unsupported(expression):
+    assert evaluate_date(expression, now=NOW) is None
+
+
+@pytest.mark.parametrize("expression", ["today", "sod", "eod", "tomorrow", "monday"])
+def test_evaluate_date_matches_task_calc(tw, expression):
+    # `task calc` is the reference for the meaning of the synonyms, like eod
+    # being the start of the next day rather than 23:59:59
+    assert evaluate_date(expression) == tw.convert_datetime_string(expression)
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from isodate import Duration
+
+from taskschedule.durations import parse_estimate_duration
+
+
+def test_parse_estimate_duration_is_memoized():
+    parse_estimate_duration.cache_clear()
+
+    assert parse_estimate_duration("PT1H30M") == timedelta(minutes=90)
+    assert parse_estimate_duration("PT1H30M") is parse_estimate_duration("PT1H30M")
+    assert isinstance(parse_estimate_duration("P1M"), Duration)
+
+    info = parse_estimate_duration.cache_info()
+    assert info.hits == 2
+    assert info.misses == 2
@@ -0,0 +1,66 @@
+import pytest
+
+from taskschedule.indexes import TaskIndex, ViewFilter, cycle, iter_project_ancestors
+
+
+@pytest.fixture
+def tasks(task_record):
+    return [
+        task_record("1", project="work", tags=["call"]),
+        task_record("2", project="work.client", tags=["call", "urgent"]),
+        task_record("3", project="home", tags=["urgent"]),
+        task_record("4", status="completed", project="work.client"),
+        task_record("5"),
+    ]
+
+
+def uuids(selection):
+    return sorted(task.uuid for task in selection)
+
+
+def test_iter_project_ancestors():
+    assert list(iter_project_ancestors("a.b.c")) == ["a", "a.b", "a.b.c"]
+
+
+def test_cycle():
+    assert cycle(["a", "b"], None) == "a"
+    assert cycle(["a", "b"], "a") == "b"
+    assert cycle(["a", "b"], "b") is None
+    assert cycle(["a", "b"], "gone") == "a"
+    assert cycle([], None) is None
+
+
+def test_project_matches_subprojects(tasks):
+    index = TaskIndex(tasks)
+    assert uuids(index.select(ViewFilter(project="work"))) == ["1", "2", "4"]
+    assert uuids(index.select(ViewFilter(project="work.client"))) == ["2", "4"]
+    assert uuids(index.select(ViewFilter(project="wor"))) == []
+
+
+def test_select_intersects_criteria(tasks):
+    index = TaskIndex(tasks)
+    assert uuids(index.select(ViewFilter(tags=["call", "urgent"]))) == ["2"]
+    assert uuids(index.select(ViewFilter("work.client", status="pending"))) == ["2"]
+    assert uuids(index.select(ViewFilter(tags=["missing"]))) == []
+
+
+def test_empty_filter_selects_everything(tasks):
+    assert TaskIndex(tasks).select(ViewFilter()) is None
+
+
+def test_get_values(tasks):
+    index = TaskIndex(tasks)
+    assert index.get_values("project") == ["home", "work", "work.client"]
+    assert index.get_values("tag") == ["call", "urgent"]
+    assert index.get_values("status") == ["completed", "pending"]
+
+
+def test_view_filter_replace_and_str():
+    view_filter = ViewFilter("work", ["b", "a"]).replace("status", "pending")
+    assert str(view_filter) == "project:work +a +b status:pending"
+    assert view_filter.replace("tag", "c").tags == frozenset(["c"])
+    assert view_filter.replace("project", None) == ViewFilter(
+        tags=["a", "b"], status="pending"
+    )
+    with pytest.raises(ValueError):
+        view_filter.replace("priority", "H")
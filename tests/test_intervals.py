@@ -0,0 +1,71 @@
+import random
+
+from taskschedule.intervals import IntervalIndex, StartIndex
+
+
+def make_index():
+    return IntervalIndex(
+        [(9, 10, "a"), (9.5, 11, "b"), (12, 13, "c"), (13, 14, "d"), (8, 20, "e")]
+    )
+
+
+def test_overlapping():
+    index = make_index()
+    assert index.overlapping(10, 12) == ["e", "b"]
+    assert index.overlapping(13, 13.5) == ["e", "d"]
+    assert index.overlapping(20, 21) == []
+
+
+def test_at():
+    index = make_index()
+    assert index.at(9.5) == ["e", "a", "b"]
+    assert index.at(13) == ["e", "d"]
+    assert index.at(7) == []
+
+
+def test_overlapping_pairs():
+    index = make_index()
+    assert set(index.overlapping_pairs()) == {
+        ("e", "a"),
+        ("e", "b"),
+        ("a", "b"),
+        ("e", "c"),
+        ("e", "d"),
+    }
+
+
+def test_matches_brute_force():
+    rng = random.Random(42)
+    intervals = []
+    for item in range(300):
+        start = rng.uniform(0, 1000)
+        intervals.append((start, start + rng.uniform(0, 30), item))
+    index = IntervalIndex(intervals)
+
+    for _ in range(100):
+        start = rng.uniform(0, 1000)
+        end = start + rng.uniform(0, 50)
+        expected = {item for s, e, item in intervals if s < end and e > start}
+        assert set(index.overlapping(start, end)) == expected
+
+        expected = {item for s, e, item in intervals if s <= start < e}
+        assert set(index.at(start)) == expected
+
+    expected_pairs = {
+        frozenset((a[2], b[2]))
+        for i, a in enumerate(intervals)
+        for b in intervals[i + 1 :]
+        if a[0] < b[1] and b[0] < a[1]
+    }
+    pairs = {frozenset(pair) for pair in index.overlapping_pairs()}
+    assert pairs == expected_pairs
+
+
+def test_start_index():
+    index = StartIndex([(12, "c"), (9, "a"), (10, "b")])
+    assert index.next_after(9) == "b"
+    assert index.next_after(12) is None
+    assert index.previous_before(10) == "a"
+    assert index.previous_before(9) is None
+    assert index.last_started(10) == "b"
+    assert index.last_started(8) is None
@@ -0,0 +1,45 @@
+import pytest
+
+from taskschedule.layout import DEFAULT_COLUMNS, Column, ColumnLayout
+
+MAX_LENGTHS = {"id": 2, "project": 20, "description": 30, "urgency": 4}
+
+
+def max_length(key: str) -> int:
+    return MAX_LENGTHS[key]
+
+
+def test_layout_offsets():
+    layout = ColumnLayout(DEFAULT_COLUMNS, max_length, 2)
+    assert layout.get_offsets() == [0, 5, 8, 20, 30, 51]
+    assert layout.offsets["glyph"] == 3
+    assert layout.get_cell_width("project") == 20
+    assert layout.get_cell_width("description") == 30
+
+
+def test_layout_limits_column_to_screen_fraction():
+    layout = ColumnLayout(DEFAULT_COLUMNS, max_length, 2, max_x=80)
+    assert layout.widths["project"] == 10
+    assert layout.get_cell_width("description") == 80 - 40
+
+
+def test_layout_hidden_and_extra_columns():
+    columns = DEFAULT_COLUMNS[:-1] + (
+        Column("urgency", "Urg", key="urgency"),
+        DEFAULT_COLUMNS[-1],
+    )
+    layout = ColumnLayout(columns, max_length, 5, hidden=("project",))
+    assert [column.name for column in layout.columns] == [
+        "id",
+        "time",
+        "timeboxes",
+        "urgency",
+        "description",
+    ]
+    assert layout.offsets["urgency"] == 33
+    assert layout.offsets["description"] == 38
+
+
+def test_column_needs_width_or_key():
+    with pytest.raises(ValueError):
+        Column("empty", "Empty")
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import os
+import subprocess
+import sys
+from datetime import datetime
 
+from taskschedule.cache import SnapshotCache
 from taskschedule.main import Main
+from taskschedule.schedule import Schedule
 from taskschedule.utils import calculate_datetime
+from taskschedule.watcher import PollingWatcher, create_watcher
 
-if TYPE_CHECKING:
-    from datetime import datetime
+# Modules which must not be imported by `import taskschedule.main`, see
+# benchmarks/startup.py
+DEFERRED_MODULES = (
+    "curses",
+    "asyncio",
+    "tasklib",
+    "isodate",
+    "concurrent.futures",
+    "ctypes",
+)
 
 
 class TestMain:
@@ -30,3 +44,61 @@ class TestMain:
         scheduled_before: datetime = calculate_datetime("tomorrow")
         assert f"scheduled.after:{scheduled_after}" in task_command
         assert f"scheduled.before:{scheduled_before}" in task_command
+
+
+def test_import_defers_interface_modules():
+    code = (
+        "import sys, taskschedule.main; "
+        f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, check=True
+    )
+    assert result.stdout.decode("utf-8").strip() == "[]"
+
+
+def test_update_does_not_cache_without_tasks(tmp_path, offline_schedule: Schedule):
+    main = Main.__new__(Main)
+    main.cache = SnapshotCache(str(tmp_path), [str(tmp_path)], [], {})
+    main.schedule = offline_schedule
+    main.scheduled_after = offline_schedule.scheduled_after
+    main.scheduled_before = offline_schedule.scheduled_before
+
+    # No tasks have been read yet, and no key was taken
+    main.update(False, main.cache.get_key())
+    main.update(False, None)
+    assert main.cache.load() is None
+    assert not os.path.exists(main.cache.path)
+
+    main.schedule.apply([])
+    main.update(False, None)
+    assert not os.path.exists(main.cache.path)
+
+    main.schedule.apply([])
+    main.update(False, main.cache.get_key())
+    assert main.cache.load()["tasks"] == []
+
+
+def test_poll_watchers_reads_events_before_the_refresh(tmp_path):
+    events, polled = tmp_path / "events", tmp_path / "polled"
+    events.mkdir()
+    polled.mkdir()
+
+    main = Main.__new__(Main)
+    main.watchers = [
+        create_watcher(str(events), debounce=0),
+        PollingWatcher(str(polled), debounce=0),
+    ]
+    try:
+        (polled / "pending.data").write_text("")
+        assert not main.poll_watchers(refresh_due=False)
+
+        if main.watchers[0].fileno() is not None:
+            (events / "pending.data").write_text("")
+            assert main.poll_watchers(refresh_due=False)
+
+        assert main.poll_watchers(refresh_due=True)
+        assert not main.poll_watchers(refresh_due=True)
+    finally:
+        for watcher in main.watchers:
+            watcher.close()
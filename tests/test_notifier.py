@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+from taskschedule import notifier
+from taskschedule.notifier import Notifier
+from taskschedule.schedule import Schedule
+
+NOW = datetime(2019, 12, 8, 12).astimezone()
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+def export_date(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def test_projected_instances_are_not_notified(
+    monkeypatch, tmp_path, offline_schedule: Schedule, task_data
+):
+    monkeypatch.setattr(notifier, "datetime", FixedDatetime)
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+
+    schedule = offline_schedule
+    template_start = export_date(datetime(2019, 12, 6, 9).astimezone())
+    schedule.apply(
+        [
+            task_data("1", export_date(datetime(2019, 12, 8, 10).astimezone())),
+            task_data(
+                "template",
+                template_start,
+                status="recurring",
+                recur="daily",
+                due=template_start,
+            ),
+        ]
+    )
+    assert "template:2" in schedule.tasks_by_uuid
+
+    notified = []
+    notifier_ = Notifier(None)
+    monkeypatch.setattr(notifier_, "notify", notified.append)
+    notifier_.send_notifications(schedule.snapshot)
+
+    assert [task.uuid for task in notified] == ["1"]
@@ -0,0 +1,169 @@
+import json
+import random
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+
+from taskschedule.datafile import DATE_FORMAT, UnscheduledFilter
+from taskschedule.planner import (
+    GapTree,
+    Placement,
+    Planner,
+    WorkingHours,
+    merge_intervals,
+    parse_weekdays,
+    place,
+    priority_key,
+    subtract_intervals,
+)
+from taskschedule.schedule import Schedule
+
+HOUR = 3600
+
+# Monday 9 December 2019, in the local timezone
+MONDAY = datetime(2019, 12, 9).astimezone()
+
+
+def export_date(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime(DATE_FORMAT)
+
+
+def candidate(uuid, estimate, **kwargs):
+    data = {
+        "uuid": uuid,
+        "description": f"task {uuid}",
+        "status": "pending",
+        "estimate": estimate,
+    }
+    data.update(kwargs)
+    return data
+
+
+def test_working_hours_windows():
+    hours = WorkingHours.parse("09:00-17:00", parse_weekdays(["mon", "tue"]))
+    windows = list(hours.windows(MONDAY + timedelta(hours=10), MONDAY + timedelta(7)))
+
+    nine = MONDAY.timestamp() + 9 * HOUR
+    assert windows == [
+        (nine + HOUR, nine + 8 * HOUR),
+        (nine + 24 * HOUR, nine + 32 * HOUR),
+    ]
+
+
+@pytest.mark.parametrize("hours", ["17:00-09:00", "9-17", "09:00"])
+def test_invalid_working_hours(hours):
+    with pytest.raises(ValueError):
+        WorkingHours.parse(hours)
+
+
+def test_subtract_intervals():
+    windows = [(0, 10), (20, 30)]
+    busy = [(8, 22), (2, 3), (2.5, 4), (25, 26)]
+    assert merge_intervals(busy) == [(2, 4), (8, 22), (25, 26)]
+    assert subtract_intervals(windows, busy) == [(0, 2), (4, 8), (22, 25), (26, 30)]
+
+
+def test_gap_tree_finds_earliest_fitting_gap():
+    gaps = GapTree([(0, 1), (10, 15), (20, 30)])
+    assert gaps.find(2) == 1
+    assert gaps.take(1, 2) == (10, 12)
+    assert gaps.find(4) == 2
+    assert gaps.find(11) is None
+    assert gaps.find(0.5) == 0
+
+
+def test_place_by_priority():
+    candidates = [
+        candidate("low", "PT1H", priority="L"),
+        candidate("urgent", "PT1H", urgency=10),
+        candidate("high", "PT1H", priority="H"),
+        candidate("huge", "PT5H"),
+    ]
+    placements, unplaced = place(
+        candidates, [(0, 2 * HOUR), (3 * HOUR, 4 * HOUR)], MONDAY
+    )
+
+    assert [(p.data["uuid"], p.start_ts) for p in placements] == [
+        ("urgent", 0),
+        ("high", HOUR),
+        ("low", 3 * HOUR),
+    ]
+    assert [data["uuid"] for data in unplaced] == ["huge"]
+    assert priority_key(candidates[1]) < priority_key(candidates[2])
+
+
+def test_place_rejects_tasks_without_estimate():
+    candidates = [
+        candidate("none", None),
+        candidate("zero", "PT0S"),
+        candidate("hour", "PT1H"),
+    ]
+    placements, unplaced = place(candidates, [(0, 2 * HOUR)], MONDAY)
+
+    assert [p.data["uuid"] for p in placements] == ["hour"]
+    assert sorted(data["uuid"] for data in unplaced) == ["none", "zero"]
+
+
+def test_place_many_tasks_without_overlap():
+    rng = random.Random(42)
+    hours = WorkingHours(time(9), time(17))
+    free = list(hours.windows(MONDAY, MONDAY + timedelta(weeks=8)))
+    candidates = [
+        candidate(str(i), f"PT{rng.choice([15, 30, 45, 90])}M", urgency=rng.random())
+        for i in range(5000)
+    ]
+
+    placements, unplaced = place(candidates, free, MONDAY)
+    assert len(placements) + len(unplaced) == len(candidates)
+    for previous, placement in zip(placements, placements[1:]):
+        assert previous.end_ts <= placement.start_ts
+
+
+def test_placement_export_data():
+    data = candidate("1", "PT1H", id=3, urgency=2.5, source="work")
+    placement = Placement(data, MONDAY.timestamp(), MONDAY.timestamp() + HOUR)
+    export_data = placement.to_export_data()
+
+    assert "id" not in export_data and "source" not in export_data
+    assert export_data["scheduled"] == export_date(MONDAY)
+
+
+class FakeBackend:
+    native = False
+
+    def __init__(self, export_data):
+        self.export_data_ = export_data
+        self.imported = None
+
+    def export_data(self, filter_params=()):
+        assert tuple(filter_params) == UnscheduledFilter.filter_params
+        return [dict(data) for data in self.export_data_]
+
+    def import_data(self, export_data):
+        self.imported = json.loads(json.dumps(export_data))
+
+
+def test_planner_avoids_scheduled_tasks(make_schedule, task_data):
+    schedule: Schedule = make_schedule(
+        scheduled_after=MONDAY, scheduled_before=MONDAY + timedelta(1)
+    )
+    busy_start = MONDAY + timedelta(hours=9)
+    schedule.apply([task_data("busy", export_date(busy_start), estimate="PT2H")])
+    backend = FakeBackend(
+        [
+            candidate("free", "PT1H"),
+            candidate("scheduled", "PT1H", scheduled=export_date(busy_start)),
+            candidate("no estimate", None),
+        ]
+    )
+    planner = Planner(
+        schedule, {"home": backend}, WorkingHours(time(9), time(17)), now=MONDAY,
+    )
+
+    placements, unplaced = planner.plan()
+    assert not unplaced
+    assert placements[0].start_ts == busy_start.timestamp() + 2 * HOUR
+
+    planner.apply(placements)
+    assert backend.imported[0]["uuid"] == "free"
+    assert backend.imported[0]["scheduled"] == placements[0].scheduled
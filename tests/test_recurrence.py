@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from taskschedule.recurrence import (
+    Period,
+    RecurrenceError,
+    RecurrenceProjector,
+    RecurrenceTemplate,
+    add_months,
+    is_template,
+)
+from taskschedule.task_record import parse_timestamp
+
+AFTER = datetime(2019, 12, 1, tzinfo=timezone.utc)
+BEFORE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def template_data(recur: str = "weekly", **kwargs):
+    data = {
+        "id": 0,
+        "uuid": "template",
+        "description": "recurring",
+        "status": "recurring",
+        "recur": recur,
+        "due": "20191202T100000Z",
+        "scheduled": "20191202T090000Z",
+        "modified": "20191201T000000Z",
+        "urgency": 2.0,
+    }
+    data.update(kwargs)
+    return data
+
+
+@pytest.mark.parametrize(
+    "recur,months,delta",
+    [
+        ("daily", 0, timedelta(days=1)),
+        ("weekly", 0, timedelta(days=7)),
+        ("quarterly", 3, timedelta()),
+        ("2wks", 0, timedelta(days=14)),
+        ("3d", 0, timedelta(days=3)),
+        ("6mo", 6, timedelta()),
+        ("P1M", 1, timedelta()),
+        ("PT12H", 0, timedelta(hours=12)),
+    ],
+)
+def test_period_parse(recur, months, delta):
+    period = Period.parse(recur)
+    assert (period.months, period.delta) == (months, delta)
+
+
+@pytest.mark.parametrize("recur", ["sometimes", "0d", "P"])
+def test_period_parse_invalid(recur):
+    with pytest.raises(RecurrenceError):
+        Period.parse(recur)
+
+
+def test_add_months_clamps_day():
+    assert add_months(datetime(2020, 1, 31), 1) == datetime(2020, 2, 29)
+    assert add_months(datetime(2019, 11, 30), 3) == datetime(2020, 2, 29)
+    assert add_months(datetime(2019, 12, 15), 12) == datetime(2020, 12, 15)
+
+
+def test_weekdays_skip_weekends():
+    period = Period.parse("weekdays")
+    friday = datetime(2019, 12, 6, 9)
+    assert [period.get_instance(friday, i).day for i in range(4)] == [6, 9, 10, 11]
+
+
+def test_iter_instances_keeps_scheduled_offset():
+    template = RecurrenceTemplate(template_data())
+    instances = list(template.iter_instances(AFTER.timestamp(), BEFORE.timestamp()))
+
+    assert [index for index, _, _ in instances] == [0, 1, 2, 3, 4]
+    for _, due_ts, scheduled_ts in instances:
+        assert due_ts - scheduled_ts == 3600
+
+
+def test_iter_instances_skips_generated_instances_and_stops_at_until():
+    template = RecurrenceTemplate(template_data(mask="--", until="20191224T000000Z"))
+    instances = list(template.iter_instances(AFTER.timestamp(), BEFORE.timestamp()))
+    assert [index for index, _, _ in instances] == [2, 3]
+
+
+def test_iter_instances_skips_ahead_to_range():
+    template = RecurrenceTemplate(
+        template_data("daily", due="20100101T100000Z", scheduled="20100101T090000Z")
+    )
+    after = datetime(2019, 12, 1, tzinfo=timezone.utc).timestamp()
+    before = datetime(2019, 12, 3, tzinfo=timezone.utc).timestamp()
+
+    instances = list(template.iter_instances(after, before))
+    assert len(instances) == 2
+    assert all(after < scheduled_ts < before for _, _, scheduled_ts in instances)
+
+
+def test_template_without_scheduled_date_is_not_projected():
+    data = template_data()
+    del data["scheduled"]
+    template = RecurrenceTemplate(data)
+    assert list(template.iter_instances(AFTER.timestamp(), BEFORE.timestamp())) == []
+
+
+def test_projected_instance():
+    projector = RecurrenceProjector(AFTER, BEFORE)
+    instance = projector.project(template_data())[1]
+
+    assert instance["uuid"] == "template:1"
+    assert instance["parent"] == "template"
+    assert instance["status"] == "pending"
+    assert instance["projected"] is True
+    assert instance["id"] == 0
+    assert "urgency" not in instance
+    assert parse_timestamp(instance["scheduled"]) == parse_timestamp("20191209T090000Z")
+
+
+def test_projector_caches_until_template_changes():
+    projector = RecurrenceProjector(AFTER, BEFORE)
+    first = projector.project(template_data())
+    assert projector.project(template_data()) is first
+
+    changed = projector.project(template_data(mask="-"))
+    assert changed is not first
+    assert len(changed) == len(first) - 1
+
+    assert list(projector.iter_projections([])) == []
+    assert projector.cache == {}
+
+
+def test_unsupported_period_is_not_projected():
+    projector = RecurrenceProjector(AFTER, BEFORE)
+    assert projector.project(template_data("sometimes")) == []
+
+
+def test_is_template():
+    assert is_template(template_data())
+    assert not is_template(template_data(status="pending"))
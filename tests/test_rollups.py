@@ -0,0 +1,31 @@
+from taskschedule.rollups import TimeboxRollup, TimeboxTotals
+
+
+def totals(real, estimate):
+    result = TimeboxTotals()
+    result.real, result.estimate = real, estimate
+    return result
+
+
+def test_rollup_add_and_remove(task_record):
+    rollup = TimeboxRollup()
+    first = task_record(
+        "1", "20191208T090000Z", project="home", tb_estimate=3, tb_real=1
+    )
+    second = task_record("2", "20191208T100000Z", project="work", tb_estimate=2)
+    unscheduled = task_record("3", project="home", tb_real=2)
+    for task in (first, second, unscheduled):
+        rollup.add(task)
+
+    day = rollup.get_day(first)
+    assert rollup.total == totals(3, 5)
+    assert rollup.day(day) == totals(1, 5)
+    assert rollup.day(None) == totals(2, 0)
+    assert rollup.project("home") == totals(3, 3)
+    assert rollup.project("work") == totals(0, 2)
+
+    rollup.remove(second)
+    assert rollup.total == totals(3, 3)
+    assert "work" not in rollup.by_project
+    assert rollup.project("work") == totals(0, 0)
+    assert rollup.day(day) == totals(1, 3)
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from datetime import datetime, timezone
 
 import pytest
 
+from taskschedule.indexes import ViewFilter
+from taskschedule.schedule import Schedule, cached_property
+from taskschedule.sources import MergedBackend
 from taskschedule.utils import calculate_datetime
 
-if TYPE_CHECKING:
-    from taskschedule.schedule import Schedule
-
 
 class TestSchedule:
     def test_get_tasks_returns_correct_tasks(self, schedule: Schedule):
@@ -67,3 +67,315 @@ class TestSchedule:
     def test_get_next_task_for_last_task_returns_none(self, schedule: Schedule):
         next_task = schedule.get_next_task(schedule.tasks[6])
         assert not next_task
+
+
+class TestScheduleIncrementalRefresh:
+    def test_apply_only_rebuilds_modified_tasks(
+        self, offline_schedule: Schedule, task_data
+    ):
+        data = [
+            task_data("1", "20191208T090000Z"),
+            task_data("2", "20191208T100000Z"),
+        ]
+        assert offline_schedule.apply(data)
+        first, second = offline_schedule.tasks
+
+        assert not offline_schedule.apply(data)
+        assert offline_schedule.tasks[0] is first
+
+        data[1] = task_data("2", "20191208T110000Z", modified="20191208T010000Z")
+        assert offline_schedule.apply(data)
+        assert offline_schedule.tasks[0] is first
+        assert offline_schedule.tasks[1] is not second
+
+    def test_apply_patches_time_slots(self, offline_schedule: Schedule, task_data):
+        data = [task_data("1", "20191208T090000Z")]
+        offline_schedule.apply(data)
+        task = offline_schedule.tasks[0]
+        day = task.scheduled_start_datetime.date().isoformat()
+        hour = task.scheduled_start_datetime.strftime("%H")
+
+        time_slots = offline_schedule.get_time_slots()
+        assert time_slots[day][hour] == [task]
+
+        offline_schedule.apply([])
+        assert offline_schedule.tasks == []
+        assert time_slots[day][hour] == []
+        assert offline_schedule.tasks_by_uuid == {}
+
+    def test_time_slots_only_hold_occupied_slots(self, make_schedule, task_data):
+        schedule = make_schedule(
+            scheduled_after=datetime(2019, 1, 1, tzinfo=timezone.utc),
+            scheduled_before=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        )
+        schedule.apply(
+            [task_data("1", "20190601T120000Z"), task_data("2", "20190301T120000Z")]
+        )
+        second, first = schedule.tasks
+        first_key, second_key = (
+            schedule.get_slot_key(first),
+            schedule.get_slot_key(second),
+        )
+
+        assert schedule.get_occupied_slots() == {
+            first_key[0]: {first_key[1]: [first]},
+            second_key[0]: {second_key[1]: [second]},
+        }
+        occupied = [(day, list(slots)) for day, slots in schedule.iter_time_slots()]
+        assert occupied == [
+            (first_key[0], [(first_key[1], [first])]),
+            (second_key[0], [(second_key[1], [second])]),
+        ]
+
+        days = list(schedule.iter_time_slots(include_empty=True))
+        assert len(days) == 366
+        slots = dict(dict(days)[first_key[0]])
+        assert len(slots) == 24
+        assert slots[first_key[1]] == [first]
+
+        schedule.apply([task_data("1", "20190601T120000Z")])
+        assert schedule.get_occupied_slots() == {
+            second_key[0]: {second_key[1]: [second]}
+        }
+
+    @pytest.mark.parametrize("slot_width,slots_per_day", [(15, 96), (30, 48)])
+    def test_get_time_slots_with_slot_width(
+        self, make_schedule, task_data, slot_width, slots_per_day
+    ):
+        schedule = make_schedule(slot_width=slot_width)
+        schedule.apply([task_data("1", "20191208T094500Z")])
+        task = schedule.tasks[0]
+        start = task.scheduled_start_datetime
+        minute = start.minute - start.minute % slot_width
+        label = f"{start.hour:02d}:{minute:02d}"
+
+        time_slots = schedule.get_time_slots()
+        day = start.date().isoformat()
+        assert len(time_slots[day]) == slots_per_day
+        assert time_slots[day][label] == [task]
+        assert schedule.get_slot_key(task) == (day, label)
+
+    def test_invalid_slot_width(self, make_schedule):
+        with pytest.raises(ValueError):
+            make_schedule(slot_width=20)
+
+    def test_get_conflicts(self, offline_schedule: Schedule, task_data):
+        offline_schedule.apply(
+            [
+                task_data("1", "20191208T090000Z", estimate="PT1H"),
+                task_data("2", "20191208T093000Z", estimate="PT1H"),
+                task_data("3", "20191208T103000Z", estimate="PT30M"),
+                task_data("4", "20191208T093000Z"),
+            ]
+        )
+        first, second, third, unestimated = offline_schedule.tasks
+
+        assert offline_schedule.get_conflicts() == [(first, second)]
+        assert offline_schedule.has_conflict(second)
+        assert not offline_schedule.has_conflict(third)
+        assert not offline_schedule.has_conflict(unestimated)
+
+        start = first.scheduled_start_datetime
+        assert offline_schedule.get_running_at(start) == [first]
+        assert offline_schedule.get_overlapping(
+            second.scheduled_end_datetime, third.scheduled_end_datetime
+        ) == [third]
+
+    def test_get_next_task(self, offline_schedule: Schedule, task_data):
+        offline_schedule.apply(
+            [
+                task_data("1", "20191208T110000Z"),
+                task_data("2", "20191208T090000Z"),
+                task_data("3", "20191208T100000Z"),
+            ]
+        )
+        last, first, middle = offline_schedule.tasks
+        assert offline_schedule.get_next_task(first) is middle
+        assert offline_schedule.get_next_task(middle) is last
+        assert offline_schedule.get_next_task(last) is None
+        assert offline_schedule.get_previous_task(middle) is first
+        assert offline_schedule.get_previous_task(first) is None
+
+    def test_layout_is_computed_once_per_snapshot(
+        self, offline_schedule: Schedule, task_data
+    ):
+        offline_schedule.apply([task_data("1", "20191208T090000Z", project="home")])
+        layout = offline_schedule.get_layout(80)
+        assert offline_schedule.get_layout(80) is layout
+        assert offline_schedule.get_layout(100) is not layout
+        assert offline_schedule.get_column_offsets() == [0, 5, 7, 19, 29, 37]
+
+        offline_schedule.apply(
+            [task_data("1", "20191208T090000Z", project="a_long_project_name")]
+        )
+        assert offline_schedule.get_layout(80) is layout
+        offline_schedule.apply(
+            [
+                task_data(
+                    "1",
+                    "20191208T090000Z",
+                    modified="20191208T010000Z",
+                    project="a_long_project_name",
+                )
+            ]
+        )
+        assert offline_schedule.get_layout(80) is not layout
+        assert offline_schedule.get_max_length("project") == 19
+        assert offline_schedule.get_column_offsets() == [0, 5, 7, 19, 29, 49]
+
+    def test_timebox_totals_follow_changes(self, offline_schedule: Schedule, task_data):
+        offline_schedule.apply(
+            [
+                task_data("1", "20191208T090000Z", tb_estimate=3, tb_real=1),
+                task_data("2", "20191208T100000Z", project="home", tb_estimate=2),
+            ]
+        )
+        day = offline_schedule.tasks[0].scheduled_start_datetime.date().isoformat()
+        assert offline_schedule.get_timebox_estimate_count() == 5
+        assert offline_schedule.get_timebox_real_count() == 1
+        assert offline_schedule.get_timebox_totals(day).estimate == 5
+
+        offline_schedule.apply(
+            [
+                task_data(
+                    "1",
+                    "20191208T090000Z",
+                    modified="20191208T010000Z",
+                    tb_estimate=3,
+                    tb_real=2,
+                )
+            ]
+        )
+        assert offline_schedule.get_timebox_estimate_count() == 3
+        assert offline_schedule.get_timebox_real_count() == 2
+        assert offline_schedule.timeboxes.project("home").estimate == 0
+
+        offline_schedule.clear_cache()
+        assert offline_schedule.timeboxes.total.estimate == 0
+
+    def test_get_current_task(self, offline_schedule: Schedule, task_data):
+        offline_schedule.apply(
+            [
+                task_data("1", "20191208T090000Z", estimate="PT3H"),
+                task_data("2", "20191208T100000Z", estimate="PT30M"),
+                task_data("3", "20191208T130000Z"),
+                task_data("4", "20191208T150000Z"),
+            ]
+        )
+        long, short, unestimated, last = offline_schedule.tasks
+        start = long.scheduled_ts
+
+        assert offline_schedule.get_current_task(start - 60) is None
+        assert offline_schedule.get_current_task(start + 60) is long
+        assert offline_schedule.get_current_task(start + 3900) is short
+        # The long task is still running after the short one ended
+        assert offline_schedule.get_current_task(start + 7200) is long
+        assert offline_schedule.get_current_task(start + 3 * 3600 + 60) is None
+
+        # Tasks without an estimate should be active until the next task
+        assert offline_schedule.should_be_active(unestimated, start + 5 * 3600)
+        assert offline_schedule.get_current_task(start + 5 * 3600) is unestimated
+        assert not offline_schedule.should_be_active(last, start + 7 * 3600)
+
+
+def test_apply_assigns_backend_of_source(make_schedule, task_data):
+    work, home = object(), object()
+    schedule = make_schedule(backend=MergedBackend({"work": work, "home": home}))
+    data = task_data("1", "20191208T090000Z")
+    data["source"] = "home"
+    schedule.apply([data])
+
+    assert schedule.tasks[0].source == "home"
+    assert schedule.tasks[0].backend is home
+
+
+def test_apply_projects_recurring_tasks(make_schedule, task_data):
+    schedule = make_schedule(
+        scheduled_before=datetime(2019, 12, 21, tzinfo=timezone.utc)
+    )
+    template = task_data(
+        "2",
+        "20191202T090000Z",
+        status="recurring",
+        recur="weekly",
+        due="20191202T100000Z",
+        mask="-",
+    )
+    schedule.apply([task_data("1", "20191208T090000Z"), template])
+
+    assert [task.uuid for task in schedule.tasks] == ["1", "2:1", "2:2"]
+    assert [task.projected for task in schedule.tasks] == [False, True, True]
+    assert schedule.snapshot.export_data()[-1] is template
+
+    schedule.apply([task_data("1", "20191208T090000Z"), dict(template, mask="--")])
+    assert [task.uuid for task in schedule.tasks] == ["1", "2:2"]
+
+
+def test_apply_without_projections_keeps_templates(make_schedule, task_data):
+    schedule = make_schedule(
+        scheduled_after=datetime(2019, 11, 30, tzinfo=timezone.utc),
+        scheduled_before=datetime(2019, 12, 21, tzinfo=timezone.utc),
+        project_recurrences=False,
+    )
+    template = task_data("2", "20191202T090000Z", status="recurring", recur="weekly")
+    schedule.apply([template])
+    assert [task.uuid for task in schedule.tasks] == ["2"]
+
+
+def test_view_filter_narrows_time_slots(offline_schedule: Schedule, task_data):
+    schedule = offline_schedule
+    schedule.apply(
+        [
+            task_data("1", "20191208T090000Z", project="work"),
+            task_data("2", "20191208T091500Z", project="home"),
+            task_data("3", "20191209T090000Z", project="home", tags=["call"]),
+        ]
+    )
+
+    def shown():
+        return [
+            task.uuid
+            for _, slots in schedule.iter_time_slots()
+            for _, tasks in slots
+            for task in tasks
+        ]
+
+    assert schedule.cycle_view_filter("project").project == "home"
+    assert shown() == ["2", "3"]
+    assert [task.uuid for task in schedule.get_visible_tasks()] == ["2", "3"]
+
+    schedule.cycle_view_filter("tag")
+    assert shown() == ["3"]
+    assert len(list(schedule.iter_time_slots())) == 1
+
+    # The filter is kept for the next snapshot
+    schedule.apply([task_data("4", "20191208T100000Z", project="home")])
+    assert shown() == []
+
+    assert schedule.cycle_view_filter("tag").tags == frozenset()
+    assert shown() == ["4"]
+    assert schedule.cycle_view_filter("project").project is None
+    assert schedule.set_view_filter(ViewFilter(status="completed"))
+    assert shown() == []
+    assert schedule.set_view_filter(ViewFilter())
+    assert shown() == ["4"]
+    assert not schedule.set_view_filter(ViewFilter())
+
+
+def test_views_are_cleared_when_tasks_change(offline_schedule: Schedule, task_data):
+    # Cached properties which do not depend on the tasks
+    not_views = {"tasks", "slot_labels"}
+    cached = {
+        name
+        for name, value in vars(Schedule).items()
+        if isinstance(value, cached_property)
+    }
+    assert cached - not_views == set(Schedule.views)
+
+    schedule = offline_schedule
+    schedule.apply([task_data("1", "20191208T090000Z")])
+    for name in Schedule.views:
+        getattr(schedule, name)
+
+    schedule.apply([task_data("1", "20191208T090000Z", modified="20191209T000000Z")])
+    assert not set(Schedule.views) & set(vars(schedule))
@@ -1,6 +1,4 @@
-from datetime import datetime, timedelta
-
-import pytest
+from datetime import datetime, timedelta, timezone
 
 from taskschedule.scheduled_task import ScheduledTask
 
@@ -72,10 +70,27 @@ def test_notified(tw):  # noqa: F811
     assert task.notified is True
 
 
-@pytest.mark.skip(reason="This cannot be tested because the method is currently broken")
 def test_should_be_active(tw):  # noqa: F811
-    # TODO Complete this test after fixing the class method
-    ...
+    now = datetime.now().replace(microsecond=0)
+    running_task = ScheduledTask(
+        backend=tw,
+        description="Test task",
+        scheduled=now - timedelta(hours=1),
+        estimate="PT2H",
+    )
+    future_task = ScheduledTask(
+        backend=tw,
+        description="Test task",
+        scheduled=now + timedelta(hours=1),
+        estimate="PT2H",
+    )
+    unestimated_task = ScheduledTask(
+        backend=tw, description="Test task", scheduled=now - timedelta(hours=1)
+    )
+
+    assert running_task.should_be_active is True
+    assert future_task.should_be_active is False
+    assert unestimated_task.should_be_active is False
 
 
 def test_overdue(tw):  # noqa: F811
@@ -88,3 +103,24 @@ def test_overdue(tw):  # noqa: F811
 
     assert future_task.overdue is False
     assert old_task.overdue is True
+
+
+def test_scheduled_end_datetime_follows_changes():
+    task = ScheduledTask(
+        backend=None,
+        description="Test task",
+        scheduled=datetime(2019, 10, 12, 9, 0, tzinfo=timezone.utc),
+        estimate="PT1H",
+    )
+    end = task.scheduled_end_datetime
+    assert end - task["scheduled"] == timedelta(hours=1)
+    assert task.scheduled_end_datetime is end
+
+    task["estimate"] = "PT2H"
+    assert task.scheduled_end_datetime - task["scheduled"] == timedelta(hours=2)
+
+    task["scheduled"] = datetime(2019, 10, 12, 10, 0, tzinfo=timezone.utc)
+    assert task.scheduled_end_datetime.hour == 12
+
+    task["estimate"] = None
+    assert task.scheduled_end_datetime is None
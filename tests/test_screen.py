@@ -1,4 +1,5 @@
 from taskschedule.screen import Screen
+from taskschedule.snapshot import RefreshCycle
 
 
 class TestScreen:
@@ -46,7 +47,7 @@ class TestScreen:
         assert divider_buffer[2][1] == 23
 
     def test_prerender_empty_line(self, screen: Screen):
-        empty_line_buffer = screen.prerender_empty_line(True, 0, 22, "2019-12-08")
+        empty_line_buffer = screen.prerender_empty_line(True, 0, "22", "2019-12-08")
         assert "  " in empty_line_buffer[0][2]
         assert empty_line_buffer[0][1] == 5
         assert empty_line_buffer[1][2] == "22"
@@ -54,7 +55,7 @@ class TestScreen:
 
     def test_prerender_task(self, screen: Screen):
         task = screen.schedule.tasks[0]
-        task_buffer = screen.prerender_task(0, task, False, 11, 0, "2019-12-08")
+        task_buffer = screen.prerender_task(0, task, False, "11", 0, "2019-12-08")
         assert task_buffer[0][1] == 0
         assert "11" in task_buffer[0][2]
 
@@ -77,3 +78,13 @@ class TestScreen:
         # Description column
         assert task_buffer[6][1] == 37
         assert "test_last_week" in task_buffer[6][2]
+
+    def test_prerender_footnote_shows_export_counters(self, screen: Screen):
+        screen.refresh_cycle = RefreshCycle(screen.schedule.backend)
+        assert "exports" not in screen.prerender_footnote()
+
+        with screen.refresh_cycle:
+            screen.schedule.refresh()
+        footnote = screen.prerender_footnote()
+        assert footnote.endswith("exports: 1 last refresh, 1 in 1 refreshes")
+        screen.refresh_cycle = None
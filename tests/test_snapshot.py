@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+
+from taskschedule.snapshot import RefreshCycle, TaskSnapshot
+from taskschedule.task_record import TaskRecord
+
+DATA = {
+    "id": 1,
+    "uuid": "9c7c2fe6-0000-4000-8000-000000000001",
+    "description": "Buy cat food",
+    "scheduled": "20191208T090000Z",
+    "status": "pending",
+    "tags": ["home"],
+}
+
+
+def make_snapshot() -> TaskSnapshot:
+    return TaskSnapshot(
+        [TaskRecord(None, DATA)],
+        {DATA["uuid"]: DATA},
+        datetime(2019, 12, 8, tzinfo=timezone.utc),
+        datetime(2019, 12, 9, tzinfo=timezone.utc),
+    )
+
+
+def test_snapshot_covers():
+    snapshot = make_snapshot()
+    assert snapshot.covers(
+        datetime(2019, 12, 8, 1, tzinfo=timezone.utc),
+        datetime(2019, 12, 8, 23, tzinfo=timezone.utc),
+    )
+    assert not snapshot.covers(
+        datetime(2019, 12, 7, tzinfo=timezone.utc),
+        datetime(2019, 12, 8, 23, tzinfo=timezone.utc),
+    )
+
+
+def test_snapshot_filter():
+    snapshot = make_snapshot()
+    assert len(snapshot.filter(lambda task: task.pending)) == 1
+    assert snapshot.filter(lambda task: task.completed) == []
+
+
+def test_snapshot_as_dict_returns_copy():
+    snapshot = make_snapshot()
+    task = snapshot.tasks[0]
+
+    data = snapshot.as_dict(task)
+    assert data == DATA
+
+    data["tags"].append("errand")
+    assert snapshot.as_dict(task)["tags"] == ["home"]
+
+
+def test_refresh_cycle_counts_exports():
+    class Backend:
+        export_count = 0
+
+    backend = Backend()
+    cycle = RefreshCycle(backend)
+
+    with cycle:
+        backend.export_count += 1
+    assert cycle.last_exports == 1
+
+    with cycle:
+        pass
+    assert cycle.last_exports == 0
+    assert cycle.exports == 1
+    assert cycle.cycles == 2
@@ -0,0 +1,83 @@
+import time
+
+from taskschedule.sources import (
+    MergedBackend,
+    merge_exports,
+    source_name,
+    unique_source_names,
+)
+
+
+class SlowBackend:
+    def __init__(self, export, delay: float):
+        self.export = export
+        self.delay = delay
+        self.export_count = 0
+
+    def export_data(self, filter_params=()):
+        time.sleep(self.delay)
+        self.export_count += 1
+        return [dict(data) for data in self.export]
+
+
+def test_source_name():
+    assert source_name("~/clients/acme/.task") == "acme"
+    assert source_name("/var/lib/tasks/") == "tasks"
+    assert unique_source_names(["/a/work", "/b/work", "/c/home"]) == [
+        "work",
+        "work2",
+        "home",
+    ]
+
+
+def test_merge_exports_orders_by_scheduled_time(task_data):
+    exports = {
+        "work": [
+            task_data("1", "20191208T120000Z"),
+            task_data("2", "20191208T080000Z"),
+        ],
+        "home": [task_data("3"), task_data("4", "20191208T100000Z")],
+    }
+
+    merged = list(merge_exports(exports))
+    assert [data["uuid"] for data in merged] == ["2", "4", "1", "3"]
+    assert [data["source"] for data in merged] == ["work", "home", "work", "home"]
+
+
+def test_merged_backend_exports_concurrently(task_data):
+    backend = MergedBackend(
+        {
+            "work": SlowBackend([task_data("1", "20191208T120000Z")], 0.3),
+            "home": SlowBackend([task_data("2", "20191208T090000Z")], 0.3),
+        }
+    )
+
+    start = time.time()
+    merged = backend.export_data()
+    assert time.time() - start < 0.55
+
+    assert [data["uuid"] for data in merged] == ["2", "1"]
+    assert backend.export_count == 2
+
+
+def test_merge_exports_copies_the_export_data(task_data):
+    export = [task_data("1", "20191208T120000Z")]
+    merged = list(merge_exports({"work": export}))
+
+    assert merged[0]["source"] == "work"
+    assert "source" not in export[0]
+
+
+def test_merge_exports_keeps_tasks_of_several_sources_once(task_data):
+    synced = task_data("1", "20191208T120000Z")
+    exports = {
+        "work": [dict(synced, modified="20191208T080000Z"), task_data("2")],
+        "home": [dict(synced, modified="20191208T090000Z")],
+        "other": [dict(synced, modified="20191208T090000Z")],
+    }
+
+    merged = list(merge_exports(exports))
+    assert [(data["uuid"], data["source"]) for data in merged] == [
+        ("1", "home"),
+        ("2", "work"),
+    ]
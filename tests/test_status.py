@@ -0,0 +1,81 @@
+import math
+
+import pytest
+
+from taskschedule.schedule import Schedule
+from taskschedule.status import (
+    ACTIVE,
+    COMPLETED,
+    DEFAULT,
+    OVERDUE,
+    SHOULD_BE_ACTIVE,
+    StatusEngine,
+)
+from taskschedule.task_record import parse_timestamp
+
+NINE = parse_timestamp("20191208T090000Z")
+TEN = parse_timestamp("20191208T100000Z")
+
+
+@pytest.fixture
+def schedule(offline_schedule: Schedule, task_data) -> Schedule:
+    offline_schedule.apply(
+        [
+            task_data("1", "20191208T090000Z", estimate="PT30M"),
+            task_data("2", "20191208T100000Z"),
+            task_data("3", "20191208T110000Z", start="20191208T105000Z"),
+            task_data("4", "20191208T080000Z", status="completed"),
+        ]
+    )
+    return offline_schedule
+
+
+def statuses(engine: StatusEngine):
+    return [engine.get_status(task) for task in engine.schedule.tasks]
+
+
+def test_classify_at_captured_timestamp(schedule: Schedule):
+    engine = StatusEngine(schedule)
+
+    engine.refresh(NINE - 60)
+    assert statuses(engine) == [DEFAULT, DEFAULT, ACTIVE, COMPLETED]
+    assert engine.next_transition_ts == NINE
+
+    engine.refresh(NINE + 60)
+    assert statuses(engine) == [SHOULD_BE_ACTIVE, DEFAULT, ACTIVE, COMPLETED]
+    assert engine.next_transition_ts == NINE + 1800
+
+    engine.refresh(NINE + 1800 + 60)
+    assert statuses(engine) == [OVERDUE, DEFAULT, ACTIVE, COMPLETED]
+    assert engine.next_transition_ts == TEN
+
+
+def test_task_without_estimate_is_active_until_next_task(schedule: Schedule):
+    engine = StatusEngine(schedule)
+    engine.refresh(TEN + 60)
+    assert engine.get_status(schedule.tasks[1]) == SHOULD_BE_ACTIVE
+    assert engine.next_transition_ts == TEN + 3600
+
+
+def test_is_stale(schedule: Schedule, task_data):
+    engine = StatusEngine(schedule)
+    assert engine.is_stale(NINE - 60)
+
+    engine.refresh(NINE - 60)
+    assert not engine.is_stale(NINE - 30)
+    assert not engine.is_stale(NINE)
+    assert engine.is_stale(NINE + 1)
+
+    schedule.apply([task_data("1", "20191208T090000Z", modified="20191208T010000Z")])
+    assert engine.is_stale(NINE - 30)
+
+
+def test_no_transitions_after_last_task(schedule: Schedule):
+    engine = StatusEngine(schedule)
+    engine.refresh(TEN + 7200)
+    assert engine.next_transition_ts == math.inf
+    assert not engine.is_stale(TEN + 86400)
+
+
+def test_not_stale_before_tasks_are_read(offline_schedule: Schedule):
+    assert not StatusEngine(offline_schedule).is_stale()
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from taskschedule.task_record import TaskRecord, parse_timestamp
+
+DATA = {
+    "id": 3,
+    "uuid": "9c7c2fe6-0000-4000-8000-000000000001",
+    "description": "Buy cat food",
+    "project": "home",
+    "scheduled": "20191208T090000Z",
+    "estimate": "PT1H11M",
+    "status": "pending",
+    "tb_estimate": 2,
+}
+
+
+def test_parse_timestamp():
+    expected = datetime(2019, 12, 8, 9, tzinfo=timezone.utc).timestamp()
+    assert parse_timestamp("20191208T090000Z") == expected
+    assert parse_timestamp(None) is None
+
+
+def test_record_fields():
+    record = TaskRecord(None, DATA)
+    assert record["id"] == 3
+    assert record["project"] == "home"
+    assert record["tb_estimate"] == 2
+    assert record["tb_real"] is None
+    assert record["end"] is None
+
+    with pytest.raises(KeyError):
+        record["due"]
+
+    with pytest.raises(AttributeError):
+        record.extra = True
+
+
+def test_record_scheduled_times():
+    record = TaskRecord(None, DATA)
+    start = datetime(2019, 12, 8, 9, tzinfo=timezone.utc)
+    assert record.scheduled_start_datetime == start
+    assert record["scheduled"] == start
+
+    difference = record.scheduled_end_datetime - record.scheduled_start_datetime
+    assert difference.total_seconds() == 4260
+
+
+def test_record_without_scheduled_time():
+    record = TaskRecord(None, {"uuid": DATA["uuid"], "description": "Unscheduled"})
+    assert record.scheduled_start_datetime is None
+    assert record.scheduled_end_datetime is None
+    assert record.has_scheduled_time is False
+    assert record.overdue is False
+    assert record.should_be_active is False
+
+
+def test_record_status():
+    record = TaskRecord(None, dict(DATA, status="completed", end="20191208T100000Z"))
+    assert record.completed is True
+    assert record.active is False
+    assert record.overdue is True
+
+    record = TaskRecord(None, dict(DATA, start="20191208T090500Z"))
+    assert record.active is True
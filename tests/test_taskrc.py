@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from taskschedule.taskrc import Taskrc, TaskrcParseError, load_taskrc
+
+TASKRC = """# Taskwarrior settings
+data.location=~/.task
+include theme.rc
+
+uda.estimate.type=duration
+uda.estimate.label=Est  # the estimate
+uda.tb_real.type=numeric
+"""
+
+
+@pytest.fixture
+def taskrc_path(tmp_path):
+    (tmp_path / "theme.rc").write_text("color.active=rgb555 on rgb410\n")
+    path = tmp_path / "taskrc"
+    path.write_text(TASKRC)
+    return str(path)
+
+
+def test_taskrc_values(taskrc_path):
+    taskrc = Taskrc(taskrc_path)
+    assert taskrc["data.location"] == "~/.task"
+    assert taskrc["uda.estimate.label"] == "Est"
+    assert taskrc.get("uda.missing.type") is None
+
+
+def test_taskrc_follows_includes(taskrc_path):
+    taskrc = Taskrc(taskrc_path)
+    assert taskrc["color.active"] == "rgb555 on rgb410"
+    assert len(taskrc.files) == 2
+
+
+def test_taskrc_overrides(taskrc_path):
+    taskrc = Taskrc(
+        taskrc_path, {"rc.uda.estimate.label": "Estimate", "verbose": "nothing"}
+    )
+    assert taskrc["uda.estimate.label"] == "Estimate"
+    assert taskrc["verbose"] == "nothing"
+
+
+def test_taskrc_udas(taskrc_path):
+    taskrc = Taskrc(taskrc_path)
+    assert taskrc.get_udas()["estimate"] == {"type": "duration", "label": "Est"}
+    assert taskrc.get_uda_types() == {"estimate": "duration", "tb_real": "numeric"}
+
+
+def test_taskrc_parse_error(tmp_path):
+    path = tmp_path / "taskrc"
+    path.write_text("invalid line\n")
+    with pytest.raises(TaskrcParseError):
+        Taskrc(str(path))
+
+
+def test_load_taskrc_is_cached_until_modified(tmp_path, taskrc_path):
+    taskrc = load_taskrc(taskrc_path)
+    assert load_taskrc(taskrc_path) is taskrc
+
+    # A change to an included file invalidates the cached taskrc
+    theme = tmp_path / "theme.rc"
+    theme.write_text("color.active=red\n")
+    stat = os.stat(theme)
+    os.utime(theme, (stat.st_atime, stat.st_mtime + 1))
+
+    reloaded = load_taskrc(taskrc_path)
+    assert reloaded is not taskrc
+    assert reloaded["color.active"] == "red"
@@ -0,0 +1,151 @@
+import os
+import stat
+import threading
+from datetime import date, timedelta
+from typing import Dict, List
+
+import pytest
+from tasklib.backends import TaskWarriorException
+
+from taskschedule.taskrc import Taskrc
+from taskschedule.taskwarrior import PatchedTaskWarrior
+
+EXPORT = (
+    '{"id":1,"description":"first","status":"pending",'
+    '"uuid":"9c7c2fe6-0000-4000-8000-000000000001"},\n'
+    '{"id":2,"description":"second","status":"pending",'
+    '"uuid":"9c7c2fe6-0000-4000-8000-000000000002"}\n'
+)
+
+
+def fake_task_command(tmp_path, output: str, exit_code: int = 0) -> str:
+    """Create a script that prints the given output, regardless of arguments."""
+    (tmp_path / "export.json").write_text(output)
+    script = tmp_path / "task"
+    script.write_text(f"#!/bin/sh\ncat {tmp_path / 'export.json'}\nexit {exit_code}\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+def make_backend(tmp_path, output: str, exit_code: int = 0) -> PatchedTaskWarrior:
+    return PatchedTaskWarrior(
+        data_location=str(tmp_path),
+        create=False,
+        task_command=fake_task_command(tmp_path, output, exit_code),
+        version_override="2.5.1",
+    )
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Requires a POSIX shell")
+class TestPatchedTaskWarrior:
+    def test_iter_export_data_streams_tasks(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+
+        data = backend.iter_export_data()
+        assert next(data)["description"] == "first"
+        assert next(data)["description"] == "second"
+        with pytest.raises(StopIteration):
+            next(data)
+
+        assert backend.export_count == 1
+
+    def test_iter_tasks_yields_scheduled_tasks(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+        tasks = backend.tasks.all().iterator()
+        assert next(tasks)["id"] == 1
+
+    def test_iter_export_data_raises_on_failure(self, tmp_path):
+        backend = make_backend(tmp_path, "", exit_code=2)
+        with pytest.raises(TaskWarriorException):
+            backend.export_data()
+
+    def test_iter_export_data_reports_stderr(self, tmp_path):
+        backend = make_backend(tmp_path, "", exit_code=2)
+        script_text = (tmp_path / "task").read_text()
+        (tmp_path / "task").write_text(
+            script_text.replace("exit 2", "echo 'invalid filter' >&2\nexit 2")
+        )
+
+        with pytest.raises(TaskWarriorException, match="invalid filter"):
+            backend.export_data()
+
+    def test_iter_export_data_with_large_stderr(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+        # More than fits into a pipe buffer, written before the export
+        script_text = (tmp_path / "task").read_text()
+        (tmp_path / "task").write_text(
+            script_text.replace(
+                "#!/bin/sh\n", "#!/bin/sh\nhead -c 1000000 /dev/zero >&2\n"
+            )
+        )
+
+        # The export would block forever if stderr was a pipe
+        data: List[Dict] = []
+        thread = threading.Thread(
+            target=lambda: data.extend(backend.export_data()), daemon=True
+        )
+        thread.start()
+        thread.join(10)
+        assert len(data) == 2
+
+    def test_iter_export_data_raises_on_invalid_json(self, tmp_path):
+        backend = make_backend(tmp_path, "{invalid\n")
+        with pytest.raises(TaskWarriorException):
+            backend.export_data()
+
+    def test_recurrence_is_skipped_while_data_is_unchanged(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+        (tmp_path / "pending.data").write_text("")
+
+        backend.export_data()
+        backend.export_data()
+        assert backend.recurrence_runs == 1
+        assert backend.recurrence_skips == 1
+
+        # Changed data is only picked up after the interval has passed
+        (tmp_path / "pending.data").write_text("\n")
+        backend.export_data()
+        assert backend.recurrence_runs == 1
+
+        backend.recurrence_last_run -= backend.recurrence_interval
+        backend.export_data()
+        assert backend.recurrence_runs == 2
+        assert backend.recurrence_skips == 2
+
+    def test_recurrence_stamp_includes_generated_instances(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+        # Like taskwarrior 2.4.2+, generate recurring instances on export
+        # unless recurrence is turned off
+        (tmp_path / "task").write_text(
+            "#!/bin/sh\n"
+            'case "$*" in *recurrence=off*) ;; '
+            f"*) echo >> {tmp_path / 'pending.data'} ;; esac\n"
+            f"cat {tmp_path / 'export.json'}\n"
+        )
+
+        backend.export_data()
+        backend.recurrence_last_run -= backend.recurrence_interval
+        backend.export_data()
+        assert backend.recurrence_runs == 1
+        assert backend.recurrence_skips == 1
+        assert (tmp_path / "pending.data").read_text() == "\n"
+
+    def test_recurrence_runs_on_day_boundary(self, tmp_path):
+        backend = make_backend(tmp_path, EXPORT)
+
+        backend.export_data()
+        backend.recurrence_last_date = date.today() - timedelta(days=1)
+        backend.export_data()
+        assert backend.recurrence_runs == 2
+        assert backend.recurrence_skips == 0
+
+    def test_config_of_empty_taskrc_does_not_run_task(self, tmp_path):
+        (tmp_path / "taskrc").write_text("# No settings\n")
+        backend = PatchedTaskWarrior(
+            data_location=str(tmp_path),
+            create=False,
+            task_command=str(tmp_path / "missing"),
+            version_override="2.5.1",
+            taskrc=Taskrc(str(tmp_path / "taskrc")),
+        )
+        assert dict(backend.config) == {}
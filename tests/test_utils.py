@@ -9,3 +9,7 @@ def test_calculate_datetime():
         calculate_datetime("today+5days").day
         == (datetime.today() + timedelta(days=5)).day
     )
+
+
+def test_calculate_datetime_is_cached():
+    assert calculate_datetime("tomorrow") is calculate_datetime("tomorrow")
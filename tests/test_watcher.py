@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+from taskschedule.watcher import (
+    FileWatcher,
+    InotifyWatcher,
+    PollingWatcher,
+    create_watcher,
+)
+
+
+class FakeWatcher(FileWatcher):
+    def __init__(self):
+        super().__init__("/tmp", debounce=1.0, max_delay=5.0)
+        self.changes = []
+
+    def read_changes(self) -> bool:
+        return self.changes.pop(0) if self.changes else False
+
+
+def test_poll_debounces_bursts():
+    watcher = FakeWatcher()
+    watcher.changes = [True, True, True]
+
+    assert not watcher.poll(now=0.0)
+    assert not watcher.poll(now=0.5)
+    assert not watcher.poll(now=1.0)
+    assert watcher.poll(now=2.1)
+    assert not watcher.poll(now=3.0)
+    assert watcher.reloads == 1
+
+
+def test_poll_reports_steady_changes_after_max_delay():
+    watcher = FakeWatcher()
+    watcher.changes = [True] * 10
+
+    reloads = [watcher.poll(now=float(second)) for second in range(7)]
+    assert reloads == [False] * 5 + [True, False]
+
+
+@pytest.mark.parametrize(
+    "watcher_class",
+    [
+        PollingWatcher,
+        pytest.param(
+            InotifyWatcher,
+            marks=pytest.mark.skipif(
+                not sys.platform.startswith("linux"), reason="Requires Linux"
+            ),
+        ),
+    ],
+)
+def test_watcher_detects_data_file_changes(tmp_path, watcher_class):
+    (tmp_path / "pending.data").write_text("")
+    watcher = watcher_class(str(tmp_path))
+    try:
+        assert not watcher.read_changes()
+
+        (tmp_path / "other.data").write_text("ignored")
+        assert not watcher.read_changes()
+
+        (tmp_path / "undo.data").write_text("time 1\n")
+        assert watcher.read_changes()
+        assert not watcher.read_changes()
+    finally:
+        watcher.close()
+
+
+def test_create_watcher_falls_back_to_polling(tmp_path):
+    watcher = create_watcher(str(tmp_path / "missing"))
+    assert isinstance(watcher, PollingWatcher)
+    assert not os.path.exists(tmp_path / "missing")